@@ -5,8 +5,14 @@ from rest_framework.validators import ValidationError
 from rest_framework import status
 from django.contrib.auth import authenticate
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.authtoken.models import Token
-from drf_spectacular.utils import extend_schema
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from apps.account.authentication import (
+    ExpiringTokenAuthentication,
+    issue_token,
+    rotate_token,
+)
+from apps.account.models import AuthToken
+from apps.crypto.api.schema import extend_schema
 from rest_framework.views import APIView
 
 
@@ -22,6 +28,7 @@ from rest_framework.views import APIView
 class SignUpView(generics.CreateAPIView):
 
     permission_classes = [AllowAny]
+    throttle_scope = "auth"
 
     def __init__(self, **kwargs):
         self.response_format = dict()
@@ -51,9 +58,9 @@ class SignUpView(generics.CreateAPIView):
     summary="User login",
     description="""
     This endpoint allows users to log in by providing their email and password.
-    On successful authentication, it returns an access and refresh token,
-    along with the user's email and username. \n\n
-    the user's email and username.
+    On successful authentication, it returns a new API token and its expiry.
+    The token stays valid while it is used, up to ACCOUNT_TOKEN_MAX_AGE after
+    login. \n\n
     **Access Control:**
     - No authentication is required to access this endpoint.
     """,
@@ -62,6 +69,7 @@ class SignUpView(generics.CreateAPIView):
 class LoginView(generics.GenericAPIView):
 
     permission_classes = [AllowAny]
+    throttle_scope = "auth"
     serializer_class = LoginSerializer
 
     def __init__(self, **kwargs):
@@ -76,10 +84,13 @@ class LoginView(generics.GenericAPIView):
                 password = serializer.validated_data["password"]
                 user = authenticate(request, email=email, password=password)
                 if user is not None:
-                    token, created = Token.objects.get_or_create(user=user)
+                    token = issue_token(user)
                     self.response_format["success"] = True
                     self.response_format["status_code"] = status.HTTP_200_OK
-                    self.response_format["data"] = {"token": token.key}
+                    self.response_format["data"] = {
+                        "token": token.key,
+                        "expires_at": token.expires_at,
+                    }
                     self.response_format["message"] = "User Login Successfull"
                     return Response(self.response_format, status=status.HTTP_200_OK)
                 else:
@@ -110,10 +121,17 @@ class LoginView(generics.GenericAPIView):
 )
 class LogoutView(APIView):
     """
-    Handles user logout by deleting the authentication token.
+    Handles user logout by deleting the authentication token; with basic or
+    session authentication every token of the user is deleted.
     """
 
+    authentication_classes = [
+        ExpiringTokenAuthentication,
+        BasicAuthentication,
+        SessionAuthentication,
+    ]
     permission_classes = [IsAuthenticated]
+    throttle_scope = "auth"
 
     def __init__(self, **kwargs):
         self.response_format = dict()
@@ -121,7 +139,10 @@ class LogoutView(APIView):
 
     def post(self, request, *args, **kwargs):
         try:
-            request.user.auth_token.delete()
+            if isinstance(request.auth, AuthToken):
+                request.auth.delete()
+            else:
+                request.user.auth_tokens.all().delete()
             self.response_format["success"] = True
             self.response_format["status_code"] = status.HTTP_200_OK
             self.response_format["message"] = "User logged out successfully."
@@ -135,3 +156,36 @@ class LogoutView(APIView):
             return Response(
                 self.response_format, status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+@extend_schema(
+    summary="Rotate the API Token",
+    description="""
+    This endpoint replaces the key of the token used to call it with a new
+    one, without logging in again. The old key stops working at once; the
+    expiry still counts from the original login.
+    **Access Control:**
+    - Token authentication is required to access this endpoint.
+    """,
+    tags=["Account Module APIS"],
+)
+class TokenRotateView(APIView):
+
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "auth"
+
+    def __init__(self, **kwargs):
+        self.response_format = dict()
+        super().__init__(**kwargs)
+
+    def post(self, request, *args, **kwargs):
+        token = rotate_token(request.auth)
+        self.response_format["success"] = True
+        self.response_format["status_code"] = status.HTTP_200_OK
+        self.response_format["data"] = {
+            "token": token.key,
+            "expires_at": token.expires_at,
+        }
+        self.response_format["message"] = "Token rotated"
+        return Response(self.response_format, status=status.HTTP_200_OK)
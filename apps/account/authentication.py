@@ -0,0 +1,98 @@
+import datetime
+import time
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from apps.account.models import AuthToken
+from apps.account.utils import forget_token
+
+
+def _seconds(seconds):
+    return datetime.timedelta(seconds=seconds)
+
+
+def issue_token(user):
+    """
+    Creates a new token for `user`, valid for ACCOUNT_TOKEN_TTL seconds.
+    """
+    return AuthToken.objects.create(
+        user=user, expires_at=timezone.now() + _seconds(settings.ACCOUNT_TOKEN_TTL)
+    )
+
+
+def rotate_token(token):
+    """
+    Gives `token` a new key, so a client can replace a key that may have
+    leaked without logging in again. The old key stops working at once; the
+    expiry and ACCOUNT_TOKEN_MAX_AGE still count from the original login.
+    """
+    key = AuthToken.generate_key()
+    AuthToken.objects.filter(key=token.key).update(key=key)
+    forget_token(token.key)
+    token.key = key
+    return token
+
+
+def renewed_expiry(token, now):
+    """
+    Returns the new expiry of a token used at `now`, or None when it does not
+    need a write: the expiry only moves once it is ACCOUNT_TOKEN_RENEW_INTERVAL
+    seconds behind a fresh one, and never past ACCOUNT_TOKEN_MAX_AGE.
+    """
+    expires_at = min(
+        now + _seconds(settings.ACCOUNT_TOKEN_TTL),
+        token.created + _seconds(settings.ACCOUNT_TOKEN_MAX_AGE),
+    )
+    if expires_at - token.expires_at < _seconds(settings.ACCOUNT_TOKEN_RENEW_INTERVAL):
+        return None
+    return expires_at
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication against `AuthToken`: expired tokens are rejected and
+    tokens in use have their expiry slid forward (see `renewed_expiry`).
+    """
+
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        user, token = super().authenticate_credentials(key)
+        now = timezone.now()
+        if token.expires_at <= now:
+            raise AuthenticationFailed("Token has expired.")
+        expires_at = renewed_expiry(token, now)
+        if expires_at is not None:
+            AuthToken.objects.filter(key=token.key).update(expires_at=expires_at)
+            token.expires_at = expires_at
+        return user, token
+
+
+def purge_expired_tokens(batch_size=None, pause=0, now=None):
+    """
+    Deletes the tokens expired at `now` in batches of `batch_size` keys, each
+    batch its own short transaction, so logins and renewals are never held
+    behind one long delete.
+
+    Args:
+        batch_size (int): Tokens per delete (default ACCOUNT_TOKEN_PURGE_BATCH_SIZE).
+        pause (float): Seconds to sleep between two batches.
+        now (datetime): Expiry cut-off (default: now).
+
+    Returns:
+        int: The number of tokens deleted.
+    """
+    batch_size = batch_size or settings.ACCOUNT_TOKEN_PURGE_BATCH_SIZE
+    now = now or timezone.now()
+    expired = AuthToken.objects.filter(expires_at__lte=now).order_by("expires_at")
+    deleted = 0
+    while True:
+        keys = list(expired.values_list("key", flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += AuthToken.objects.filter(key__in=keys).delete()[0]
+        if len(keys) < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)
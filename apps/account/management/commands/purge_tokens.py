@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.account.authentication import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired API tokens in small batches; run it periodically, "
+        "e.g. hourly from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ACCOUNT_TOKEN_PURGE_BATCH_SIZE,
+            help="Tokens deleted per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between two batches.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_tokens(options["batch_size"], options["pause"])
+        self.stdout.write(f"Deleted {deleted} expired tokens")
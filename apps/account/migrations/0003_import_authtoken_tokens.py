@@ -0,0 +1,77 @@
+import datetime
+from django.apps import apps as global_apps
+from django.db import migrations
+from django.utils import timezone
+
+# Imported tokens are valid for the default ACCOUNT_TOKEN_TTL. Migrations do
+# not read settings, so the result does not depend on the environment.
+IMPORTED_TOKEN_TTL = datetime.timedelta(days=7)
+BATCH_SIZE = 1000
+
+
+def import_authtoken_tokens(apps, schema_editor):
+    """
+    Copies the tokens of `rest_framework.authtoken` into AuthToken, in
+    batches, as issued now, so clients keep working until they log in again.
+    """
+    try:
+        Token = apps.get_model("authtoken", "Token")
+    except LookupError:
+        # The authtoken app is no longer installed.
+        return
+    AuthToken = apps.get_model("account", "AuthToken")
+    expires_at = timezone.now() + IMPORTED_TOKEN_TTL
+    tokens = []
+    for key, user_id in Token.objects.values_list("key", "user_id").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        tokens.append(AuthToken(key=key, user_id=user_id, expires_at=expires_at))
+        if len(tokens) == BATCH_SIZE:
+            AuthToken.objects.bulk_create(tokens, ignore_conflicts=True)
+            tokens = []
+    AuthToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+def export_authtoken_tokens(apps, schema_editor):
+    """
+    Copies the unexpired AuthTokens back into `rest_framework.authtoken`,
+    which holds one token per user: the latest one of users without one.
+    """
+    try:
+        Token = apps.get_model("authtoken", "Token")
+    except LookupError:
+        return
+    AuthToken = apps.get_model("account", "AuthToken")
+    users = set(Token.objects.values_list("user_id", flat=True))
+    latest = (
+        AuthToken.objects.filter(expires_at__gt=timezone.now())
+        .order_by("-created")
+        .values_list("key", "user_id")
+    )
+    tokens = []
+    for key, user_id in latest.iterator(chunk_size=BATCH_SIZE):
+        if user_id in users:
+            continue
+        users.add(user_id)
+        tokens.append(Token(key=key, user_id=user_id))
+        if len(tokens) == BATCH_SIZE:
+            Token.objects.bulk_create(tokens, ignore_conflicts=True)
+            tokens = []
+    Token.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("account", "0002_authtoken"),
+    ]
+
+    operations = [
+        migrations.RunPython(import_authtoken_tokens, export_authtoken_tokens),
+    ]
+
+
+# Only while the authtoken app is installed: once `migrate authtoken zero`
+# has dropped its table, the app can be removed without breaking this graph.
+if global_apps.is_installed("rest_framework.authtoken"):
+    Migration.dependencies.append(("authtoken", "0003_tokenproxy"))
@@ -1,3 +1,6 @@
+import binascii
+import os
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.core.validators import EmailValidator
@@ -32,3 +35,38 @@ class Account(AbstractUser):
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+
+class AuthToken(models.Model):
+    """
+    API token issued at login. Every login gets its own token, valid until
+    `expires_at`; `ExpiringTokenAuthentication` slides the expiry forward
+    while the token is in use, up to ACCOUNT_TOKEN_MAX_AGE after `created`.
+    """
+
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="auth_tokens",
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # `purge_tokens` scans the expired tokens in expiry order.
+            models.Index(fields=["expires_at"], name="auth_token_expiry_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = self.generate_key()
+        return super().save(*args, **kwargs)
+
+    @staticmethod
+    def generate_key():
+        return binascii.hexlify(os.urandom(20)).decode()
+
+    def __str__(self):
+        return self.key
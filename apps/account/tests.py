@@ -1,7 +1,23 @@
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.core.cache import cache
+from django.contrib.auth.models import Group
+from django.test import override_settings
+from django.apps import apps
+from unittest.mock import patch
+import datetime
+import importlib
+import io
+from django.utils import timezone
+from django.core.management import call_command
+from apps.account.authentication import issue_token, purge_expired_tokens
+from apps.account.admin import AccountAdmin, update_in_batches
+from apps.account.models import AuthToken
+from apps.account.throttling import SlidingWindowCounters, counters
+from apps.account.utils import _group_names
 
 User = get_user_model()
 
@@ -50,3 +66,239 @@ class AccountModuleAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(response.data["success"])
         self.assertIn("token", response.data["data"])
+
+
+class SlidingWindowThrottleTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        counters.clear()
+        # User ids are reused between tests; drop groups cached for others.
+        _group_names.clear()
+
+    def tearDown(self):
+        counters.clear()
+
+    def test_sliding_window(self):
+        local = SlidingWindowCounters(sync_interval=3600)
+        self.assertEqual(local.hit("key", 2, 60, now=600), 0)
+        self.assertEqual(local.hit("key", 2, 60, now=610), 0)
+        self.assertAlmostEqual(local.hit("key", 2, 60, now=620), 40)
+        # Halfway through the next window half of the previous one counts.
+        self.assertGreater(local.hit("key", 2, 60, now=670), 0)
+        self.assertEqual(local.hit("key", 2, 60, now=700), 0)
+
+    def test_counts_are_shared_through_the_cache(self):
+        first, second = SlidingWindowCounters(3600), SlidingWindowCounters(3600)
+        first.hit("key", 2, 60, now=600)
+        first.hit("key", 2, 60, now=601)
+        first.sync(now=602)
+        second.hit("key", 10, 60, now=602)
+        second.sync(now=603)
+        self.assertGreater(second.hit("key", 3, 60, now=604), 0)
+
+    def test_workers_share_one_limit(self):
+        workers = [SlidingWindowCounters(3600), SlidingWindowCounters(3600)]
+        allowed = 0
+        for second in range(8):
+            worker = workers[second % 2]
+            allowed += not worker.hit("key", 4, 60, now=600 + second)
+            # The worker that counted the request flushes it first.
+            for each in sorted(workers, key=lambda each: each is not worker):
+                each.sync(now=600 + second)
+        self.assertEqual(allowed, 4)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            "DEFAULT_THROTTLE_RATES": {"coin_search": "1/min"},
+            "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
+            "DEFAULT_VERSION": "v1",
+            "ALLOWED_VERSIONS": ["v1", "v2"],
+        },
+        ACCOUNT_THROTTLE_GROUP_RATES={"premium": {"coin_search": "3/min"}},
+    )
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins", return_value=[])
+    def test_throttles_per_user_and_group(self, get_coins):
+        user = User.objects.create_user(
+            email="throttle@gmail.com", username="Throttleuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=user)
+        url = reverse("coin_search_v1")
+        self.assertNotEqual(self.client.get(url, {"q": "x"}).status_code, 429)
+        response = self.client.get(url, {"q": "x"})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", response)
+
+        premium = User.objects.create_user(
+            email="premium@gmail.com", username="Premiumuser", password="Test@1234"
+        )
+        premium.groups.add(Group.objects.create(name="premium"))
+        self.client.force_authenticate(user=premium)
+        for _ in range(3):
+            self.assertNotEqual(self.client.get(url, {"q": "x"}).status_code, 429)
+
+
+class ExpiringTokenTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="token@gmail.com", username="Tokenuser", password="Test@1234"
+        )
+        self.url = reverse("logout_v1")
+
+    def logout(self, token):
+        return self.client.post(self.url, HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def test_every_login_gets_its_own_token(self):
+        data = {"email": "token@gmail.com", "password": "Test@1234"}
+        first = self.client.post(reverse("login_v1"), data).data["data"]
+        second = self.client.post(reverse("login_v1"), data).data["data"]
+        self.assertNotEqual(first["token"], second["token"])
+        self.assertIn("expires_at", first)
+        self.assertEqual(self.user.auth_tokens.count(), 2)
+
+    def test_expired_tokens_are_rejected(self):
+        token = issue_token(self.user)
+        AuthToken.objects.filter(key=token.key).update(expires_at=timezone.now())
+        response = self.logout(token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(
+        ACCOUNT_TOKEN_TTL=3600,
+        ACCOUNT_TOKEN_RENEW_INTERVAL=600,
+        ACCOUNT_TOKEN_MAX_AGE=7200,
+    )
+    def test_tokens_in_use_are_renewed_up_to_max_age(self):
+        token = issue_token(self.user)
+        tokens = AuthToken.objects.filter(key=token.key)
+        seconds = datetime.timedelta(seconds=1)
+
+        def search():
+            self.client.get(
+                reverse("coin_search_v1"),
+                {"q": "x"},
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+            )
+            token.refresh_from_db()
+            return token.expires_at
+
+        with patch("apps.crypto.snapshots.CRYPTOAPI.get_coins", return_value=[]):
+            # Used right after login the expiry is not rewritten.
+            expires_at = token.expires_at
+            self.assertEqual(search(), expires_at)
+            # Half an hour later it slides forward.
+            tokens.update(expires_at=expires_at - 1800 * seconds)
+            self.assertGreater(search(), expires_at - 100 * seconds)
+            # Never past ACCOUNT_TOKEN_MAX_AGE after login.
+            now = timezone.now()
+            tokens.update(created=now - 7100 * seconds, expires_at=now + 60 * seconds)
+            self.assertLessEqual(search(), now + 100 * seconds)
+
+    def test_logout_deletes_only_the_token_used(self):
+        token, other = issue_token(self.user), issue_token(self.user)
+        self.assertEqual(self.logout(token).status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.user.auth_tokens.all()), [other])
+
+    def test_rotation_replaces_the_key(self):
+        token = issue_token(self.user)
+        response = self.client.post(
+            reverse("token_rotate_v1"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = AuthToken.objects.get(key=response.data["data"]["token"])
+        self.assertNotEqual(rotated.key, token.key)
+        self.assertEqual(rotated.created, token.created)
+        self.assertEqual(self.logout(token).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.logout(rotated).status_code, status.HTTP_200_OK)
+
+    def test_migration_imports_authtoken_tokens(self):
+        migration = importlib.import_module(
+            "apps.account.migrations.0003_import_authtoken_tokens"
+        )
+        self.assertIn(
+            ("authtoken", "0003_tokenproxy"), migration.Migration.dependencies
+        )
+        legacy = Token.objects.create(user=self.user)
+        migration.import_authtoken_tokens(apps, None)
+        token = AuthToken.objects.get(key=legacy.key)
+        self.assertEqual(token.user, self.user)
+        self.assertGreater(token.expires_at, timezone.now())
+        self.assertTrue(Token.objects.filter(key=legacy.key).exists())
+
+        # The reverse copies the latest token of users left without one.
+        Token.objects.all().delete()
+        latest = issue_token(self.user)
+        migration.export_authtoken_tokens(apps, None)
+        self.assertEqual(
+            list(Token.objects.values_list("key", flat=True)), [latest.key]
+        )
+
+    def test_purge_deletes_expired_tokens_in_batches(self):
+        live = issue_token(self.user)
+        for _ in range(5):
+            issue_token(self.user)
+        AuthToken.objects.exclude(key=live.key).update(
+            expires_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        with patch("apps.account.authentication.time.sleep") as sleep:
+            self.assertEqual(purge_expired_tokens(batch_size=2, pause=0.1), 5)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(list(AuthToken.objects.all()), [live])
+        output = io.StringIO()
+        call_command("purge_tokens", stdout=output)
+        self.assertIn("Deleted 0 expired tokens", output.getvalue())
+
+
+class AccountAdminTestCase(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            email="admin@gmail.com", username="Adminuser", password="Test@1234"
+        )
+        self.accounts = [
+            User.objects.create_user(
+                email=f"user{n}@gmail.com", username=f"User{n}", password="Test@1234"
+            )
+            for n in range(5)
+        ]
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:account_account_changelist")
+
+    def emails(self, response):
+        return [account.email for account in response.context["cl"].result_list]
+
+    @patch.object(AccountAdmin, "list_per_page", 2)
+    @override_settings(ACCOUNT_ADMIN_COUNT_LIMIT=4)
+    def test_changelist_pages_by_id_with_a_capped_count(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.emails(response), ["user4@gmail.com", "user3@gmail.com"])
+        self.assertContains(response, "4+ users")
+        response = self.client.get(self.url + response.context["cl"].next_url)
+        self.assertEqual(self.emails(response), ["user2@gmail.com", "user1@gmail.com"])
+        response = self.client.get(self.url + response.context["cl"].next_url)
+        self.assertEqual(self.emails(response), ["user0@gmail.com", "admin@gmail.com"])
+        self.assertIsNone(response.context["cl"].next_url)
+
+    def test_search_matches_email_prefix(self):
+        response = self.client.get(self.url, {"q": "user3"})
+        self.assertEqual(self.emails(response), ["user3@gmail.com"])
+        response = self.client.get(self.url, {"q": "gmail"})
+        self.assertEqual(self.emails(response), [])
+
+    @override_settings(ACCOUNT_ADMIN_BATCH_SIZE=2)
+    def test_bulk_actions_run_in_batches(self):
+        response = self.client.post(
+            self.url + "?q=user",
+            {
+                "action": "deactivate_accounts",
+                "select_across": "1",
+                "index": "0",
+                "_selected_action": [self.accounts[0].pk],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(User.objects.filter(is_active=False).count(), 5)
+        self.assertTrue(User.objects.get(pk=self.admin.pk).is_active)
+        self.assertEqual(update_in_batches(User.objects.all(), is_active=True), 6)
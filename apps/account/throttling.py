@@ -0,0 +1,207 @@
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from apps.account.utils import get_user_groups
+
+_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@lru_cache(maxsize=256)
+def parse_rate(rate):
+    """
+    Parses a DRF style rate such as "120/min" into (requests, seconds).
+    Returns (None, None) for no limit.
+    """
+    if not rate:
+        return None, None
+    count, period = rate.split("/")
+    return int(count), _PERIODS[period[0]]
+
+
+class _Counter:
+
+    def __init__(self, window):
+        self.window = window
+        self.synced = {}
+        self.pending = {}
+
+    def count(self, index):
+        return self.synced.get(index, 0) + self.pending.get(index, 0)
+
+
+class SlidingWindowCounters:
+    """
+    Sliding-window request counters held in-process.
+
+    Requests are counted in fixed windows; the rate over the last `window`
+    seconds is the current window's count plus the previous one's, weighted
+    by the share of it still inside the sliding window. Counts are added to
+    the shared cache by a background thread every `sync_interval` seconds,
+    which brings back the other workers' counts at the same time, so a
+    request never waits on the cache.
+    """
+
+    def __init__(self, sync_interval=None):
+        self.sync_interval = sync_interval
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._syncer = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # The syncer thread is not copied into a forked worker.
+        self._lock = threading.Lock()
+        self._syncer = None
+
+    def hit(self, key, limit, window, now=None):
+        """
+        Counts a request of `key` unless it would exceed `limit` requests
+        per `window` seconds.
+
+        Returns:
+            float: 0 when the request is allowed, otherwise the seconds to
+            wait before the next one would be.
+        """
+        now = time.time() if now is None else now
+        position = now / window
+        index = int(position)
+        elapsed = position - index
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = _Counter(window)
+            current, previous = counter.count(index), counter.count(index - 1)
+            if previous * (1 - elapsed) + current + 1 > limit:
+                if current + 1 > limit or not previous:
+                    return (1 - elapsed) * window
+                allowed_at = 1 - (limit - current - 1) / previous
+                return max(allowed_at - elapsed, 0.001) * window
+            counter.pending[index] = counter.pending.get(index, 0) + 1
+        self._start_syncer()
+        return 0.0
+
+    def sync(self, now=None):
+        """
+        Adds the counts made since the last sync to the shared cache and
+        refreshes every counter with the totals of all workers.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            flushed = {}
+            for key, counter in list(self._counters.items()):
+                index = int(now / counter.window)
+                recent = [
+                    count
+                    for window_index, count in counter.synced.items()
+                    if window_index >= index - 1
+                ]
+                if not counter.pending and not any(recent):
+                    del self._counters[key]
+                    continue
+                for pending_index, count in counter.pending.items():
+                    flushed[(key, pending_index)] = count
+                counter.pending = {}
+            counters = dict(self._counters)
+
+        totals = {}
+        for (key, index), count in flushed.items():
+            cache_key = f"throttle:{key}:{index}"
+            cache.add(cache_key, 0, 2 * counters[key].window)
+            totals[(key, index)] = cache.incr(cache_key, count)
+        wanted = {}
+        for key, counter in counters.items():
+            index = int(now / counter.window)
+            for window_index in (index - 1, index):
+                if (key, window_index) not in totals:
+                    wanted[f"throttle:{key}:{window_index}"] = (key, window_index)
+        for cache_key, count in cache.get_many(list(wanted)).items():
+            totals[wanted[cache_key]] = count
+
+        with self._lock:
+            for key, counter in counters.items():
+                index = int(now / counter.window)
+                counter.synced = {
+                    window_index: max(
+                        totals.get((key, window_index), 0),
+                        counter.synced.get(window_index, 0),
+                    )
+                    for window_index in (index - 1, index)
+                }
+
+    def clear(self):
+        with self._lock:
+            self._counters = {}
+
+    def _start_syncer(self):
+        if self._syncer is not None:
+            return
+        with self._lock:
+            if self._syncer is not None:
+                return
+            self._syncer = threading.Thread(
+                target=self._sync_forever, name="throttle-sync", daemon=True
+            )
+        self._syncer.start()
+
+    def _sync_forever(self):
+        while True:
+            time.sleep(self.sync_interval or settings.ACCOUNT_THROTTLE_SYNC_INTERVAL)
+            try:
+                self.sync()
+            except Exception as e:
+                logging.error("Throttle counter sync failed: %s", e)
+
+
+counters = SlidingWindowCounters()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Throttles views that set a `throttle_scope`, per user when the request
+    is authenticated and per IP address otherwise. The rate of a scope comes
+    from DEFAULT_THROTTLE_RATES, raised by ACCOUNT_THROTTLE_GROUP_RATES for
+    users in one of the listed groups.
+    """
+
+    def __init__(self):
+        self.wait_time = 0.0
+
+    def get_rate(self, request, scope):
+        limit, window = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        user = request.user
+        if limit is None or not user or not user.is_authenticated:
+            return limit, window
+        for group in get_user_groups(user.pk):
+            group_rate = settings.ACCOUNT_THROTTLE_GROUP_RATES.get(group, {})
+            if scope not in group_rate:
+                continue
+            group_limit, group_window = parse_rate(group_rate[scope])
+            if group_limit is None:
+                return None, None
+            if group_limit / group_window > limit / window:
+                limit, window = group_limit, group_window
+        return limit, window
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if scope is None:
+            return True
+        limit, window = self.get_rate(request, scope)
+        if limit is None:
+            return True
+        user = request.user
+        if user and user.is_authenticated:
+            ident = f"user:{user.pk}"
+        else:
+            ident = f"ip:{self.get_ident(request)}"
+        self.wait_time = counters.hit(f"{scope}:{ident}", limit, window)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
@@ -1,7 +1,12 @@
 import string
+import time
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.utils import timezone
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils.crypto import get_random_string
 from django.contrib.auth import get_user_model
+from apps.account.models import AuthToken
 
 User = get_user_model()
 
@@ -23,3 +28,69 @@ def generate_user():
 def get_token_for_user(user):
     refresh = RefreshToken.for_user(user)
     return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+_group_names = {}
+
+
+def _cached_groups(cache_key, **lookup):
+    now = time.monotonic()
+    cached = _group_names.get(cache_key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    if len(_group_names) >= 10000:
+        _group_names.clear()
+    names = frozenset(Group.objects.filter(**lookup).values_list("name", flat=True))
+    _group_names[cache_key] = (now + settings.ACCOUNT_GROUP_CACHE_TIMEOUT, names)
+    return names
+
+
+def get_user_groups(user_id):
+    """
+    Returns the group names of a user, cached in-process for
+    ACCOUNT_GROUP_CACHE_TIMEOUT seconds so the request path does not query
+    them every time.
+    """
+    return _cached_groups(("user", user_id), account_groups__id=user_id)
+
+
+_token_owners = {}
+
+
+def forget_token(token_key):
+    """
+    Drops the cached owner of a token, so a rotated key stops counting at
+    once in this process.
+    """
+    _token_owners.pop(token_key, None)
+
+
+def get_token_groups(token_key):
+    """
+    Returns the group names of the user owning an auth token, cached like
+    `get_user_groups`. Empty for unknown and expired tokens.
+
+    The token's owner and expiry are what is cached, so the expiry is checked
+    on every call; a token past its cached expiry is looked up again in case
+    it was renewed since.
+    """
+    now = time.monotonic()
+    cached = _token_owners.get(token_key)
+    if (
+        cached is None
+        or cached[0] <= now
+        or (cached[1] is not None and cached[1][1] <= timezone.now())
+    ):
+        if len(_token_owners) >= 10000:
+            _token_owners.clear()
+        owner = (
+            AuthToken.objects.filter(key=token_key)
+            .values_list("user_id", "expires_at")
+            .first()
+        )
+        cached = (now + settings.ACCOUNT_GROUP_CACHE_TIMEOUT, owner)
+        _token_owners[token_key] = cached
+    owner = cached[1]
+    if owner is None or owner[1] <= timezone.now():
+        return frozenset()
+    return get_user_groups(owner[0])
@@ -0,0 +1,350 @@
+import json
+import logging
+import threading
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from apps.crypto.currency import UnsupportedCurrency, conversion_factor, get_rates
+
+logger = logging.getLogger(__name__)
+
+
+class _Thresholds:
+    """
+    Thresholds of one coin, currency and direction in ascending order, with
+    the ids of their alerts in the same order.
+    """
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self):
+        self.values = np.empty(0)
+        self.ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, values, ids):
+        values = np.concatenate([self.values, values])
+        ids = np.concatenate([self.ids, ids])
+        order = np.argsort(values, kind="stable")
+        self.values, self.ids = values[order], ids[order]
+
+    def pop_between(self, low, high, side):
+        """
+        Removes the thresholds between `low` and `high` (`side` as in
+        `np.searchsorted`) and returns their (values, ids). Found with two
+        bisections; the arrays are only copied when something is removed.
+        """
+        start, end = np.searchsorted(self.values, [low, high], side=side)
+        if start >= end:
+            return None
+        popped = self.values[start:end], self.ids[start:end]
+        self.values = np.concatenate([self.values[:start], self.values[end:]])
+        self.ids = np.concatenate([self.ids[:start], self.ids[end:]])
+        return popped
+
+
+class AlertIndex:
+    """
+    Price alert thresholds grouped by coin, currency and direction, each
+    group held in sorted arrays. A price move from `old` to `new` fires the
+    "above" thresholds in (old, new] and the "below" thresholds in
+    [new, old), found by bisection, so checking a move costs O(log n) plus
+    the alerts that fire, whatever the number of alerts.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._currencies = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, alerts):
+        """
+        Adds alerts given as (id, coin_id, vs_currency, direction, threshold)
+        tuples.
+        """
+        grouped = {}
+        for alert_id, coin_id, vs_currency, direction, threshold in alerts:
+            ids, values = grouped.setdefault(
+                (coin_id, vs_currency, direction), ([], [])
+            )
+            ids.append(alert_id)
+            values.append(threshold)
+        for (coin_id, vs_currency, direction), (ids, values) in grouped.items():
+            group = self._groups.get((coin_id, vs_currency, direction))
+            if group is None:
+                group = self._groups[(coin_id, vs_currency, direction)] = _Thresholds()
+                self._currencies.setdefault(coin_id, set()).add(vs_currency)
+            group.add(np.array(values, dtype=np.float64), np.array(ids, dtype=np.int64))
+            self.size += len(ids)
+
+    def crossed(self, coin_id, vs_currency, old, new):
+        """
+        Removes and returns the alerts of a coin fired by its price moving
+        from `old` to `new` in `vs_currency`, as (id, direction, threshold)
+        tuples.
+        """
+        if old < new:
+            direction, popped = "above", self._pop(
+                coin_id, vs_currency, "above", old, new, "right"
+            )
+        elif new < old:
+            direction, popped = "below", self._pop(
+                coin_id, vs_currency, "below", new, old, "left"
+            )
+        else:
+            return []
+        if popped is None:
+            return []
+        values, ids = popped
+        self.size -= len(ids)
+        return list(zip(ids.tolist(), [direction] * len(ids), values.tolist()))
+
+    def _pop(self, coin_id, vs_currency, direction, low, high, side):
+        group = self._groups.get((coin_id, vs_currency, direction))
+        if group is None:
+            return None
+        popped = group.pop_between(low, high, side)
+        if not len(group):
+            del self._groups[(coin_id, vs_currency, direction)]
+            if not any(
+                (coin_id, vs_currency, other) in self._groups
+                for other in ("above", "below")
+            ):
+                currencies = self._currencies[coin_id]
+                currencies.discard(vs_currency)
+                if not currencies:
+                    del self._currencies[coin_id]
+        return popped
+
+    def fired(self, previous, store, factor):
+        """
+        Removes and returns the alerts fired between two market stores, as
+        dicts. Only coins whose price moved and that have alerts are looked
+        at.
+
+        Args:
+            previous (ColumnStore): The market store before the tick.
+            store (ColumnStore): The market store after the tick.
+            factor (callable): Returns the conversion factor from the base
+                currency to a currency, or None when it is not supported.
+        """
+        coin_ids = store.column_values("id")
+        new = store.numbers("current_price")
+        rows = previous.rows_of(coin_ids)
+        old = np.where(rows >= 0, previous.numbers("current_price")[rows], np.nan)
+        moved = np.flatnonzero(np.isfinite(old) & np.isfinite(new) & (old != new))
+        fired = []
+        for position in moved.tolist():
+            coin_id = coin_ids[position]
+            currencies = self._currencies.get(coin_id)
+            if not currencies:
+                continue
+            for vs_currency in list(currencies):
+                rate = factor(vs_currency)
+                if rate is None:
+                    continue
+                old_price, new_price = old[position] * rate, new[position] * rate
+                for alert_id, direction, threshold in self.crossed(
+                    coin_id, vs_currency, old_price, new_price
+                ):
+                    fired.append(
+                        {
+                            "id": alert_id,
+                            "coin_id": coin_id,
+                            "vs_currency": vs_currency,
+                            "direction": direction,
+                            "threshold": threshold,
+                            "price": float(new_price),
+                        }
+                    )
+        return fired
+
+
+class LogSink:
+    """
+    Writes every triggered alert to the `apps.crypto.alerts` logger.
+    """
+
+    def deliver(self, alerts):
+        for alert in alerts:
+            logger.info("Price alert triggered: %s", json.dumps(alert))
+
+
+class JSONLinesSink:
+    """
+    Appends triggered alerts to CRYPTO_ALERT_LOG, one JSON object per line
+    and one write per batch, for a local consumer to tail.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.CRYPTO_ALERT_LOG
+
+    def deliver(self, alerts):
+        with open(self.path, "a") as handle:
+            handle.write("".join(json.dumps(alert) + "\n" for alert in alerts))
+
+
+class AlertEngine:
+    """
+    Evaluates the active price alerts on every market snapshot fetched from
+    upstream and hands the triggered ones to the sink in batches.
+
+    The index is loaded incrementally: each tick only reads the alerts
+    created since the previous one. Alerts deleted in the meantime stay in
+    the index until they fire; delivery only claims alerts that are still
+    active, so they are dropped then.
+
+    Claimed alerts are released again when the sink fails, and put back
+    into the index to fire on the next crossing.
+    """
+
+    def __init__(self, sink=None, batch_size=None):
+        self.index = AlertIndex()
+        self.loaded_id = 0
+        self.batch_size = batch_size
+        self._sink = sink
+        self._lock = threading.Lock()
+
+    @property
+    def sink(self):
+        if self._sink is None:
+            self._sink = import_string(settings.CRYPTO_ALERT_SINK)()
+        return self._sink
+
+    def load(self):
+        """
+        Adds the active alerts created since the last load to the index.
+        """
+        from apps.crypto.models import PriceAlert
+
+        alerts = (
+            PriceAlert.objects.filter(is_active=True, id__gt=self.loaded_id)
+            .order_by("id")
+            .values_list("id", "coin_id", "vs_currency", "direction", "threshold")
+        )
+        batch = []
+        for alert in alerts.iterator(chunk_size=10000):
+            batch.append(alert)
+            if len(batch) == 10000:
+                self._add(batch)
+                batch = []
+        self._add(batch)
+
+    def _add(self, alerts):
+        if alerts:
+            self.index.add(alerts)
+            self.loaded_id = alerts[-1][0]
+
+    def evaluate(self, previous, store):
+        """
+        Fires the alerts crossed between `previous` and `store` and delivers
+        them.
+
+        Returns:
+            int: The number of alerts delivered.
+        """
+        with self._lock:
+            self.load()
+            if previous is None:
+                return 0
+            fired = self.index.fired(previous, store, self._factors())
+        return self.deliver(fired)
+
+    def deliver(self, fired):
+        batch_size = self.batch_size or settings.CRYPTO_ALERT_BATCH_SIZE
+        delivered = 0
+        for start in range(0, len(fired), batch_size):
+            claimed = self.claim(fired[start : start + batch_size])
+            if not claimed:
+                continue
+            try:
+                self.sink.deliver(claimed)
+            except Exception as e:
+                logger.error("Delivering price alerts failed: %s", e)
+                self.release(claimed)
+                continue
+            delivered += len(claimed)
+        return delivered
+
+    def claim(self, alerts):
+        """
+        Marks a batch of fired alerts as triggered and returns those that
+        were still active, so an alert is delivered once even when several
+        processes evaluate the same tick.
+        """
+        from apps.crypto.models import PriceAlert
+
+        by_id = {alert["id"]: alert for alert in alerts}
+        with transaction.atomic():
+            active = list(
+                PriceAlert.objects.select_for_update(skip_locked=True)
+                .filter(id__in=list(by_id), is_active=True)
+                .values_list("id", "user_id")
+            )
+            PriceAlert.objects.filter(
+                id__in=[alert_id for alert_id, _ in active]
+            ).update(is_active=False, triggered_at=timezone.now())
+        return [{**by_id[alert_id], "user_id": user_id} for alert_id, user_id in active]
+
+    def release(self, alerts):
+        """
+        Marks claimed alerts active again and puts them back into the index.
+        """
+        from apps.crypto.models import PriceAlert
+
+        PriceAlert.objects.filter(id__in=[alert["id"] for alert in alerts]).update(
+            is_active=True, triggered_at=None
+        )
+        with self._lock:
+            self.index.add(
+                [
+                    (
+                        alert["id"],
+                        alert["coin_id"],
+                        alert["vs_currency"],
+                        alert["direction"],
+                        alert["threshold"],
+                    )
+                    for alert in alerts
+                ]
+            )
+
+    @staticmethod
+    def _factors():
+        base = settings.CRYPTO_BASE_CURRENCY
+        factors = {base: 1.0}
+
+        def factor(vs_currency):
+            if vs_currency not in factors:
+                try:
+                    factors[vs_currency] = conversion_factor(
+                        get_rates(), base, vs_currency
+                    )
+                except (UnsupportedCurrency, RuntimeError) as e:
+                    logger.error("Price alerts in %s skipped: %s", vs_currency, e)
+                    factors[vs_currency] = None
+            return factors[vs_currency]
+
+        return factor
+
+
+alert_engine = AlertEngine()
+
+
+def evaluate_alerts(previous, store, version):
+    """
+    Snapshot subscriber evaluating the price alerts on every fetched market
+    snapshot. Failures are logged, never raised into the refresh that
+    published the snapshot.
+    """
+    try:
+        alert_engine.evaluate(previous, store)
+    except Exception as e:
+        logger.error("Evaluating price alerts failed: %s", e)
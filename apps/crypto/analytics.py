@@ -0,0 +1,131 @@
+import numpy as np
+from apps.crypto.store import CategoryColumn
+
+# Fields returned for every coin of a top list.
+SUMMARY_FIELDS = (
+    "id",
+    "symbol",
+    "name",
+    "market_cap_rank",
+    "current_price",
+    "market_cap",
+    "total_volume",
+    "price_change_percentage_24h",
+)
+
+
+def _top(values, limit, descending=True):
+    """
+    Returns the rows of the `limit` largest (or smallest) non-NaN values.
+    """
+    rows = np.flatnonzero(~np.isnan(values))
+    if len(rows) > limit:
+        keys = -values[rows] if descending else values[rows]
+        rows = rows[np.argpartition(keys, limit - 1)[:limit]]
+    order = np.argsort(values[rows], kind="stable")
+    return rows[order[::-1] if descending else order]
+
+
+def _codes(column):
+    """
+    Returns (int codes, distinct values) of a string column.
+    """
+    if isinstance(column, CategoryColumn):
+        return np.asarray(column.codes), list(column.categories)
+    names, codes = np.unique(
+        np.array(column.to_list(slice(0, len(column))), dtype=object),
+        return_inverse=True,
+    )
+    return codes, names.tolist()
+
+
+def category_aggregates(markets, members, names):
+    """
+    Totals the market snapshot per category in one pass per measure.
+
+    Args:
+        markets (ColumnStore): The market snapshot.
+        members (ColumnStore): One (category_id, coin_id) row per membership.
+        names (dict): Category names by category id.
+
+    Returns:
+        list: One dict per category with coins in the snapshot, by market cap.
+    """
+    # No coin_id column: no category has loaded yet (see `member_pairs`).
+    if "coin_id" not in members.columns:
+        return []
+    codes, category_ids = _codes(members.columns["category_id"])
+    rows = markets.rows_of(members.column_values("coin_id"))
+    present = rows >= 0
+    codes, rows = codes[present], rows[present]
+    size = len(category_ids)
+
+    market_cap = np.nan_to_num(markets.numbers("market_cap")[rows])
+    volume = np.nan_to_num(markets.numbers("total_volume")[rows])
+    change = markets.numbers("price_change_percentage_24h")[rows]
+    has_change = ~np.isnan(change)
+
+    totals = np.bincount(codes, weights=market_cap, minlength=size)
+    volumes = np.bincount(codes, weights=volume, minlength=size)
+    counts = np.bincount(codes, minlength=size)
+    # 24h change of the category, weighted by each coin's market cap.
+    weighted = np.bincount(
+        codes[has_change],
+        weights=(change * market_cap)[has_change],
+        minlength=size,
+    )
+    weights = np.bincount(
+        codes[has_change], weights=market_cap[has_change], minlength=size
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        changes = weighted / weights
+
+    order = np.argsort(-totals, kind="stable")
+    return [
+        {
+            "category_id": category_ids[code],
+            "name": names.get(category_ids[code]),
+            "coins": int(counts[code]),
+            "market_cap": float(totals[code]),
+            "total_volume": float(volumes[code]),
+            "market_cap_change_percentage_24h": (
+                None if np.isnan(changes[code]) else float(changes[code])
+            ),
+        }
+        for code in order.tolist()
+        if counts[code]
+    ]
+
+
+def market_analytics(markets, members=None, names=None, limit=10):
+    """
+    Computes market-wide totals, top movers, volume leaders and (when the
+    category membership is loaded) category aggregates over a market
+    snapshot, with vectorized array operations.
+
+    Args:
+        markets (ColumnStore): The market snapshot, in the requested currency.
+        members (ColumnStore): The category membership, or None.
+        names (dict): Category names by category id.
+        limit (int): Length of the top lists.
+
+    Returns:
+        dict: The analytics.
+    """
+    market_cap = markets.numbers("market_cap")
+    volume = markets.numbers("total_volume")
+    change = markets.numbers("price_change_percentage_24h")
+    summary = markets.select(fields=SUMMARY_FIELDS)
+    return {
+        "coins": len(markets),
+        "market_cap": float(np.nansum(market_cap)),
+        "total_volume": float(np.nansum(volume)),
+        "top_gainers": summary.rows(_top(change, limit)),
+        "top_losers": summary.rows(_top(change, limit, descending=False)),
+        "top_volume": summary.rows(_top(volume, limit)),
+        "categories": (
+            None
+            if members is None
+            else category_aggregates(markets, members, names or {})
+        ),
+    }
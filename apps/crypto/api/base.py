@@ -0,0 +1,64 @@
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.views import APIView
+from apps.crypto import tracing
+
+
+class LeanAPIView(APIView):
+    """
+    APIView that builds its authenticators, permissions, parsers, renderers
+    and content negotiator once per view class instead of on every request.
+    These are stateless; the browsable API renderer is not, so renderers
+    are only shared when it is off, and throttles are still built per
+    request.
+    """
+
+    @classmethod
+    def _resolve(cls, name, classes):
+        resolved = cls.__dict__.get("_resolved")
+        if resolved is None:
+            resolved = cls._resolved = {}
+        key = (name, tuple(classes))
+        instances = resolved.get(key)
+        if instances is None:
+            instances = resolved[key] = [component() for component in classes]
+        return instances
+
+    def get_authenticators(self):
+        return self._resolve("authentication", self.authentication_classes)
+
+    def get_permissions(self):
+        return self._resolve("permission", self.permission_classes)
+
+    def get_parsers(self):
+        return self._resolve("parser", self.parser_classes)
+
+    def get_renderers(self):
+        if any(
+            issubclass(renderer, BrowsableAPIRenderer)
+            for renderer in self.renderer_classes
+        ):
+            return super().get_renderers()
+        return self._resolve("renderer", self.renderer_classes)
+
+    def get_content_negotiator(self):
+        return self._resolve("negotiation", [self.content_negotiation_class])[0]
+
+    def dispatch(self, request, *args, **kwargs):
+        with tracing.span("view", **{"code.function": type(self).__name__}):
+            return super().dispatch(request, *args, **kwargs)
+
+    def perform_authentication(self, request):
+        with tracing.span("auth"):
+            super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        with tracing.span("throttle"):
+            super().check_throttles(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if tracing.active() and hasattr(response, "render"):
+            # Rendered here rather than by the handler so it gets its own span.
+            with tracing.span("render"):
+                response.render()
+        return response
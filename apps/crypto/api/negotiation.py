@@ -0,0 +1,13 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class SingleRendererNegotiation(DefaultContentNegotiation):
+    """
+    Skips parsing the Accept header when a view has a single renderer, as
+    the API does when the browsable API is off: there is nothing to choose.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if len(renderers) == 1:
+            return renderers[0], renderers[0].media_type
+        return super().select_renderer(request, renderers, format_suffix)
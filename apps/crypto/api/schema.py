@@ -0,0 +1,57 @@
+import os
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+if settings.API_DOCS:
+    from drf_spectacular.utils import OpenApiResponse, extend_schema
+else:
+    # Lean workers never describe the API, so the annotations of the views
+    # do not have to import drf_spectacular.
+
+    def extend_schema(*args, **kwargs):
+        return lambda view: view
+
+    def OpenApiResponse(*args, **kwargs):
+        return None
+
+
+SCHEMA_FILES = {"json": "openapi.json", "yaml": "openapi.yaml"}
+CONTENT_TYPES = {
+    "json": "application/vnd.oai.openapi+json",
+    "yaml": "application/vnd.oai.openapi",
+}
+
+_schemas = {}
+
+
+def load_schema(schema_format):
+    """
+    Returns the bytes of the schema written by `manage.py build_schema`, read
+    once per process, or None when it has not been built.
+    """
+    body = _schemas.get(schema_format)
+    if body is None:
+        path = os.path.join(settings.API_SCHEMA_DIR, SCHEMA_FILES[schema_format])
+        try:
+            with open(path, "rb") as handle:
+                body = _schemas[schema_format] = handle.read()
+        except FileNotFoundError:
+            return None
+    return body
+
+
+def schema_view(request):
+    """
+    Serves the precomputed OpenAPI schema: YAML by default, JSON with
+    `?format=json`, like `SpectacularAPIView`. Without a built schema it
+    falls back to generating it on each request, unless the docs are off.
+    """
+    schema_format = "json" if request.GET.get("format") == "json" else "yaml"
+    body = load_schema(schema_format)
+    if body is None:
+        if not settings.API_DOCS:
+            raise Http404("The API schema has not been built.")
+        from drf_spectacular.views import SpectacularAPIView
+
+        return SpectacularAPIView.as_view()(request)
+    return HttpResponse(body, content_type=CONTENT_TYPES[schema_format])
@@ -0,0 +1,105 @@
+from django.conf import settings
+from rest_framework import serializers
+from apps.crypto.currency import get_rates
+from apps.crypto.models import Holding, PriceAlert
+from apps.crypto.snapshots import coins_snapshot, markets_snapshot
+
+
+def validate_coin(value):
+    if coins_snapshot.get().row_of(value) is None:
+        raise serializers.ValidationError(f"Unknown coin: {value}")
+    return value
+
+
+def validate_currency(value):
+    value = value.lower()
+    if value != settings.CRYPTO_BASE_CURRENCY and get_rates().row_of(value) is None:
+        raise serializers.ValidationError(f"Unsupported currency: {value}")
+    return value
+
+
+class PriceAlertSerializer(serializers.ModelSerializer):
+
+    vs_currency = serializers.CharField(max_length=10, required=False)
+
+    class Meta:
+        model = PriceAlert
+        fields = (
+            "id",
+            "coin_id",
+            "direction",
+            "threshold",
+            "vs_currency",
+            "is_active",
+            "created_at",
+            "triggered_at",
+        )
+        read_only_fields = ("id", "is_active", "created_at", "triggered_at")
+
+    def validate_coin_id(self, value):
+        value = validate_coin(value)
+        # Alerts are only checked against the market snapshot.
+        if markets_snapshot.get().row_of(value) is None:
+            raise serializers.ValidationError(
+                f"No market data for {value}: alerts are only available for "
+                "the coins of the market snapshot."
+            )
+        return value
+
+    def validate_threshold(self, value):
+        if not value > 0:
+            raise serializers.ValidationError("Threshold must be positive")
+        return value
+
+    def validate_vs_currency(self, value):
+        return validate_currency(value)
+
+    def create(self, validated_data):
+        validated_data.setdefault("vs_currency", settings.CRYPTO_BASE_CURRENCY)
+        return super().create(validated_data)
+
+
+class HoldingSerializer(serializers.ModelSerializer):
+
+    cost_currency = serializers.CharField(max_length=10, required=False)
+
+    class Meta:
+        model = Holding
+        fields = (
+            "id",
+            "coin_id",
+            "quantity",
+            "cost_basis",
+            "cost_currency",
+            "updated_at",
+        )
+        read_only_fields = ("id", "updated_at")
+
+    def validate_coin_id(self, value):
+        return validate_coin(value)
+
+    def validate_quantity(self, value):
+        if not value > 0:
+            raise serializers.ValidationError("Quantity must be positive")
+        return value
+
+    def validate_cost_basis(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Cost basis cannot be negative")
+        return value
+
+    def validate_cost_currency(self, value):
+        return validate_currency(value)
+
+    def save(self, user):
+        """
+        Creates the holding, or replaces the one the user already has for
+        the coin.
+        """
+        data = dict(self.validated_data)
+        data.setdefault("cost_currency", settings.CRYPTO_BASE_CURRENCY)
+        coin_id = data.pop("coin_id")
+        self.instance, _ = Holding.objects.update_or_create(
+            user=user, coin_id=coin_id, defaults=data
+        )
+        return self.instance
@@ -1,11 +1,38 @@
 from django.urls import path
-from .views import CoinListAPI, CoinCategoriesView, CoinMarketView, HealthCheck
+from .views import (
+    CoinListAPI,
+    CoinSearchView,
+    CoinCategoriesView,
+    CategoryCoinsView,
+    CoinMarketView,
+    CoinHistoryView,
+    CoinAnalyticsView,
+    HealthCheck,
+    PriceAlertListView,
+    PriceAlertDetailView,
+    HoldingListView,
+    HoldingDetailView,
+    PortfolioValuationView,
+)
 
 urlpatterns = [
     path("v1/health-check", HealthCheck.as_view(), name="health_check_v1"),
     path("v1/coin-list", CoinListAPI.as_view(), name="coin_list_v1"),
+    path("v1/coin-search", CoinSearchView.as_view(), name="coin_search_v1"),
     path(
         "v1/coin-categories", CoinCategoriesView.as_view(), name="coins_categories_v1"
     ),
+    path("v1/category-coins", CategoryCoinsView.as_view(), name="category_coins_v1"),
     path("v1/coin-market", CoinMarketView.as_view(), name="coin_market_v1"),
+    path("v1/coin-history", CoinHistoryView.as_view(), name="coin_history_v1"),
+    path("v1/coin-analytics", CoinAnalyticsView.as_view(), name="coin_analytics_v1"),
+    path("v1/price-alerts", PriceAlertListView.as_view(), name="price_alerts_v1"),
+    path(
+        "v1/price-alerts/<int:pk>",
+        PriceAlertDetailView.as_view(),
+        name="price_alert_v1",
+    ),
+    path("v1/holdings", HoldingListView.as_view(), name="holdings_v1"),
+    path("v1/holdings/<int:pk>", HoldingDetailView.as_view(), name="holding_v1"),
+    path("v1/portfolio", PortfolioValuationView.as_view(), name="portfolio_v1"),
 ]
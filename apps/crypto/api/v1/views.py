@@ -1,13 +1,40 @@
-from rest_framework.views import Response, APIView
-from apps.crypto.coingeko_api import CRYPTOAPI
+from rest_framework.views import Response
+from apps.crypto.api.base import LeanAPIView
 from apps.crypto.pagination import CPageNumberPagination
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from apps.crypto.api.schema import extend_schema, OpenApiResponse
 from datetime import datetime
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.authentication import BasicAuthentication
+from apps.account.authentication import ExpiringTokenAuthentication
 from apps.crypto.helpers.health_check import check_third_party_service
+from apps.crypto.helpers.fields import get_projection, project_rows
+from apps.crypto.helpers.cache import page_cache_key, get_cached_page, set_cached_page
+from apps.crypto.snapshots import (
+    coins_snapshot,
+    categories_snapshot,
+    markets_snapshot,
+    exchange_rates_snapshot,
+    category_members_snapshot,
+)
+from apps.crypto.analytics import market_analytics
+from apps.crypto.deltas import coin_deltas, delta_response, parse_since
+from django.core.cache import cache
+from apps.crypto.currency import (
+    get_market_store,
+    get_versioned_market_store,
+    market_delta_log,
+    UnsupportedCurrency,
+)
+from apps.crypto.history import METRICS, get_series, history_store, parse_time
+from apps.crypto.search_index import coin_index
+from apps.crypto.category_index import category_index
+from apps.crypto.models import Holding, PriceAlert
+from apps.crypto.portfolio import portfolio_valuation
+from apps.crypto.api.v1.serializers import HoldingSerializer, PriceAlertSerializer
+from rest_framework.exceptions import ValidationError
 from django.http import JsonResponse
 from django.conf import settings
+from rest_framework import status
 
 
 @extend_schema(
@@ -47,9 +74,9 @@ from django.conf import settings
     },
     tags=["Health Check API"],
 )
-class HealthCheck(APIView):
+class HealthCheck(LeanAPIView):
 
-    authentication_classes = [BasicAuthentication, TokenAuthentication]
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
 
     permission_classes = [
         IsAuthenticated,
@@ -91,6 +118,8 @@ class HealthCheck(APIView):
     **Features:**
     - **Pagination:** Supports pagination with customizable page sizes using
       the `per_page` query parameter (default is 10 coins per page).
+    - **Sparse Fieldsets:** `fields` and `exclude` trim each row to the
+      requested keys; every projection is cached as its own page.
     - **Error Handling:** Provides a user-friendly error message in case of
       unexpected issues during the retrieval process.
 
@@ -101,6 +130,13 @@ class HealthCheck(APIView):
     **Query Parameters:**
     - `per_page` (optional): Number of coins to include per page. Defaults to 10 if not
     specified.
+    - `fields` (optional): Comma-separated list of fields to return, e.g.
+    `fields=id,symbol`.
+    - `exclude` (optional): Comma-separated list of fields to leave out.
+    - `since` (optional): A `version` from an earlier response. Returns only
+    the coins added, changed or removed since then, or `"resync": true` when
+    that version is too old, or was issued by another server, and the full
+    list must be fetched again.
 
     **Example Response:**
     ```json
@@ -122,20 +158,115 @@ class HealthCheck(APIView):
     """,
     tags=["Coins API"],
 )
-class CoinListAPI(APIView):
+class CoinListAPI(LeanAPIView):
 
-    authentication_classes = [BasicAuthentication, TokenAuthentication]
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
     permission_classes = [
         IsAuthenticated,
     ]
+    throttle_scope = "coin_list"
 
     def get(self, request, *args, **kwargs):
         try:
-            coins = CRYPTOAPI.get_coins()
-            paginator = CPageNumberPagination()
-            paginator.page_size = request.query_params.get("per_page", 10)
-            result_page = paginator.paginate_queryset(coins, request)
-            return paginator.get_paginated_response(result_page)
+            fields, exclude = get_projection(request.query_params)
+            since = parse_since(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if since is not None:
+                coins, version = coins_snapshot.get_versioned()
+                coins = coins.select(fields, exclude)
+                return Response(
+                    {
+                        "status": True,
+                        "status_code": status.HTTP_200_OK,
+                        "message": "Success",
+                        "data": delta_response(coin_deltas, coins, since, version),
+                    }
+                )
+            cache_key = page_cache_key("coin_list", request, fields, exclude)
+            data = get_cached_page(cache_key)
+            if data is None:
+                coins, version = coins_snapshot.get_versioned()
+                coins = coins.select(fields, exclude)
+                paginator = CPageNumberPagination()
+                paginator.page_size = request.query_params.get("per_page", 10)
+                result_page = paginator.paginate_queryset(coins, request)
+                data = paginator.get_paginated_response(result_page).data
+                data["version"] = version
+                set_cached_page(cache_key, data)
+            return Response(data)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+
+@extend_schema(
+    summary="Search Coins by Symbol or Name",
+    description="""
+    This endpoint allows authenticated users to look up coins for type-ahead
+    search. Coins whose symbol or name starts with the query are returned,
+    exact symbol matches first.
+
+    **Features:**
+    - **In-Memory Index:** Lookups are served from an index over the coin list
+      that is updated whenever the coin list is refreshed.
+    - **Sparse Fieldsets:** Supports the `fields` and `exclude` parameters.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+
+    **Query Parameters:**
+    - `q` (required): Symbol or name prefix, case-insensitive.
+    - `id` (optional): Exact coin id lookup instead of a prefix search.
+    - `limit` (optional): Maximum number of coins to return. Defaults to 10,
+    at most 100.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 200,
+        "message": "Success",
+        "data": [
+            {
+                "id": "bitcoin",
+                "symbol": "btc",
+                "name": "Bitcoin"
+            },
+            ...
+        ]
+    }
+    ```
+    """,
+    tags=["Coins API"],
+)
+class CoinSearchView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "coin_search"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            coins_snapshot.get()
+            coin_id = request.query_params.get("id")
+            if coin_id:
+                coin = coin_index.get(coin_id)
+                coins = [coin] if coin else []
+            else:
+                limit = min(int(request.query_params.get("limit", 10)), 100)
+                coins = coin_index.search(request.query_params.get("q", ""), limit)
+            fields, exclude = get_projection(request.query_params)
+            return Response(
+                {
+                    "status": True,
+                    "status_code": status.HTTP_200_OK,
+                    "message": "Success",
+                    "data": project_rows(coins, fields, exclude),
+                }
+            )
         except Exception as e:
             return Response({"error": str(e)})
 
@@ -159,6 +290,8 @@ class CoinListAPI(APIView):
     **Query Parameters:**
     - `per_page` (optional): Number of categories to include per page. Defaults
     to 10 if not specified.
+    - `coin_id` (optional): Lists only the categories of this coin, from the
+    category membership index. Returns 503 while the index is first loaded.
 
     **Example Response:**
     ```json
@@ -180,16 +313,24 @@ class CoinListAPI(APIView):
     """,
     tags=["Coin Categories API"],
 )
-class CoinCategoriesView(APIView):
+class CoinCategoriesView(LeanAPIView):
 
-    authentication_classes = [BasicAuthentication, TokenAuthentication]
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
     permission_classes = [
         IsAuthenticated,
     ]
+    throttle_scope = "coin_categories"
 
     def get(self, request, *args, **kwargs):
         try:
-            coins = CRYPTOAPI.get_coinCategory()
+            coins = categories_snapshot.get()
+            coin_id = request.query_params.get("coin_id")
+            if coin_id:
+                category_members_snapshot.peek()
+                category_ids = category_index.categories_of(coin_id)
+                if category_ids is None:
+                    return index_loading_response()
+                coins = coins.lookup(category_ids)
             paginator = CPageNumberPagination()
             paginator.page_size = request.query_params.get("per_page", 10)
             result_page = paginator.paginate_queryset(coins, request)
@@ -198,6 +339,92 @@ class CoinCategoriesView(APIView):
             return Response({"error": str(e)})
 
 
+def index_loading_response():
+    return Response(
+        {"error": "The category index is loading, try again shortly."},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.CRYPTO_CATEGORY_RETRY_AFTER)},
+    )
+
+
+@extend_schema(
+    summary="Page Through the Coins of a Category",
+    description="""
+    This endpoint allows authenticated users to browse the coins of a
+    category without a call to the upstream API per category.
+
+    **Features:**
+    - **Membership Index:** Served from an in-memory category to coins
+      index, built and refreshed in the background every
+      CRYPTO_CATEGORY_MEMBERS_TIMEOUT seconds. No upstream call is made on the
+      request path; the endpoint answers 503 while the index, or the
+      category, is first loaded.
+    - **Ordering:** Coins come in market cap order, as upstream ranks them.
+    - **Pagination:** `page` and `per_page` (default 10).
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+
+    **Query Parameters:**
+    - `category_id` (required): Category id, as in `coin-categories`.
+    - `per_page` (optional): Number of coins per page. Defaults to 10.
+
+    **Example Response:**
+    ```json
+    {
+        "count": 120,
+        "next": "http://api.example.com/category-coins?category_id=layer-1&page=2",
+        "previous": null,
+        "page_count": 12,
+        "status": true,
+        "status_code": 200,
+        "message": "Success",
+        "data": [
+            {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+            ...
+        ]
+    }
+    ```
+    """,
+    tags=["Coin Categories API"],
+)
+class CategoryCoinsView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "coin_categories"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            category_id = request.query_params.get("category_id")
+            if not category_id:
+                raise ValueError("category_id is required")
+            category_members_snapshot.peek()
+            if not category_index.ready:
+                return index_loading_response()
+            coin_ids = category_index.coins_of(category_id)
+            if coin_ids is None:
+                if category_index.loading(category_id):
+                    return index_loading_response()
+                return Response(
+                    {"error": f"Unknown category: {category_id}"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            paginator = CPageNumberPagination()
+            paginator.page_size = request.query_params.get("per_page", 10)
+            result_page = paginator.paginate_queryset(coin_ids, request)
+            coins = [
+                coin_index.get(coin_id) or {"id": coin_id} for coin_id in result_page
+            ]
+            return paginator.get_paginated_response(coins)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+
 @extend_schema(
     summary="Retrieve Coin Market Data",
     description="""
@@ -207,7 +434,13 @@ class CoinCategoriesView(APIView):
 
     **Features:**
     - **Pagination:** Supports pagination with customizable page sizes using the
-      `per_page` query parameter (default is 10 coins per page).
+      `per_page` query parameter (default is 10 coins per page), over the
+      market snapshot: the top `CRYPTO_MARKET_SNAPSHOT_PAGES` x 250 coins by
+      market cap.
+    - **Sparse Fieldsets:** `fields` and `exclude` trim each row to the
+      requested keys; every projection is cached as its own page.
+    - **Currency Conversion:** Market data is fetched once in the base
+      currency and converted locally with the latest exchange rates.
     - **Error Handling:** Provides structured error messages in case of failures.
 
     **Access Control:**
@@ -216,6 +449,16 @@ class CoinCategoriesView(APIView):
     **Query Parameters:**
     - `per_page` (optional): Number of market data entries to include per page.
     Defaults to 10 if not specified.
+    - `vs_currency` (optional): Currency of prices, market caps and volumes,
+    e.g. `usd`, `eur` or `btc`. Defaults to CAD. `ath` and `atl` are
+    converted at the current exchange rate.
+    - `fields` (optional): Comma-separated list of fields to return, e.g.
+    `fields=id,symbol,current_price,market_cap`.
+    - `exclude` (optional): Comma-separated list of fields to leave out.
+    - `since` (optional): A `version` from an earlier response. Returns only
+    the coins added, changed or removed since then, or `"resync": true` when
+    that version is too old, or was issued by another server, and the full
+    market data must be fetched again.
 
     **Example Response:**
     ```json
@@ -239,19 +482,575 @@ class CoinCategoriesView(APIView):
     """,
     tags=["Coin Market API"],
 )
-class CoinMarketView(APIView):
+class CoinMarketView(LeanAPIView):
 
-    authentication_classes = [BasicAuthentication, TokenAuthentication]
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
     permission_classes = [
         IsAuthenticated,
     ]
+    throttle_scope = "coin_market"
 
     def get(self, request, *args, **kwargs):
+        vs_currency = request.query_params.get(
+            "vs_currency", settings.CRYPTO_BASE_CURRENCY
+        ).lower()
         try:
-            coins = CRYPTOAPI.fetch_market_data()
+            fields, exclude = get_projection(request.query_params)
+            since = parse_since(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if since is not None:
+                coins, version = get_versioned_market_store(vs_currency)
+                coins = coins.select(fields, exclude)
+                log = market_delta_log(vs_currency)
+                return Response(
+                    {
+                        "status": True,
+                        "status_code": status.HTTP_200_OK,
+                        "message": "Success",
+                        "data": delta_response(log, coins, since, version),
+                    }
+                )
+            cache_key = page_cache_key(
+                f"coin_market:{vs_currency}", request, fields, exclude
+            )
+            data = get_cached_page(cache_key)
+            if data is None:
+                coins, version = get_versioned_market_store(vs_currency)
+                coins = coins.select(fields, exclude)
+                paginator = CPageNumberPagination()
+                paginator.page_size = request.query_params.get("per_page", 10)
+                result_page = paginator.paginate_queryset(coins, request)
+                data = paginator.get_paginated_response(result_page).data
+                data["version"] = version
+                set_cached_page(cache_key, data)
+            return Response(data)
+        except UnsupportedCurrency as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+
+@extend_schema(
+    summary="Retrieve a Coin's Price History",
+    description="""
+    This endpoint allows authenticated users to fetch the recorded price,
+    market cap or volume series of a coin over a time range. The series is
+    downsampled on the server to at most `points` points, keeping the peaks
+    and troughs, so long ranges stay small enough to chart.
+
+    **Features:**
+    - **Recorded History:** Every market snapshot fetched from upstream is
+      appended to a local history store (requires `CRYPTO_HISTORY_DIR`).
+    - **Downsampling:** Largest-Triangle-Three-Buckets down to `points` points.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+
+    **Query Parameters:**
+    - `id` (required): The coin id, e.g. `bitcoin`.
+    - `metric` (optional): `price` (default), `market_cap` or `volume`.
+    - `start` / `end` (optional): Epoch seconds or ISO 8601 dates. Defaults to
+    the last 30 days; at most `CRYPTO_HISTORY_MAX_DAYS` days before `end` are
+    returned.
+    - `points` (optional): Maximum number of points, from 3 to 5000. Defaults
+    to 200.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 200,
+        "message": "Success",
+        "data": {
+            "id": "bitcoin",
+            "metric": "price",
+            "vs_currency": "cad",
+            "points": [[1737460800.0, 145000.12], ...]
+        }
+    }
+    ```
+    """,
+    tags=["Coin Market API"],
+)
+class CoinHistoryView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "coin_history"
+
+    def get(self, request, *args, **kwargs):
+        history = history_store()
+        coin_id = request.query_params.get("id")
+        metric = request.query_params.get("metric", "price")
+        if history is None:
+            return Response(
+                {"error": "Price history is not recorded on this server."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if not coin_id or metric not in METRICS:
+            return Response(
+                {"error": f"`id` is required and `metric` one of {list(METRICS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = parse_time(request.query_params.get("start"))
+            end = parse_time(request.query_params.get("end"))
+            points = min(int(request.query_params.get("points", 200)), 5000)
+            if points < 3:
+                raise ValueError("`points` must be at least 3.")
+            series = get_series(history, coin_id, metric, start, end, points)
+        except (ValueError, OverflowError, OSError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "status": True,
+                "status_code": status.HTTP_200_OK,
+                "message": "Success",
+                "data": {
+                    "id": coin_id,
+                    "metric": metric,
+                    "vs_currency": settings.CRYPTO_BASE_CURRENCY,
+                    "points": series,
+                },
+            }
+        )
+
+
+@extend_schema(
+    summary="Retrieve Market Analytics",
+    description="""
+    This endpoint allows authenticated users to fetch analytics computed on
+    the server over the whole market snapshot, instead of paging through
+    `coin-market` and aggregating on the client.
+
+    **Features:**
+    - **Market Totals:** Total market cap and 24h volume.
+    - **Top Movers:** Top gainers and losers by 24h price change.
+    - **Volume Ranking:** Coins with the highest 24h volume.
+    - **Category Aggregates:** Market cap, volume, coin count and market cap
+      weighted 24h change per category. `null` while the category membership
+      is still being loaded.
+    - **Caching:** Results are cached per market, category and exchange rate
+      snapshot version.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+
+    **Query Parameters:**
+    - `vs_currency` (optional): Currency of the amounts. Defaults to CAD.
+    - `limit` (optional): Length of the top lists. Defaults to 10, at most 100.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 200,
+        "message": "Success",
+        "data": {
+            "coins": 250,
+            "market_cap": 4600000000000.0,
+            "total_volume": 190000000000.0,
+            "top_gainers": [{"id": "bitcoin", "symbol": "btc", ...}, ...],
+            "top_losers": [...],
+            "top_volume": [...],
+            "categories": [
+                {
+                    "category_id": "layer-1",
+                    "name": "Layer 1 (L1)",
+                    "coins": 120,
+                    "market_cap": 3500000000000.0,
+                    "total_volume": 95000000000.0,
+                    "market_cap_change_percentage_24h": 1.8
+                },
+                ...
+            ]
+        }
+    }
+    ```
+    """,
+    tags=["Coin Market API"],
+)
+class CoinAnalyticsView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "coin_analytics"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            vs_currency = request.query_params.get(
+                "vs_currency", settings.CRYPTO_BASE_CURRENCY
+            ).lower()
+            limit = max(1, min(int(request.query_params.get("limit", 10)), 100))
+            markets = get_market_store(vs_currency)
+            members = category_members_snapshot.peek()
+            cache_key = ":".join(
+                [
+                    "crypto",
+                    "analytics",
+                    str(markets_snapshot.version),
+                    str(category_members_snapshot.version if members else 0),
+                    str(exchange_rates_snapshot.version),
+                    vs_currency,
+                    str(limit),
+                ]
+            )
+            data = cache.get(cache_key)
+            if data is None:
+                categories = categories_snapshot.get()
+                names = dict(
+                    zip(
+                        categories.column_values("category_id"),
+                        categories.column_values("name"),
+                    )
+                )
+                data = market_analytics(markets, members, names, limit)
+                data["vs_currency"] = vs_currency
+                cache.set(cache_key, data, settings.CRYPTO_SNAPSHOT_TIMEOUT)
+            return Response(
+                {
+                    "status": True,
+                    "status_code": status.HTTP_200_OK,
+                    "message": "Success",
+                    "data": data,
+                }
+            )
+        except UnsupportedCurrency as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+
+@extend_schema(
+    summary="List and Create Price Alerts",
+    description="""
+    This endpoint allows authenticated users to list their price alerts and
+    to register new ones, such as "bitcoin above 100000 CAD".
+
+    **Features:**
+    - **One-Shot Alerts:** An alert fires the first time the price crosses its
+      threshold in its direction (`above` or `below`), then turns inactive.
+    - **Evaluation:** Alerts are checked on every market snapshot fetched
+      from upstream; only the thresholds crossed since the previous snapshot
+      are looked at.
+    - **Pagination:** `page` and `per_page` (default 10), newest first.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+      Users only see their own alerts.
+
+    **Request Body (POST):**
+    - `coin_id` (required): Coin id, as in `coin-list`.
+    - `direction` (required): `above` or `below`.
+    - `threshold` (required): Price to cross, greater than 0.
+    - `vs_currency` (optional): Currency of the threshold. Defaults to CAD.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 201,
+        "message": "Price alert created",
+        "data": {
+            "id": 1,
+            "coin_id": "bitcoin",
+            "direction": "above",
+            "threshold": 100000.0,
+            "vs_currency": "cad",
+            "is_active": true,
+            "created_at": "2025-01-21T12:00:00Z",
+            "triggered_at": null
+        }
+    }
+    ```
+    """,
+    request=PriceAlertSerializer,
+    tags=["Price Alerts API"],
+)
+class PriceAlertListView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    serializer_class = PriceAlertSerializer
+    throttle_scope = "price_alerts"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            alerts = PriceAlert.objects.filter(user=request.user).order_by("-id")
             paginator = CPageNumberPagination()
             paginator.page_size = request.query_params.get("per_page", 10)
-            result_page = paginator.paginate_queryset(coins, request)
-            return paginator.get_paginated_response(result_page)
+            result_page = paginator.paginate_queryset(alerts, request)
+            return paginator.get_paginated_response(
+                PriceAlertSerializer(result_page, many=True).data
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+    def post(self, request, *args, **kwargs):
+        serializer = PriceAlertSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except ValidationError as e:
+            return Response(
+                {
+                    "status": False,
+                    "status_code": status.HTTP_400_BAD_REQUEST,
+                    "message": e.detail,
+                    "data": "None",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response({"error": str(e)})
+        serializer.save(user=request.user)
+        return Response(
+            {
+                "status": True,
+                "status_code": status.HTTP_201_CREATED,
+                "message": "Price alert created",
+                "data": serializer.data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@extend_schema(
+    summary="Delete a Price Alert",
+    description="""
+    This endpoint allows authenticated users to delete one of their price
+    alerts.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+      Other users' alerts are reported as not found.
+    """,
+    tags=["Price Alerts API"],
+)
+class PriceAlertDetailView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    serializer_class = PriceAlertSerializer
+    throttle_scope = "price_alerts"
+
+    def delete(self, request, pk, *args, **kwargs):
+        deleted, _ = PriceAlert.objects.filter(pk=pk, user=request.user).delete()
+        if not deleted:
+            return Response(
+                {"error": "Price alert not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    summary="List and Update Holdings",
+    description="""
+    This endpoint allows authenticated users to list the coins in their
+    portfolio and to add or replace a holding.
+
+    **Features:**
+    - **One Holding per Coin:** Posting a coin the user already holds
+      replaces its quantity and cost basis.
+    - **Pagination:** `page` and `per_page` (default 10).
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+      Users only see their own holdings.
+
+    **Request Body (POST):**
+    - `coin_id` (required): Coin id, as in `coin-list`.
+    - `quantity` (required): Amount of the coin held, greater than 0.
+    - `cost_basis` (optional): Total paid for the holding. Defaults to 0.
+    - `cost_currency` (optional): Currency of `cost_basis`. Defaults to CAD.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 201,
+        "message": "Holding saved",
+        "data": {
+            "id": 1,
+            "coin_id": "bitcoin",
+            "quantity": 0.5,
+            "cost_basis": 40000.0,
+            "cost_currency": "cad",
+            "updated_at": "2025-01-21T12:00:00Z"
+        }
+    }
+    ```
+    """,
+    request=HoldingSerializer,
+    tags=["Portfolio API"],
+)
+class HoldingListView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "portfolio"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            holdings = Holding.objects.filter(user=request.user).order_by("coin_id")
+            paginator = CPageNumberPagination()
+            paginator.page_size = request.query_params.get("per_page", 10)
+            result_page = paginator.paginate_queryset(holdings, request)
+            return paginator.get_paginated_response(
+                HoldingSerializer(result_page, many=True).data
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)})
+
+    def post(self, request, *args, **kwargs):
+        serializer = HoldingSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except ValidationError as e:
+            return Response(
+                {
+                    "status": False,
+                    "status_code": status.HTTP_400_BAD_REQUEST,
+                    "message": e.detail,
+                    "data": "None",
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            return Response({"error": str(e)})
+        serializer.save(user=request.user)
+        return Response(
+            {
+                "status": True,
+                "status_code": status.HTTP_201_CREATED,
+                "message": "Holding saved",
+                "data": serializer.data,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@extend_schema(
+    summary="Delete a Holding",
+    description="""
+    This endpoint allows authenticated users to remove a coin from their
+    portfolio.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+      Other users' holdings are reported as not found.
+    """,
+    tags=["Portfolio API"],
+)
+class HoldingDetailView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "portfolio"
+
+    def delete(self, request, pk, *args, **kwargs):
+        deleted, _ = Holding.objects.filter(pk=pk, user=request.user).delete()
+        if not deleted:
+            return Response(
+                {"error": "Holding not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    summary="Value the Portfolio",
+    description="""
+    This endpoint allows authenticated users to value all their holdings in
+    one request, instead of looking up every coin with `coin-market`.
+
+    **Features:**
+    - **One Price Lookup:** Prices come from the cached market snapshot;
+      coins outside it are fetched from upstream in chunks of 250 and cached.
+    - **P&L:** Value, cost and profit or loss per coin and in total. Coins
+      without a price are listed in `unpriced` and left out of the totals.
+    - **Currency Conversion:** Prices and costs are converted locally to
+      `vs_currency`.
+
+    **Access Control:**
+    - Accessible only by users with proper authentication and permissions.
+
+    **Query Parameters:**
+    - `vs_currency` (optional): Currency of the amounts. Defaults to CAD.
+
+    **Example Response:**
+    ```json
+    {
+        "status": true,
+        "status_code": 200,
+        "message": "Success",
+        "data": {
+            "vs_currency": "cad",
+            "total_value": 70000.0,
+            "total_cost": 40000.0,
+            "total_pnl": 30000.0,
+            "total_pnl_percentage": 75.0,
+            "unpriced": [],
+            "holdings": [
+                {
+                    "coin_id": "bitcoin",
+                    "quantity": 0.5,
+                    "price": 140000.0,
+                    "value": 70000.0,
+                    "cost": 40000.0,
+                    "pnl": 30000.0,
+                    "pnl_percentage": 75.0
+                }
+            ]
+        }
+    }
+    ```
+    """,
+    tags=["Portfolio API"],
+)
+class PortfolioValuationView(LeanAPIView):
+
+    authentication_classes = [BasicAuthentication, ExpiringTokenAuthentication]
+    permission_classes = [
+        IsAuthenticated,
+    ]
+    throttle_scope = "portfolio"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            vs_currency = request.query_params.get(
+                "vs_currency", settings.CRYPTO_BASE_CURRENCY
+            ).lower()
+            holdings = list(
+                Holding.objects.filter(user=request.user)
+                .order_by("coin_id")
+                .values("coin_id", "quantity", "cost_basis", "cost_currency")
+            )
+            return Response(
+                {
+                    "status": True,
+                    "status_code": status.HTTP_200_OK,
+                    "message": "Success",
+                    "data": portfolio_valuation(holdings, vs_currency),
+                }
+            )
+        except UnsupportedCurrency as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"error": str(e)})
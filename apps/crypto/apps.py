@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CryptoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.crypto"
+
+    def ready(self):
+        from apps.crypto.alerts import evaluate_alerts
+        from apps.crypto.history import record_markets
+        from apps.crypto.snapshots import markets_snapshot
+
+        markets_snapshot.subscribe(record_markets, fetched_only=True)
+        markets_snapshot.subscribe(evaluate_alerts, fetched_only=True)
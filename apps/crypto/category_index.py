@@ -0,0 +1,124 @@
+import threading
+import numpy as np
+from apps.crypto.snapshots import category_members_snapshot, member_pairs
+from apps.crypto.store import factorize
+
+
+class _Members:
+    """
+    One side of the index: for every key (a category or a coin), the codes
+    of its members stored contiguously, `offsets[code]` to
+    `offsets[code + 1]`.
+    """
+
+    __slots__ = ("keys", "codes", "offsets", "members")
+
+    def __init__(self, keys, owners, members):
+        self.keys = keys
+        self.codes = {key: code for code, key in enumerate(keys)}
+        # A stable sort keeps every key's members in upstream order.
+        order = np.argsort(owners, kind="stable")
+        self.members = members[order]
+        self.offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners, minlength=len(keys)), out=self.offsets[1:])
+
+    def of(self, key):
+        code = self.codes.get(key)
+        if code is None:
+            return None
+        return self.members[self.offsets[code] : self.offsets[code + 1]]
+
+
+class CategoryIndex:
+    """
+    Bidirectional category membership index: the coins of a category in
+    market cap order, as upstream lists them, and the categories of a coin.
+    Built from the category membership snapshot whenever it is replaced;
+    readers get the previous index until the new one is swapped in.
+    Categories whose members have not loaded yet are kept apart as pending.
+    """
+
+    def __init__(self):
+        self._state = None
+        self._lock = threading.Lock()
+        self.version = 0
+
+    @property
+    def ready(self):
+        return self._state is not None
+
+    def update(self, previous, members, version):
+        """
+        Snapshot subscriber: rebuilds the index from a membership store of
+        (category_id, coin_id) rows.
+        """
+        pairs = member_pairs(members)
+        pending = frozenset(
+            category_id for category_id, coin_id in pairs if coin_id is None
+        )
+        pairs = [pair for pair in pairs if pair[1] is not None]
+        categories, category_codes = factorize([pair[0] for pair in pairs])
+        coins, coin_codes = factorize([pair[1] for pair in pairs])
+        state = (
+            _Members(categories, category_codes, coin_codes),
+            _Members(coins, coin_codes, category_codes),
+            pending,
+        )
+        with self._lock:
+            self._state = state
+            self.version = version
+
+    def loading(self, category_id):
+        """
+        Returns whether the coins of a category are not known yet: while the
+        index loads, or until the category's members first load.
+        """
+        state = self._state
+        return state is None or category_id in state[2]
+
+    def coins_of(self, category_id):
+        """
+        Returns the coin ids of a category, or None for an unknown category
+        or while the index is loading.
+        """
+        if self._state is None:
+            return None
+        by_category, by_coin, _ = self._state
+        codes = by_category.of(category_id)
+        return None if codes is None else _Ids(by_coin.keys, codes)
+
+    def categories_of(self, coin_id):
+        """
+        Returns the category ids of a coin; an empty list for a coin in no
+        category and None while the index is loading.
+        """
+        if self._state is None:
+            return None
+        by_category, by_coin, _ = self._state
+        codes = by_coin.of(coin_id)
+        return [] if codes is None else [by_category.keys[code] for code in codes]
+
+
+class _Ids:
+    """
+    Read-only sequence of ids given by their codes, sliced without
+    materializing the ids outside the slice.
+    """
+
+    __slots__ = ("keys", "codes")
+
+    def __init__(self, keys, codes):
+        self.keys = keys
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.keys[code] for code in self.codes[item].tolist()]
+        return self.keys[self.codes[item]]
+
+
+category_index = CategoryIndex()
+category_members_snapshot.subscribe(category_index.update)
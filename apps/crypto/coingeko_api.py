@@ -1,33 +1,43 @@
 import requests
 import logging
-from django.conf import settings
+from apps.crypto.tracing import span
+from apps.crypto.upstream import upstream_pool
 
 
-class CRYPTOAPI:
+class UpstreamStatusError(RuntimeError):
+    """
+    Raised when the Crypto API answers with an HTTP error status, kept in
+    `status_code`.
+    """
+
+    def __init__(self, status_code):
+        super().__init__("API request failed with status: %s", status_code)
+        self.status_code = status_code
 
-    base_url = getattr(settings, "CRYPTO_GECO_BASE_URL")
+
+class CRYPTOAPI:
 
     def _get_data(cls, endpoint, params=None):
         """
-        Handles the HTTP Requests to the Crypto API
+        Handles the HTTP Requests to the Crypto API, hedged across the
+        configured mirrors
         args:
             endpoints: The API endpoint to Call
             params: Query Parameters for the API call
         """
-        url = f"{cls.base_url}{endpoint}"
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            with span("upstream", **{"upstream.endpoint": endpoint}):
+                return upstream_pool().get(endpoint, params=params)
         except requests.exceptions.HTTPError as e:
             logging.error(
-                "HTTP error occurred: %s %s", e.response.status_code, e.response.reason
-            )
-            raise RuntimeError(
-                "API request failed with status: %s", e.response.status_code
+                "HTTP error occurred: %s %s",
+                e.response.status_code,
+                e.response.reason,
+                extra={"endpoint": endpoint},
             )
+            raise UpstreamStatusError(e.response.status_code)
         except requests.exceptions.RequestException as e:
-            logging.error(f"Request error occurred: {e}")
+            logging.error("Request error occurred: %s", e, extra={"endpoint": endpoint})
             raise RuntimeError("Failed to fetch data from Crypto API.")
 
     @classmethod
@@ -44,6 +54,13 @@ class CRYPTOAPI:
         """
         return cls._get_data(cls, endpoint="coins/categories/list")
 
+    @classmethod
+    def get_exchange_rates(cls):
+        """
+        API to Fetch the BTC-to-Currency Exchange Rates
+        """
+        return cls._get_data(cls, endpoint="exchange_rates")
+
     @classmethod
     def fetch_market_data(
         cls, ids=None, category=None, vs_currency="cad", per_page=10, page=1
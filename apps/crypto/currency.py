@@ -0,0 +1,160 @@
+import threading
+import numpy as np
+from django.conf import settings
+from apps.crypto.deltas import DeltaLog, market_deltas
+from apps.crypto.snapshots import exchange_rates_snapshot, markets_snapshot
+from apps.crypto.store import ColumnStore, NumberColumn
+
+# `coins/markets` fields expressed in `vs_currency`. Percentages, supplies
+# and ranks do not depend on the currency. `ath` and `atl` are converted at
+# the current rate too, not at the rate of the day they were reached.
+MONEY_FIELDS = (
+    "current_price",
+    "market_cap",
+    "fully_diluted_valuation",
+    "total_volume",
+    "high_24h",
+    "low_24h",
+    "price_change_24h",
+    "market_cap_change_24h",
+    "ath",
+    "atl",
+)
+
+
+class UnsupportedCurrency(ValueError):
+    pass
+
+
+def get_rates():
+    """
+    Returns the exchange rate snapshot: one row per currency with its
+    `value` in units per BTC. Server processes keep it fresh from a
+    background thread (see `start_refreshers`); elsewhere it is reloaded
+    once older than CRYPTO_EXCHANGE_RATE_INTERVAL.
+    """
+    return exchange_rates_snapshot.get()
+
+
+def conversion_factor(rates, base, target):
+    """
+    Returns the number of `target` units per `base` unit.
+
+    Raises:
+        UnsupportedCurrency: When `rates` has no rate for either currency.
+    """
+    if base == target:
+        return 1.0
+    target_rate = rates.get(target)
+    if target_rate is None:
+        raise UnsupportedCurrency(f"Unsupported vs_currency: {target}")
+    base_rate = rates.get(base)
+    if base_rate is None or not base_rate["value"]:
+        raise UnsupportedCurrency(f"No exchange rate for base currency: {base}")
+    return target_rate["value"] / base_rate["value"]
+
+
+def convert_store(store, factor):
+    """
+    Returns a store sharing `store`'s columns, with every money column
+    multiplied by `factor` in one vectorized operation per column.
+    Converted amounts are always floats: rounding them to the integer type
+    of the source column would turn every price in BTC into 0.
+    """
+    columns = dict(store.columns)
+    for name in MONEY_FIELDS:
+        column = columns.get(name)
+        if not isinstance(column, NumberColumn):
+            continue
+        values = column.values.astype(np.float64) * factor
+        columns[name] = NumberColumn(values, column.mask)
+    return ColumnStore(
+        columns, store.key, store.key_column, store.index, len(store), store.absent
+    )
+
+
+class _ConvertedMarkets:
+    """
+    Converted market stores of the current market and exchange rate
+    snapshots, one per requested currency. Dropped as soon as either
+    snapshot is replaced.
+
+    A converted store is versioned by the later of the two snapshot
+    versions, since a new rate alone changes every price, and each currency
+    keeps its own DeltaLog of the converted stores it built.
+    """
+
+    def __init__(self):
+        self._sources = (None, None)
+        self._stores = {}
+        self._latest = {}
+        self.deltas = {}
+        self._lock = threading.Lock()
+
+    def get(self, vs_currency):
+        return self.get_versioned(vs_currency)[0]
+
+    def get_versioned(self, vs_currency):
+        base = settings.CRYPTO_BASE_CURRENCY
+        store, version = markets_snapshot.get_versioned()
+        if vs_currency == base:
+            return store, version
+        rates, rates_version = exchange_rates_snapshot.get_versioned()
+        with self._lock:
+            if self._sources[0] is not store or self._sources[1] is not rates:
+                self._sources, self._stores = (store, rates), {}
+            converted = self._stores.get(vs_currency)
+            if converted is None:
+                factor = conversion_factor(rates, base, vs_currency)
+                log = self.deltas.setdefault(vs_currency, DeltaLog())
+                version = max(version, rates_version)
+                if log.version is not None and version <= log.version:
+                    version = log.version + 1
+                converted = (convert_store(store, factor), version)
+                self._stores[vs_currency] = converted
+                log(self._latest.get(vs_currency), *converted)
+                self._latest[vs_currency] = converted[0]
+        return converted
+
+    def delta_log(self, vs_currency):
+        if vs_currency == settings.CRYPTO_BASE_CURRENCY:
+            return market_deltas
+        with self._lock:
+            return self.deltas.setdefault(vs_currency, DeltaLog())
+
+
+converted_markets = _ConvertedMarkets()
+
+
+def get_market_store(vs_currency=None):
+    """
+    Returns the market snapshot in `vs_currency`, converted locally from the
+    single upstream fetch made in CRYPTO_BASE_CURRENCY.
+
+    Raises:
+        UnsupportedCurrency: When there is no exchange rate for `vs_currency`.
+    """
+    return get_versioned_market_store(vs_currency)[0]
+
+
+def get_versioned_market_store(vs_currency=None):
+    """
+    Like `get_market_store`, but returns (store, version) read together.
+    Versions of converted stores follow their own DeltaLog, returned by
+    `market_delta_log`.
+
+    Raises:
+        UnsupportedCurrency: When there is no exchange rate for `vs_currency`.
+    """
+    vs_currency = (vs_currency or settings.CRYPTO_BASE_CURRENCY).lower()
+    return converted_markets.get_versioned(vs_currency)
+
+
+def market_delta_log(vs_currency=None):
+    """
+    Returns the DeltaLog of the market snapshot in `vs_currency`: the
+    snapshot's own log in the base currency, else the log of the converted
+    stores, which also holds the rows changed by a new exchange rate.
+    """
+    vs_currency = (vs_currency or settings.CRYPTO_BASE_CURRENCY).lower()
+    return converted_markets.delta_log(vs_currency)
@@ -0,0 +1,197 @@
+import threading
+from collections import deque
+import numpy as np
+from django.conf import settings
+from apps.crypto.snapshots import coins_snapshot, markets_snapshot
+from apps.crypto.store import NumberColumn
+
+
+def _missing(column, rows):
+    if column.mask is None:
+        return np.zeros(len(rows), dtype=bool)
+    return column.mask[rows]
+
+
+def _equal(old, new, old_rows, new_rows):
+    """
+    Compares column `old` at `old_rows` with column `new` at `new_rows`,
+    element-wise. Numeric columns are compared as arrays.
+    """
+    if isinstance(old, NumberColumn) and isinstance(new, NumberColumn):
+        old_values, new_values = old.values[old_rows], new.values[new_rows]
+        equal = old_values == new_values
+        if old_values.dtype.kind == "f" or new_values.dtype.kind == "f":
+            equal |= np.isnan(old_values) & np.isnan(new_values)
+        old_missing, new_missing = _missing(old, old_rows), _missing(new, new_rows)
+        return np.where(old_missing | new_missing, old_missing == new_missing, equal)
+    return np.array(
+        [a == b for a, b in zip(old.to_list(old_rows), new.to_list(new_rows))],
+        dtype=bool,
+    )
+
+
+def diff_stores(previous, current):
+    """
+    Compares two versions of a keyed store.
+
+    Args:
+        previous (ColumnStore): The older version.
+        current (ColumnStore): The newer version.
+
+    Returns:
+        dict: The keys of the `added`, `changed` and `removed` rows.
+    """
+    current_keys, previous_keys = current.key_column, previous.key_column
+    matches = previous.rows_of(current_keys.to_list(slice(0, current.length)))
+    common = np.flatnonzero(matches >= 0)
+    old_rows = matches[common]
+    same = np.ones(len(common), dtype=bool)
+    for name in set(previous.columns) | set(current.columns):
+        old, new = previous.columns.get(name), current.columns.get(name)
+        if old is None or new is None:
+            column, rows = (new, common) if old is None else (old, old_rows)
+            same &= np.array(
+                [value is None for value in column.to_list(rows)], dtype=bool
+            )
+            continue
+        same &= _equal(old, new, old_rows, common)
+    removed = np.flatnonzero(
+        current.rows_of(previous_keys.to_list(slice(0, previous.length))) < 0
+    )
+    return {
+        "added": current_keys.to_list(np.flatnonzero(matches < 0)),
+        "changed": current_keys.to_list(common[~same]),
+        "removed": previous_keys.to_list(removed),
+    }
+
+
+def merge_diffs(diffs):
+    """
+    Folds consecutive diffs into the single diff between the first and the
+    last version: a row added then removed disappears, a row removed then
+    added again is reported as changed.
+    """
+    states = {}
+    for diff in diffs:
+        for key in diff["added"]:
+            states[key] = "changed" if states.get(key) == "removed" else "added"
+        for key in diff["changed"]:
+            states[key] = states.get(key, "changed")
+        for key in diff["removed"]:
+            if states.pop(key, None) != "added":
+                states[key] = "removed"
+    merged = {"added": [], "changed": [], "removed": []}
+    for key, state in states.items():
+        merged[state].append(key)
+    return merged
+
+
+class DeltaLog:
+    """
+    Snapshot subscriber keeping a bounded ring of the diffs between its
+    consecutive versions, so a client holding an older version can fetch
+    just the rows that changed since. Versions that fell out of the ring,
+    or that this log never saw, need a full resync.
+
+    Each process keeps its own log. Deltas therefore only hold while a
+    client keeps talking to processes that saw the same versions: the
+    workers of one host mapping a shared snapshot (CRYPTO_SNAPSHOT_DIR), or
+    one worker through sticky routing. Anywhere else clients resync.
+    """
+
+    def __init__(self, size=None):
+        self.size = settings.CRYPTO_DELTA_HISTORY if size is None else size
+        self.version = None
+        self._diffs = deque(maxlen=self.size)
+        self._lock = threading.Lock()
+
+    def __call__(self, previous, rows, version):
+        diff = None
+        if (
+            previous is not None
+            and previous.key_column is not None
+            and rows.key_column is not None
+        ):
+            diff = diff_stores(previous, rows)
+        with self._lock:
+            if diff is None or self.version is None:
+                self._diffs.clear()
+            else:
+                self._diffs.append((self.version, version, diff))
+            self.version = version
+
+    def since(self, version, until=None):
+        """
+        Returns (current version, merged diff) since `version`, or
+        (current version, None) when `version` was not issued by this log
+        or its diff is no longer held.
+
+        With `until`, the diff stops at that version instead of the latest
+        one, so it matches rows read before the log moved on. It is None
+        when the log has not reached `until` yet.
+        """
+        with self._lock:
+            current, diffs = self.version, list(self._diffs)
+        if until is not None:
+            current = until
+        if version == current:
+            return current, merge_diffs([])
+        for position, (start, _, _) in enumerate(diffs):
+            if start != version:
+                continue
+            selected = []
+            for _, end, diff in diffs[position:]:
+                selected.append(diff)
+                if end == current:
+                    return current, merge_diffs(selected)
+            break
+        return current, None
+
+
+def parse_since(query_params):
+    """
+    Returns the `since` version of a request, or None for a full listing.
+
+    Raises:
+        ValueError: When `since` is not an integer.
+    """
+    since = query_params.get("since")
+    if since in (None, ""):
+        return None
+    try:
+        return int(since)
+    except ValueError:
+        raise ValueError(f"Invalid since version: {since!r}")
+
+
+def delta_response(log, store, since, version=None):
+    """
+    Builds the `data` of a `?since=` response: the rows added or changed
+    since version `since`, read from `store`, and the removed keys.
+
+    Args:
+        log (DeltaLog): The delta log of the snapshot.
+        store (ColumnStore): The current rows, already projected.
+        since (int): The version the client holds.
+        version (int): The version of `store`, read together with it.
+
+    Returns:
+        dict: The delta, or a `resync` marker when `since` is unknown.
+    """
+    version, diff = log.since(since, version)
+    if diff is None:
+        return {"version": version, "since": since, "resync": True}
+    return {
+        "version": version,
+        "since": since,
+        "resync": False,
+        "added": store.lookup(diff["added"]),
+        "changed": store.lookup(diff["changed"]),
+        "removed": diff["removed"],
+    }
+
+
+coin_deltas = DeltaLog()
+coins_snapshot.subscribe(coin_deltas)
+market_deltas = DeltaLog()
+markets_snapshot.subscribe(market_deltas)
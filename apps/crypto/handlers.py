@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.wsgi import get_wsgi_application
+from django.utils.module_loading import import_string
+
+
+class LeanWSGIHandler(WSGIHandler):
+    """
+    WSGI handler running the short API_MIDDLEWARE chain instead of
+    MIDDLEWARE. The API authenticates by token or basic auth and needs none
+    of the session, CSRF, message and clickjacking middleware the admin
+    relies on.
+    """
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response)
+        for middleware_path in reversed(settings.API_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            try:
+                instance = middleware(handler)
+            except MiddlewareNotUsed:
+                continue
+            if instance is None:
+                raise ImproperlyConfigured(
+                    "Middleware factory %s returned None." % middleware_path
+                )
+            if hasattr(instance, "process_view"):
+                self._view_middleware.insert(0, instance.process_view)
+            if hasattr(instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    instance.process_template_response
+                )
+            if hasattr(instance, "process_exception"):
+                self._exception_middleware.append(instance.process_exception)
+            handler = convert_exception_to_response(instance)
+        self._middleware_chain = handler
+
+
+class PathDispatcher:
+    """
+    WSGI application handing requests under one of `prefixes` to
+    `api_application` and everything else (admin, docs) to `application`.
+    """
+
+    def __init__(self, application, api_application, prefixes):
+        self.application = application
+        self.api_application = api_application
+        self.prefixes = tuple(prefixes)
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(self.prefixes):
+            return self.api_application(environ, start_response)
+        return self.application(environ, start_response)
+
+
+def get_dispatching_application():
+    """
+    Returns the project's WSGI application: the full Django stack, with the
+    API_FAST_PATH_PREFIXES routed through the lean handler.
+    """
+    application = get_wsgi_application()
+    if not settings.API_FAST_PATH_PREFIXES:
+        return application
+    return PathDispatcher(
+        application, LeanWSGIHandler(), settings.API_FAST_PATH_PREFIXES
+    )
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+def page_cache_key(prefix, request, fields=None, exclude=None):
+    """
+    Builds the cache key of a rendered page.
+
+    Every projection gets its own key so a narrow `fields=` page never
+    collides with the full page.
+
+    Args:
+        prefix (str): The endpoint name.
+        request (Request): The incoming request.
+        fields (tuple): The normalized `fields` projection.
+        exclude (tuple): The normalized `exclude` projection.
+
+    Returns:
+        str: The cache key.
+    """
+    return ":".join(
+        [
+            "crypto",
+            prefix,
+            request.get_host(),
+            str(request.query_params.get("page", 1)),
+            str(request.query_params.get("per_page", 10)),
+            ",".join(fields or ()),
+            ",".join(exclude or ()),
+        ]
+    )
+
+
+def get_cached_page(cache_key):
+    return cache.get(cache_key)
+
+
+def set_cached_page(cache_key, data):
+    cache.set(cache_key, data, settings.CRYPTO_PAGE_CACHE_TIMEOUT)
@@ -0,0 +1,58 @@
+def parse_field_list(value):
+    """
+    Parses a comma-separated `fields`/`exclude` query parameter.
+
+    Args:
+        value (str): The raw query parameter value.
+
+    Returns:
+        tuple: The requested field names in a stable order, or None when the
+        parameter is missing or empty.
+    """
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    return tuple(sorted(names)) or None
+
+
+def get_projection(query_params):
+    """
+    Reads the sparse fieldset parameters from the request.
+
+    Args:
+        query_params (QueryDict): The request query parameters.
+
+    Returns:
+        tuple: (fields, exclude) as returned by `parse_field_list`.
+    """
+    return (
+        parse_field_list(query_params.get("fields")),
+        parse_field_list(query_params.get("exclude")),
+    )
+
+
+def project_rows(rows, fields=None, exclude=None):
+    """
+    Keeps only the requested keys of every row in a single pass.
+
+    Unknown field names are ignored so clients can ask for a field that
+    upstream does not return for every coin.
+
+    Args:
+        rows (list): The rows (dicts) to project.
+        fields (tuple): Keys to keep. All keys are kept when None.
+        exclude (tuple): Keys to drop after `fields` is applied.
+
+    Returns:
+        list: The projected rows.
+    """
+    if fields is None and exclude is None:
+        return rows
+    if fields is not None and exclude is not None:
+        fields = tuple(name for name in fields if name not in exclude)
+    if fields is not None:
+        return [{key: row[key] for key in fields if key in row} for row in rows]
+    exclude = frozenset(exclude)
+    return [
+        {key: value for key, value in row.items() if key not in exclude} for row in rows
+    ]
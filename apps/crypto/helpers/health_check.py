@@ -19,5 +19,5 @@ def check_third_party_service(service_name, service_url, timeout=5):
         response.raise_for_status()
         return {service_name: {"status": "healthy"}}
     except requests.exceptions.RequestException as e:
-        logging.error(f"{service_name} error: {e}")
+        logging.error("%s error: %s", service_name, e)
         return {service_name: {"status": "unhealthy", "error": str(e)}}
@@ -0,0 +1,206 @@
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+import numpy as np
+from django.conf import settings
+
+# One record per coin and market snapshot: timestamp, price, market cap and
+# 24h volume, all float64, in CRYPTO_BASE_CURRENCY.
+RECORD_FIELDS = ("timestamp", "price", "market_cap", "volume")
+METRICS = {"price": 1, "market_cap": 2, "volume": 3}
+_RECORD_SIZE = 8 * len(RECORD_FIELDS)
+_DAY = 86400
+
+
+def _timestamp(value, default):
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return default
+
+
+def parse_time(value):
+    """
+    Parses a query parameter given as epoch seconds or an ISO 8601 date or
+    datetime (UTC unless an offset is given). Returns None when empty.
+    """
+    if not value:
+        return None
+    try:
+        timestamp = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    if not math.isfinite(timestamp):
+        raise ValueError(f"Invalid time: {value}")
+    return timestamp
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+class HistoryStore:
+    """
+    Append-only price history, partitioned by coin and UTC day:
+    `<directory>/<coin id>/<YYYY-MM-DD>.bin` holds fixed-size float64
+    records, so a day is read back with a single `np.fromfile`.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, coin_id, day):
+        if coin_id in ("", ".", ".."):
+            raise ValueError(f"Invalid coin id: {coin_id!r}")
+        return os.path.join(self.directory, quote(coin_id, safe=""), f"{day}.bin")
+
+    def record(self, store, now=None):
+        """
+        Appends one record per coin of a market store. Each coin is stamped
+        with its upstream `last_updated` time; a record not newer than the
+        last one of its partition is skipped, so workers recording the same
+        snapshot do not duplicate it.
+
+        Returns:
+            int: The number of records written.
+        """
+        now = time.time() if now is None else now
+        columns = store.columns
+        ids = store.column_values("id")
+        updated = (
+            store.column_values("last_updated")
+            if "last_updated" in columns
+            else [None] * len(ids)
+        )
+        values = np.column_stack(
+            [
+                store.numbers(name)
+                for name in ("current_price", "market_cap", "total_volume")
+            ]
+        )
+        written = 0
+        for coin_id, last_updated, row in zip(ids, updated, values):
+            timestamp = _timestamp(last_updated, now)
+            path = self.path(coin_id, _day(timestamp))
+            if self._last_timestamp(path) >= timestamp:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            record = np.concatenate(([timestamp], row)).astype("<f8")
+            with open(path, "ab") as handle:
+                handle.write(record.tobytes())
+            written += 1
+        return written
+
+    def read(self, coin_id, start, end):
+        """
+        Returns the records of `coin_id` between the `start` and `end`
+        timestamps as an (n, 4) array sorted by time. The coin's directory
+        is listed once, so the cost follows the days recorded, not the
+        length of the range.
+
+        Raises:
+            OverflowError: When a timestamp is out of the range of dates.
+        """
+        first, last = _day(start), _day(end)
+        directory = os.path.dirname(self.path(coin_id, first))
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            names = []
+        parts = [
+            np.fromfile(os.path.join(directory, name), dtype="<f8").reshape(-1, 4)
+            for name in sorted(names)
+            if name.endswith(".bin") and first <= name[: -len(".bin")] <= last
+        ]
+        if not parts:
+            return np.empty((0, 4))
+        records = np.concatenate(parts)
+        records = records[(records[:, 0] >= start) & (records[:, 0] <= end)]
+        _, unique = np.unique(records[:, 0], return_index=True)
+        return records[unique]
+
+    @staticmethod
+    def _last_timestamp(path):
+        try:
+            with open(path, "rb") as handle:
+                handle.seek(-_RECORD_SIZE, os.SEEK_END)
+                return float(np.frombuffer(handle.read(8), dtype="<f8")[0])
+        except (FileNotFoundError, OSError):
+            return float("-inf")
+
+
+def downsample(times, values, points):
+    """
+    Reduces a series to at most `points` points with Largest-Triangle-
+    Three-Buckets, which keeps the peaks and troughs a chart needs.
+
+    Args:
+        times (ndarray): Timestamps, ascending.
+        values (ndarray): Values at `times`.
+        points (int): Maximum number of points to return, at least 3.
+
+    Returns:
+        tuple: (times, values) of the kept points.
+    """
+    keep = ~np.isnan(values)
+    times, values = times[keep], values[keep]
+    size = len(times)
+    points = max(points, 3)
+    if points >= size:
+        return times, values
+    every = (size - 2) / (points - 2)
+    selected = [0]
+    for bucket in range(points - 2):
+        start = int(bucket * every) + 1
+        stop = int((bucket + 1) * every) + 1
+        following = slice(stop, min(int((bucket + 2) * every) + 1, size))
+        next_time, next_value = times[following].mean(), values[following].mean()
+        previous = selected[-1]
+        areas = np.abs(
+            (times[previous] - next_time) * (values[start:stop] - values[previous])
+            - (times[previous] - times[start:stop]) * (next_value - values[previous])
+        )
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(size - 1)
+    return times[selected], values[selected]
+
+
+def get_series(history, coin_id, metric, start=None, end=None, points=200):
+    """
+    Returns a downsampled [[timestamp, value], ...] series of `metric`.
+    Defaults to the last 30 days; ranges longer than CRYPTO_HISTORY_MAX_DAYS
+    are cut to the days before `end`.
+    """
+    end = time.time() if end is None else end
+    start = end - timedelta(days=30).total_seconds() if start is None else start
+    start = max(start, end - settings.CRYPTO_HISTORY_MAX_DAYS * _DAY)
+    records = history.read(coin_id, start, end)
+    times, values = downsample(records[:, 0], records[:, METRICS[metric]], points)
+    return [[timestamp, value] for timestamp, value in zip(times, values)]
+
+
+def history_store():
+    directory = settings.CRYPTO_HISTORY_DIR
+    return HistoryStore(directory) if directory else None
+
+
+def record_markets(previous, store, version):
+    """
+    Snapshot subscriber appending every fetched market snapshot to the
+    history store.
+    """
+    history = history_store()
+    if history is None:
+        return
+    try:
+        history.record(store)
+    except OSError as e:
+        logging.error("Recording market history failed: %s", e)
@@ -0,0 +1,164 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from apps.crypto import tracing
+
+# Attributes every LogRecord has; anything else was passed with `extra`.
+_RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line: time, level, logger and
+    message, the fields passed with `extra` (including the `trace_id` of
+    the request that logged it) and the exception, if any.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `limit` records of one message per `window`
+    seconds, at `level` and above. A message is keyed by logger, level and
+    format string, so repeats of an error differing only in their
+    arguments count as one; the number of records held back is reported as
+    `suppressed` on the next one let through.
+    """
+
+    def __init__(self, limit=5, window=60, level=logging.WARNING):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.level = logging._checkLevel(level)
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level or not self.limit:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started, passed, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - started >= self.window:
+                started, passed = now, 0
+            if passed >= self.limit:
+                self._windows[key] = (started, passed, suppressed + 1)
+                return False
+            if len(self._windows) >= 10000:
+                self._windows.clear()
+            self._windows[key] = (started, passed + 1, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Handler that only puts records on a bounded queue; a listener thread
+    formats them as JSON and writes them to `filename` (standard error by
+    default). The logging thread never waits on I/O: when the queue is full
+    the record is dropped and counted in `dropped`, reported with the next
+    record written.
+    """
+
+    def __init__(self, filename=None, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.filename = filename
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.listener = None
+        self._lock = threading.Lock()
+        if filename:
+            self.target = WatchedFileHandler(filename, encoding="utf-8")
+        else:
+            self.target = logging.StreamHandler(sys.stderr)
+        self.target.setFormatter(JSONFormatter())
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        atexit.register(self.stop)
+
+    def _reset_after_fork(self):
+        # The listener thread is not copied into a forked worker.
+        self.queue = queue.Queue(self.queue_size)
+        self.listener = None
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        """
+        Resolves the message on the logging thread, where the arguments and
+        the request's trace are still current, and drops the traceback
+        objects, which hold every frame alive while queued.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        trace = tracing.current()
+        if trace is not None:
+            record.trace_id = trace.trace_id
+        return record
+
+    def enqueue(self, record):
+        self._start()
+        # Several request threads log at once; the count is only consistent
+        # when read and reset together with the put.
+        with self._lock:
+            if self.dropped:
+                record.dropped = self.dropped
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+            else:
+                self.dropped = 0
+
+    def _start(self):
+        if self.listener is not None:
+            return
+        with self._lock:
+            if self.listener is None:
+                listener = QueueListener(self.queue, self.target)
+                listener.start()
+                self.listener = listener
+
+    def stop(self):
+        """
+        Writes out the queued records and stops the listener.
+        """
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+
+    def close(self):
+        # dictConfig closes the handlers it replaces, e.g. on django.setup().
+        self.stop()
+        super().close()
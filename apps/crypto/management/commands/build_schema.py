@@ -0,0 +1,38 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.crypto.api.schema import SCHEMA_FILES
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the OpenAPI schema once, at build time, and stores it for "
+        "the schema endpoint to serve as is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            default=settings.API_SCHEMA_DIR,
+            help="Directory to write the schema to (default: API_SCHEMA_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.API_DOCS:
+            raise CommandError("Building the schema needs API_DOCS=1.")
+        from drf_spectacular.generators import SchemaGenerator
+        from drf_spectacular.renderers import (
+            OpenApiJsonRenderer,
+            OpenApiYamlRenderer,
+        )
+
+        schema = SchemaGenerator().get_schema(request=None, public=True)
+        renderers = {"json": OpenApiJsonRenderer(), "yaml": OpenApiYamlRenderer()}
+        directory = options["directory"]
+        os.makedirs(directory, exist_ok=True)
+        for name, renderer in renderers.items():
+            path = os.path.join(directory, SCHEMA_FILES[name])
+            with open(f"{path}.tmp", "wb") as handle:
+                handle.write(renderer.render(schema, renderer_context={}))
+            os.replace(f"{path}.tmp", path)
+            self.stdout.write(f"Wrote {path}")
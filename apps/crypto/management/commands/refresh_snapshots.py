@@ -0,0 +1,48 @@
+import logging
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.crypto.snapshots import refresh_shared_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetches the coin list, categories and market data from upstream and "
+        "publishes them as the shared snapshot mapped by every worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory",
+            default=settings.CRYPTO_SNAPSHOT_DIR,
+            help="Shared snapshot directory (default: CRYPTO_SNAPSHOT_DIR).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.CRYPTO_SNAPSHOT_TIMEOUT,
+            help="Seconds between two refreshes.",
+        )
+        parser.add_argument(
+            "--keep", type=int, default=2, help="Snapshot files to keep on disk."
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Refresh once and exit."
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not directory:
+            raise CommandError("Set CRYPTO_SNAPSHOT_DIR or pass --directory.")
+        while True:
+            started = time.monotonic()
+            try:
+                version = refresh_shared_snapshot(directory, options["keep"])
+                self.stdout.write(f"Published snapshot version {version}")
+            except RuntimeError as e:
+                if options["once"]:
+                    raise CommandError(str(e))
+                logging.error("Snapshot refresh failed: %s", e)
+            if options["once"]:
+                return
+            time.sleep(max(0.0, options["interval"] - (time.monotonic() - started)))
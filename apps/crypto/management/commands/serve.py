@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import get_resolver
+from apps.crypto.handlers import get_dispatching_application
+from apps.crypto.snapshots import start_refreshers, warm_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the production server: gunicorn with preforked workers sharing "
+        "the application and the upstream snapshots loaded before the fork."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=settings.SERVE_BIND,
+            help="Address to listen on (default: SERVE_BIND).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SERVE_WORKERS,
+            help="Worker processes (default: SERVE_WORKERS).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.SERVE_THREADS,
+            help="Threads per worker (default: SERVE_THREADS).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=settings.SERVE_TIMEOUT,
+            help="Seconds before a silent worker is restarted (default: "
+            "SERVE_TIMEOUT).",
+        )
+        parser.add_argument(
+            "--no-warmup",
+            action="store_true",
+            help="Start without loading the upstream snapshots first.",
+        )
+
+    def load_application(self, warmup=True):
+        """
+        Builds the WSGI application, imports every view through the URLconf
+        and loads the upstream snapshots, so forked workers share all of it
+        copy-on-write instead of each paying for it on its first requests.
+        """
+        application = get_dispatching_application()
+        get_resolver().url_patterns
+        if warmup:
+            loaded = warm_snapshots()
+            self.stdout.write(f"Warmed up: {', '.join(loaded) or 'nothing'}")
+        # Database connections must not be shared with the workers.
+        connections.close_all()
+        return application
+
+    def check_shared_cache(self, workers):
+        """
+        Warns when several workers would each throttle against their own
+        in-process cache, which multiplies every rate limit by their number.
+        """
+        if workers > 1 and isinstance(caches["default"], LocMemCache):
+            self.stderr.write(
+                self.style.WARNING(
+                    f"The cache is in-process: {workers} workers throttle "
+                    f"separately, so every rate limit is {workers} times "
+                    "higher. Set CACHE_BACKEND to a shared cache."
+                )
+            )
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError("gunicorn is required: pip install gunicorn")
+        self.check_shared_cache(options["workers"])
+
+        command = self
+        config = {
+            "bind": options["bind"],
+            "workers": options["workers"],
+            "threads": options["threads"],
+            "worker_class": "gthread" if options["threads"] > 1 else "sync",
+            "timeout": options["timeout"],
+            # The application is loaded once, in the master, before the fork.
+            "preload_app": True,
+            # Requests are logged by AccessLogMiddleware off the request thread.
+            "accesslog": None if settings.ACCESS_LOG else "-",
+            # Background refreshers run in every worker, started after the fork.
+            "post_fork": lambda server, worker: start_refreshers(),
+        }
+
+        class Server(BaseApplication):
+
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                return command.load_application(not options["no_warmup"])
+
+        Server().run()
@@ -0,0 +1,46 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.crypto.currency import UnsupportedCurrency
+from apps.crypto.models import Holding
+from apps.crypto.portfolio import bulk_valuation
+
+
+class Command(BaseCommand):
+    help = (
+        "Values the portfolio of every account in one pass, pricing each coin "
+        "once, and writes one JSON line per account."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vs-currency",
+            default=settings.CRYPTO_BASE_CURRENCY,
+            help="Currency of the amounts (default: CRYPTO_BASE_CURRENCY).",
+        )
+        parser.add_argument(
+            "--output", help="File to write to (default: standard output)."
+        )
+
+    def handle(self, *args, **options):
+        vs_currency = options["vs_currency"].lower()
+        holdings = Holding.objects.values_list(
+            "user_id", "coin_id", "quantity", "cost_basis", "cost_currency"
+        ).iterator(chunk_size=10000)
+        try:
+            valuations = bulk_valuation(holdings, vs_currency)
+        except (UnsupportedCurrency, RuntimeError) as e:
+            raise CommandError(str(e))
+        output = open(options["output"], "w") if options["output"] else self.stdout
+        try:
+            for user_id, valuation in valuations.items():
+                output.write(
+                    json.dumps(
+                        {"user_id": user_id, "vs_currency": vs_currency, **valuation}
+                    )
+                    + "\n"
+                )
+        finally:
+            if output is not self.stdout:
+                output.close()
+        self.stderr.write(f"Valued {len(valuations)} portfolios")
@@ -0,0 +1,61 @@
+import logging
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject, empty
+from apps.crypto import tracing
+
+logger = logging.getLogger("apps.access")
+
+# Spans whose total time is reported in the access log, as `<name>_ms`.
+_BREAKDOWN = ("admission", "auth", "throttle", "upstream", "paginate", "render")
+
+
+def _user_id(request):
+    # Never loads a user nobody asked for, e.g. from the session.
+    user = request.__dict__.get("user")
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return getattr(user, "pk", None)
+
+
+class AccessLogMiddleware:
+    """
+    Logs one structured record per request to the `apps.access` logger:
+    method, route, status, response size, user and latency, with the time
+    spent in upstream calls, rendering and the other traced stages when
+    TracingMiddleware runs before it. Records go through the background
+    log handler, so writing them never holds up the response.
+    """
+
+    def __init__(self, get_response):
+        if not settings.ACCESS_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "route": match.route if match is not None else None,
+            "status": response.status_code,
+            "bytes": None if response.streaming else len(response.content),
+            "user_id": _user_id(request),
+            "duration_ms": round(duration * 1000, 2),
+        }
+        trace = tracing.current()
+        if trace is not None:
+            totals = dict.fromkeys(_BREAKDOWN, 0)
+            for record in trace.spans:
+                if record.name in totals:
+                    totals[record.name] += record.duration
+            for name, total in totals.items():
+                fields[f"{name}_ms"] = round(total / 1e6, 2)
+        logger.info(
+            "%s %s %s", request.method, request.path, response.status_code, extra=fields
+        )
+        return response
@@ -0,0 +1,169 @@
+import heapq
+import itertools
+import re
+import threading
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+from apps.account.utils import get_token_groups
+from apps.crypto.tracing import span
+
+HIGH, NORMAL = 0, 1
+
+_TOKEN_KEY = re.compile(r"[0-9a-f]{40}")
+
+
+class AdmissionGate:
+    """
+    Admits at most `limit` concurrent requests to one endpoint. Up to
+    `queue_size` more wait for a free slot, high priority first and then in
+    arrival order, for at most `timeout` seconds; anything beyond that is
+    shed right away. High priority requests may take another `queue_size`
+    places on top, so a full queue does not shed them but it stays bounded.
+    """
+
+    def __init__(self, limit, queue_size, timeout):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._condition = threading.Condition()
+
+    def try_acquire(self):
+        """
+        Takes a slot when one is free and nobody is waiting for it.
+        """
+        with self._condition:
+            if self.active < self.limit and not self._waiting:
+                self.active += 1
+                return True
+            return False
+
+    def acquire(self, priority=NORMAL):
+        """
+        Waits for a slot. Returns False when the queue is full or the slot
+        did not free up before the deadline.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            if self.active < self.limit and not self._waiting:
+                self.active += 1
+                return True
+            bound = self.queue_size * 2 if priority == HIGH else self.queue_size
+            if len(self._waiting) >= bound:
+                return False
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            while self.active >= self.limit or self._waiting[0] != ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    return False
+                self._condition.wait(remaining)
+            heapq.heappop(self._waiting)
+            self.active += 1
+            # The next waiter may fit as well.
+            self._condition.notify_all()
+            return True
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+
+@lru_cache(maxsize=1024)
+def _url_name(path):
+    try:
+        return resolve(path).url_name
+    except Resolver404:
+        return None
+
+
+class AdmissionControlMiddleware:
+    """
+    Bounds the concurrent requests of every `/api/` endpoint per worker
+    process (CRYPTO_ADMISSION_LIMITS, CRYPTO_ADMISSION_DEFAULT_LIMIT) and
+    sheds the excess with a 503 and `Retry-After` instead of letting it
+    queue until it times out. Endpoints in CRYPTO_ADMISSION_EXEMPT, such as
+    the health check, are never held back, and tokens of the
+    CRYPTO_PREMIUM_GROUP wait ahead of everyone else.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._gates = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request):
+        gate = self.gate(request)
+        if gate is None:
+            return self.get_response(request)
+        if not gate.try_acquire():
+            with span("admission"):
+                admitted = gate.acquire(self.priority(request))
+            if not admitted:
+                return self.reject()
+        try:
+            return self.get_response(request)
+        finally:
+            gate.release()
+
+    def gate(self, request):
+        if not request.path_info.startswith("/api/"):
+            return None
+        name = _url_name(request.path_info)
+        if name is None or name in settings.CRYPTO_ADMISSION_EXEMPT:
+            return None
+        gate = self._gates.get(name)
+        if gate is None:
+            limit = settings.CRYPTO_ADMISSION_LIMITS.get(
+                name, settings.CRYPTO_ADMISSION_DEFAULT_LIMIT
+            )
+            if not limit:
+                return None
+            with self._lock:
+                gate = self._gates.setdefault(
+                    name,
+                    AdmissionGate(
+                        limit,
+                        settings.CRYPTO_ADMISSION_QUEUE_SIZE,
+                        settings.CRYPTO_ADMISSION_QUEUE_TIMEOUT,
+                    ),
+                )
+        return gate
+
+    @staticmethod
+    def priority(request):
+        """
+        Only asked for requests that have to wait, so the group lookup never
+        costs anything while the endpoint has free slots. Keys that cannot
+        be auth tokens are not looked up at all.
+        """
+        scheme, _, key = request.headers.get("Authorization", "").partition(" ")
+        key = key.strip()
+        if scheme.lower() == "token" and _TOKEN_KEY.fullmatch(key):
+            if settings.CRYPTO_PREMIUM_GROUP in get_token_groups(key):
+                return HIGH
+        return NORMAL
+
+    @staticmethod
+    def reject():
+        retry_after = settings.CRYPTO_ADMISSION_RETRY_AFTER
+        response = JsonResponse(
+            {
+                "status": False,
+                "status_code": 503,
+                "message": "Service overloaded, retry later.",
+                "data": None,
+            },
+            status=503,
+        )
+        response["Retry-After"] = str(retry_after)
+        return response
@@ -0,0 +1,58 @@
+import random
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from apps.crypto.tracing import SERVER, exporter, server_timing, span, trace_request
+
+
+class TracingMiddleware:
+    """
+    Traces every request: the spans recorded while it is handled (admission,
+    authentication, view, upstream calls, pagination, rendering) are
+    summed up in a `Server-Timing` header for the callers CRYPTO_SERVER_TIMING
+    allows, and a CRYPTO_TRACE_SAMPLE_RATE share of the traces is exported
+    to CRYPTO_TRACE_FILE. Goes first in MIDDLEWARE and API_MIDDLEWARE so the
+    root span covers the whole chain.
+    """
+
+    def __init__(self, get_response):
+        if not settings.CRYPTO_TRACING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < settings.CRYPTO_TRACE_SAMPLE_RATE
+        with trace_request(sampled) as trace:
+            with span(
+                f"{request.method} {request.path_info}",
+                kind=SERVER,
+                **{"http.request.method": request.method, "url.path": request.path},
+            ) as root:
+                response = self.get_response(request)
+                root.attributes["http.response.status_code"] = response.status_code
+                match = request.resolver_match
+                if match is not None and match.route:
+                    root.name = f"{request.method} /{match.route}"
+                    root.attributes["http.route"] = match.route
+        if self.shows_timing(request):
+            response["Server-Timing"] = server_timing(trace.spans)
+        if sampled:
+            exporter.export(trace)
+        return response
+
+    @staticmethod
+    def shows_timing(request):
+        """
+        Whether the caller gets the Server-Timing header: everyone with
+        CRYPTO_SERVER_TIMING "all", staff users and INTERNAL_IPS with
+        "internal", nobody otherwise. Timings tell how long upstream and the
+        database take, which is not for every client to see.
+        """
+        mode = settings.CRYPTO_SERVER_TIMING
+        if mode == "all":
+            return True
+        if mode != "internal":
+            return False
+        if request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS:
+            return True
+        user = getattr(request, "user", None)
+        return user is not None and user.is_staff
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import models
+
+
+class PriceAlert(models.Model):
+    """
+    A one-shot alert on the price of a coin: it fires the first time the
+    price crosses `threshold` in `direction`, then turns inactive.
+    """
+
+    ABOVE = "above"
+    BELOW = "below"
+    DIRECTIONS = [(ABOVE, "Above"), (BELOW, "Below")]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="price_alerts",
+    )
+    coin_id = models.CharField(max_length=100)
+    direction = models.CharField(max_length=5, choices=DIRECTIONS)
+    threshold = models.FloatField()
+    vs_currency = models.CharField(max_length=10)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    triggered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The alert engine loads the active alerts newer than its last load.
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_active=True),
+                name="price_alert_active_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.coin_id} {self.direction} {self.threshold} {self.vs_currency}"
+
+
+class Holding(models.Model):
+    """
+    Quantity of a coin held by a user, with the total paid for it
+    (`cost_basis`) in `cost_currency`.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="holdings",
+    )
+    coin_id = models.CharField(max_length=100)
+    quantity = models.FloatField()
+    cost_basis = models.FloatField(default=0)
+    cost_currency = models.CharField(max_length=10)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "coin_id"], name="unique_holding_per_coin"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} {self.coin_id}"
@@ -2,6 +2,7 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.views import Response
 from collections import OrderedDict
 from rest_framework import status
+from apps.crypto.tracing import span
 
 
 class CPageNumberPagination(PageNumberPagination):
@@ -9,9 +10,13 @@ class CPageNumberPagination(PageNumberPagination):
     page_size = 10
     page_query_param = "page"
 
+    def paginate_queryset(self, queryset, request, view=None):
+        with span("paginate"):
+            return super().paginate_queryset(queryset, request, view)
+
     def get_paginated_response(self, data):
         response = super().get_paginated_response(data)
-        page_count = response.data.get("count") // self.page_size
+        page_count = response.data.get("count") // int(self.page_size)
         return Response(
             OrderedDict(
                 [
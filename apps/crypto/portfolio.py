@@ -0,0 +1,217 @@
+import logging
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from apps.crypto.coingeko_api import CRYPTOAPI
+from apps.crypto.currency import conversion_factor, get_rates
+from apps.crypto.snapshots import MARKET_PAGE_SIZE, markets_snapshot
+from apps.crypto.store import factorize
+
+
+def fetch_prices(coin_ids):
+    """
+    Returns the prices in CRYPTO_BASE_CURRENCY of coins outside the market
+    snapshot, from the cache or from `coins/markets?ids=` fetched in chunks
+    of a full page, and caches them for CRYPTO_SNAPSHOT_TIMEOUT seconds.
+    Coins upstream does not price are cached as misses for
+    CRYPTO_PRICE_MISS_TIMEOUT seconds; a chunk that fails is logged and its
+    coins are retried on the next call.
+
+    Returns:
+        dict: Price per coin id; coins without a price are left out.
+    """
+    keys = {f"crypto:price:{coin_id}": coin_id for coin_id in coin_ids}
+    prices = {keys[key]: price for key, price in cache.get_many(list(keys)).items()}
+    missing = [coin_id for coin_id in coin_ids if coin_id not in prices]
+    fetched, unknown = {}, []
+    for start in range(0, len(missing), MARKET_PAGE_SIZE):
+        chunk = missing[start : start + MARKET_PAGE_SIZE]
+        try:
+            rows = CRYPTOAPI.fetch_market_data(
+                ids=",".join(chunk),
+                vs_currency=settings.CRYPTO_BASE_CURRENCY,
+                per_page=MARKET_PAGE_SIZE,
+            )
+        except RuntimeError as e:
+            logging.error("Fetching portfolio prices failed: %s", e)
+            continue
+        for row in rows:
+            if row.get("current_price") is not None:
+                fetched[row["id"]] = row["current_price"]
+        unknown.extend(coin_id for coin_id in chunk if coin_id not in fetched)
+    if fetched:
+        cache.set_many(
+            {f"crypto:price:{coin_id}": price for coin_id, price in fetched.items()},
+            settings.CRYPTO_SNAPSHOT_TIMEOUT,
+        )
+    if unknown:
+        cache.set_many(
+            {f"crypto:price:{coin_id}": None for coin_id in unknown},
+            settings.CRYPTO_PRICE_MISS_TIMEOUT,
+        )
+    prices.update(fetched)
+    return {coin_id: price for coin_id, price in prices.items() if price is not None}
+
+
+def resolve_prices(coin_ids):
+    """
+    Returns the prices of `coin_ids` in CRYPTO_BASE_CURRENCY as a float64
+    array, NaN for coins without a price. Coins in the market snapshot are
+    read from it; the others take one chunked upstream fetch.
+    """
+    store = markets_snapshot.get()
+    rows = store.rows_of(coin_ids)
+    prices = np.full(len(rows), np.nan)
+    found = rows >= 0
+    # Only rows that exist are indexed: an empty store has none at all.
+    prices[found] = store.numbers("current_price")[rows[found]]
+    missing = np.flatnonzero(~found)
+    if len(missing):
+        fetched = fetch_prices([coin_ids[position] for position in missing])
+        prices[missing] = [
+            fetched.get(coin_ids[position], np.nan) for position in missing
+        ]
+    return prices
+
+
+def _factors(currencies, vs_currency):
+    """
+    Returns the conversion factor to `vs_currency` of each of `currencies`,
+    converting each distinct currency once.
+
+    Raises:
+        UnsupportedCurrency: When a currency has no exchange rate.
+    """
+    distinct, inverse = factorize(currencies)
+    rates = None
+    factors = np.ones(len(distinct))
+    for position, currency in enumerate(distinct):
+        if currency != vs_currency:
+            rates = get_rates() if rates is None else rates
+            factors[position] = conversion_factor(rates, currency, vs_currency)
+    return factors[inverse]
+
+
+def value_positions(coin_ids, quantities, costs, cost_currencies, vs_currency):
+    """
+    Values holdings given as parallel sequences in `vs_currency`, resolving
+    the price of each distinct coin once.
+
+    Returns:
+        tuple: (prices, values, costs) float64 arrays aligned with the
+        holdings; prices and values are NaN for coins without a price.
+
+    Raises:
+        UnsupportedCurrency: When a currency has no exchange rate.
+    """
+    if not len(coin_ids):
+        empty = np.empty(0)
+        return empty, empty, empty
+    coins, inverse = factorize(coin_ids)
+    prices = resolve_prices(coins)[inverse]
+    base = settings.CRYPTO_BASE_CURRENCY
+    if vs_currency != base:
+        prices = prices * conversion_factor(get_rates(), base, vs_currency)
+    values = np.asarray(quantities, dtype=np.float64) * prices
+    costs = np.asarray(costs, dtype=np.float64) * _factors(cost_currencies, vs_currency)
+    return prices, values, costs
+
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+
+def portfolio_valuation(holdings, vs_currency):
+    """
+    Values one portfolio: per-coin value and P&L, and the totals over the
+    coins that have a price.
+
+    Args:
+        holdings (list): Dicts with coin_id, quantity, cost_basis and
+            cost_currency.
+        vs_currency (str): Currency of the amounts.
+
+    Raises:
+        UnsupportedCurrency: When a currency has no exchange rate.
+    """
+    prices, values, costs = value_positions(
+        [holding["coin_id"] for holding in holdings],
+        [holding["quantity"] for holding in holdings],
+        [holding["cost_basis"] for holding in holdings],
+        [holding["cost_currency"] for holding in holdings],
+        vs_currency,
+    )
+    pnl = values - costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_percentage = np.where(costs > 0, pnl / costs * 100, np.nan)
+    priced = np.isfinite(values)
+    total_value = float(values[priced].sum())
+    total_cost = float(costs[priced].sum())
+    return {
+        "vs_currency": vs_currency,
+        "total_value": total_value,
+        "total_cost": total_cost,
+        "total_pnl": total_value - total_cost,
+        "total_pnl_percentage": (
+            (total_value - total_cost) / total_cost * 100 if total_cost else None
+        ),
+        "unpriced": [
+            holding["coin_id"]
+            for holding, has_price in zip(holdings, priced.tolist())
+            if not has_price
+        ],
+        "holdings": [
+            {
+                "coin_id": holding["coin_id"],
+                "quantity": holding["quantity"],
+                "price": _number(prices[position]),
+                "value": _number(values[position]),
+                "cost": float(costs[position]),
+                "pnl": _number(pnl[position]),
+                "pnl_percentage": _number(pnl_percentage[position]),
+            }
+            for position, holding in enumerate(holdings)
+        ],
+    }
+
+
+def bulk_valuation(holdings, vs_currency):
+    """
+    Values many portfolios in one pass: every distinct coin is priced once
+    and the totals per user are summed with `np.bincount`.
+
+    Args:
+        holdings (iterable): (user_id, coin_id, quantity, cost_basis,
+            cost_currency) tuples, e.g. a `values_list` over all holdings.
+        vs_currency (str): Currency of the amounts.
+
+    Returns:
+        dict: Per user id, the value, cost and P&L of the coins with a price
+        and the number of holdings without one.
+
+    Raises:
+        UnsupportedCurrency: When a currency has no exchange rate.
+    """
+    rows = list(holdings)
+    if not rows:
+        return {}
+    user_ids, coin_ids, quantities, costs, cost_currencies = zip(*rows)
+    _, values, costs = value_positions(
+        coin_ids, quantities, costs, cost_currencies, vs_currency
+    )
+    users, owner = factorize(user_ids)
+    priced = np.isfinite(values)
+    value = np.bincount(
+        owner, weights=np.where(priced, values, 0), minlength=len(users)
+    )
+    cost = np.bincount(owner, weights=np.where(priced, costs, 0), minlength=len(users))
+    unpriced = np.bincount(owner, weights=~priced, minlength=len(users))
+    return {
+        user_id: {
+            "value": float(value[position]),
+            "cost": float(cost[position]),
+            "pnl": float(value[position] - cost[position]),
+            "unpriced": int(unpriced[position]),
+        }
+        for position, user_id in enumerate(users)
+    }
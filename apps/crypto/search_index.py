@@ -0,0 +1,132 @@
+import threading
+from bisect import bisect_left
+from apps.crypto.snapshots import coins_snapshot
+
+# Sorts after every character a normalized key can contain, so
+# bisect_left(entries, (prefix + _MAX_CHAR,)) ends the prefix range.
+_MAX_CHAR = "\U0010ffff"
+
+
+def normalize(value):
+    return " ".join((value or "").casefold().split())
+
+
+class CoinSearchIndex:
+    """
+    In-memory type-ahead index over the coin list store.
+
+    Symbols and names are kept as sorted (normalized key, coin id) tuples so
+    a prefix lookup is two bisects plus `limit` reads; the coins themselves
+    are read from the store through its id to row map. Readers never take a
+    lock: updates build the new sorted lists aside and swap them in with a
+    single assignment.
+    """
+
+    # Above this share of changed coins a full rebuild is cheaper than
+    # patching the sorted lists one entry at a time.
+    rebuild_ratio = 0.25
+
+    def __init__(self):
+        self._state = (None, [], [])
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __len__(self):
+        return len(self._state[1])
+
+    def update(self, previous, coins, version):
+        """
+        Snapshot subscriber: applies the difference between the previous and
+        the new coin list.
+        """
+        with self._lock:
+            store, symbols, names = self._state
+            if previous is None or store is None:
+                self._state = (coins, *self._build(_keys(coins)))
+                self.version = version
+                return
+            old_keys, new_keys = _keys(previous), _keys(coins)
+            removed = [
+                (coin_id, keys)
+                for coin_id, keys in old_keys.items()
+                if new_keys.get(coin_id) != keys
+            ]
+            added = [
+                (coin_id, keys)
+                for coin_id, keys in new_keys.items()
+                if old_keys.get(coin_id) != keys
+            ]
+            if len(removed) + len(added) > len(new_keys) * self.rebuild_ratio:
+                self._state = (coins, *self._build(new_keys))
+            else:
+                symbols, names = list(symbols), list(names)
+                for coin_id, (symbol, name) in removed:
+                    self._discard(symbols, (symbol, coin_id))
+                    self._discard(names, (name, coin_id))
+                for coin_id, (symbol, name) in added:
+                    self._insert(symbols, (symbol, coin_id))
+                    self._insert(names, (name, coin_id))
+                self._state = (coins, symbols, names)
+            self.version = version
+
+    def get(self, coin_id):
+        store = self._state[0]
+        return None if store is None else store.get(coin_id)
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` coins whose symbol or name starts with `query`.
+        Exact symbol matches come first, then symbol prefixes, then names.
+        """
+        prefix = normalize(query)
+        store, symbols, names = self._state
+        if not prefix or limit <= 0 or store is None:
+            return []
+        seen = set()
+        exact, matches = [], []
+        for entries in (symbols, names):
+            index = bisect_left(entries, (prefix,))
+            end = bisect_left(entries, (prefix + _MAX_CHAR,), index)
+            for key, coin_id in entries[index : min(end, index + limit)]:
+                if coin_id in seen:
+                    continue
+                seen.add(coin_id)
+                if key == prefix and entries is symbols:
+                    exact.append(coin_id)
+                else:
+                    matches.append(coin_id)
+        return store.lookup((exact + matches)[:limit])
+
+    @staticmethod
+    def _build(keys):
+        symbols = sorted((symbol, coin_id) for coin_id, (symbol, _) in keys.items())
+        names = sorted((name, coin_id) for coin_id, (_, name) in keys.items())
+        return symbols, names
+
+    @staticmethod
+    def _insert(entries, entry):
+        entries.insert(bisect_left(entries, entry), entry)
+
+    @staticmethod
+    def _discard(entries, entry):
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+
+def _keys(coins):
+    """
+    Maps every coin id of a store to its normalized (symbol, name).
+    """
+    return {
+        coin_id: (normalize(symbol), normalize(name))
+        for coin_id, symbol, name in zip(
+            coins.column_values("id"),
+            coins.column_values("symbol"),
+            coins.column_values("name"),
+        )
+    }
+
+
+coin_index = CoinSearchIndex()
+coins_snapshot.subscribe(coin_index.update)
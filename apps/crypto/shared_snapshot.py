@@ -0,0 +1,282 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from apps.crypto.store import (
+    CategoryColumn,
+    ColumnStore,
+    KeyIndex,
+    NumberColumn,
+    ObjectColumn,
+    StringColumn,
+)
+
+MAGIC = b"CMSNAP01"
+CURRENT_FILE = "CURRENT"
+# magic + header length
+_PREAMBLE = struct.Struct("<8sQ")
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+class _Writer:
+    """
+    Collects the binary blocks of a snapshot file and hands out their
+    offsets, relative to the start of the data section.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.size = 0
+
+    def add(self, data):
+        data = bytes(data)
+        offset = self.size
+        self.blocks.append(data)
+        padding = _align(len(data)) - len(data)
+        if padding:
+            self.blocks.append(b"\0" * padding)
+        self.size += len(data) + padding
+        return offset
+
+    def array(self, array):
+        array = np.ascontiguousarray(array)
+        return [self.add(array.tobytes()), len(array), array.dtype.str]
+
+
+def _describe_column(column, writer):
+    if isinstance(column, NumberColumn):
+        return {
+            "kind": "number",
+            "values": writer.array(column.values),
+            "mask": None if column.mask is None else writer.array(column.mask),
+            "integral": (
+                None if column.integral is None else writer.array(column.integral)
+            ),
+        }
+    if isinstance(column, StringColumn):
+        return {
+            "kind": "string",
+            "buffer": [writer.add(column.buffer), len(column.buffer)],
+            "offsets": writer.array(column.offsets),
+            "mask": None if column.mask is None else writer.array(column.mask),
+        }
+    if isinstance(column, CategoryColumn):
+        return {
+            "kind": "category",
+            "codes": writer.array(column.codes),
+            "categories": list(column.categories),
+        }
+    values = column.to_list(slice(0, len(column)))
+    return {"kind": "object", "values": values}
+
+
+def write_snapshot(directory, stores, version):
+    """
+    Writes `stores` ({dataset name: ColumnStore}) as snapshot `version` and
+    then points CURRENT at it. Both files are written aside and renamed into
+    place, so readers only ever see a complete snapshot.
+
+    Args:
+        directory (str): The shared snapshot directory.
+        stores (dict): The stores to write, by dataset name.
+        version (int): The snapshot version.
+
+    Returns:
+        str: The path of the snapshot file.
+    """
+    writer = _Writer()
+    datasets = {}
+    for name, store in stores.items():
+        index = store.index
+        datasets[name] = {
+            "key": store.key,
+            "length": len(store),
+            "columns": {
+                column_name: _describe_column(column, writer)
+                for column_name, column in store.columns.items()
+            },
+            "index": {
+                "hashes": writer.array(index.hashes),
+                "rows": writer.array(index.rows),
+            },
+            "absent": {
+                column_name: writer.array(missing)
+                for column_name, missing in store.absent.items()
+            },
+        }
+    header = json.dumps(
+        {"version": version, "created": time.time(), "datasets": datasets}
+    ).encode()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"snapshot-{version}.bin")
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as handle:
+        handle.write(_PREAMBLE.pack(MAGIC, len(header)))
+        handle.write(header)
+        handle.write(b"\0" * (_align(_PREAMBLE.size + len(header)) - handle.tell()))
+        for block in writer.blocks:
+            handle.write(block)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
+
+    current = os.path.join(directory, CURRENT_FILE)
+    with open(f"{current}.tmp", "w") as handle:
+        handle.write(str(version))
+    os.replace(f"{current}.tmp", current)
+    return path
+
+
+def current_version(directory):
+    """
+    Returns the version CURRENT points at, or None when there is none yet.
+    """
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as handle:
+            return int(handle.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def prune_snapshots(directory, keep=2):
+    """
+    Deletes all but the `keep` newest snapshot files. Workers that still map
+    a deleted file keep reading it until they move to the new version.
+    """
+    versions = sorted(
+        int(name[len("snapshot-") : -len(".bin")])
+        for name in os.listdir(directory)
+        if name.startswith("snapshot-") and name.endswith(".bin")
+    )
+    for version in versions[:-keep] if keep else versions:
+        try:
+            os.remove(os.path.join(directory, f"snapshot-{version}.bin"))
+        except FileNotFoundError:
+            pass
+
+
+def open_snapshot(path):
+    """
+    Maps a snapshot file read-only and returns (version, {name: ColumnStore}).
+    Numeric columns, string buffers and key indexes are views over the
+    mapping: nothing is copied into the worker's heap.
+    """
+    with open(path, "rb") as handle:
+        mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, header_size = _PREAMBLE.unpack_from(mapping, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a snapshot file")
+    header = json.loads(mapping[_PREAMBLE.size : _PREAMBLE.size + header_size])
+    data = _align(_PREAMBLE.size + header_size)
+    view = memoryview(mapping)
+
+    def array(spec):
+        if spec is None:
+            return None
+        offset, count, dtype = spec
+        return np.frombuffer(mapping, np.dtype(dtype), count, data + offset)
+
+    def column(spec):
+        kind = spec["kind"]
+        if kind == "number":
+            return NumberColumn(
+                array(spec["values"]), array(spec["mask"]), array(spec["integral"])
+            )
+        if kind == "string":
+            offset, size = spec["buffer"]
+            buffer = view[data + offset : data + offset + size]
+            return StringColumn(buffer, array(spec["offsets"]), array(spec["mask"]))
+        if kind == "category":
+            return CategoryColumn(array(spec["codes"]), spec["categories"])
+        return ObjectColumn(spec["values"])
+
+    stores = {}
+    for name, dataset in header["datasets"].items():
+        columns = {
+            column_name: column(spec)
+            for column_name, spec in dataset["columns"].items()
+        }
+        index = KeyIndex(
+            array(dataset["index"]["hashes"]), array(dataset["index"]["rows"])
+        )
+        absent = {
+            column_name: array(spec)
+            for column_name, spec in dataset.get("absent", {}).items()
+        }
+        stores[name] = ColumnStore(
+            columns,
+            dataset["key"],
+            index=index,
+            length=dataset["length"],
+            absent=absent,
+        )
+    return header["version"], stores
+
+
+class SharedSnapshotReader:
+    """
+    Worker side of the shared snapshot: maps the version CURRENT points at
+    and moves to a new version when the refresher publishes one. CURRENT is
+    checked at most once every `check_interval` seconds.
+    """
+
+    def __init__(self, directory, check_interval=1.0):
+        self.directory = directory
+        self.check_interval = check_interval
+        self._state = (None, {})
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Returns (version, store) for dataset `name`; (None, None) until the
+        refresher has written a snapshot.
+        """
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._reload()
+        version, stores = self._state
+        return version, stores.get(name)
+
+    def _reload(self):
+        version = current_version(self.directory)
+        if version is None or version == self._state[0]:
+            return
+        with self._lock:
+            if version == self._state[0]:
+                return
+            path = os.path.join(self.directory, f"snapshot-{version}.bin")
+            try:
+                self._state = open_snapshot(path)
+            except FileNotFoundError:
+                # Pruned between reading CURRENT and opening: retry next check.
+                self._checked_at = 0.0
+
+
+_readers = {}
+
+
+def shared_reader():
+    """
+    Returns the process-wide reader of CRYPTO_SNAPSHOT_DIR, or None when no
+    shared snapshot directory is configured.
+    """
+    directory = settings.CRYPTO_SNAPSHOT_DIR
+    if not directory:
+        return None
+    reader = _readers.get(directory)
+    if reader is None:
+        reader = _readers.setdefault(
+            directory,
+            SharedSnapshotReader(directory, settings.CRYPTO_SNAPSHOT_CHECK_INTERVAL),
+        )
+    return reader
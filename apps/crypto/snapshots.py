@@ -0,0 +1,508 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from apps.crypto.coingeko_api import CRYPTOAPI
+from apps.crypto.store import ColumnStore
+from apps.crypto.shared_snapshot import (
+    current_version,
+    prune_snapshots,
+    shared_reader,
+    write_snapshot,
+)
+
+# Largest page size `coins/markets` accepts.
+MARKET_PAGE_SIZE = 250
+# Versions are the publication time in milliseconds times 1000 plus a random
+# tag of the publishing process, so two processes or hosts never hand out
+# the same version for different data.
+_VERSION_TAGS = 1000
+_version_tag = random.randrange(_VERSION_TAGS)
+
+
+def _new_version_tag():
+    global _version_tag
+    _version_tag = random.randrange(_VERSION_TAGS)
+
+
+os.register_at_fork(after_in_child=_new_version_tag)
+
+
+def next_version(previous=0):
+    """
+    Returns the version of a snapshot published now, so versions keep
+    increasing across restarts and the versions of local and shared
+    snapshots compare (see `_VERSION_TAGS`).
+    """
+    version = time.time_ns() // 1_000_000 * _VERSION_TAGS + _version_tag
+    return max(previous + 1, version)
+
+
+def version_time(version):
+    """
+    Returns the epoch time in seconds a version was published at.
+    """
+    return version / (1000 * _VERSION_TAGS)
+
+
+class Snapshot:
+    """
+    Process-local copy of an upstream payload, held as a `ColumnStore`.
+
+    The payload is loaded on first use and reloaded once it is older than
+    `timeout` seconds. Every reload bumps `version` and calls the subscribers
+    with the previous rows, the new rows and the new version, so derived
+    structures (indexes, stores) can be updated from the same data.
+
+    While the rows are missing, or `incomplete(rows)` says parts of them
+    failed to load, they are reloaded every CRYPTO_SNAPSHOT_RETRY_INTERVAL
+    seconds instead.
+    """
+
+    def __init__(self, name, loader, timeout=None, incomplete=None):
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout
+        self.incomplete = incomplete
+        self.rows = None
+        self.version = 0
+        self.current = (None, 0)
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._fetch_subscribers = []
+        self._refresher = None
+        self.background_interval = None
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # A forked worker inherits the rows but not the refresher thread.
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def subscribe(self, callback, fetched_only=False):
+        """
+        Registers a callback(previous, rows, version) run after every reload.
+        The callback is run right away when the snapshot is already loaded.
+
+        A `fetched_only` callback only runs for rows this process fetched
+        from upstream, not for rows mapped from the shared snapshot, so work
+        such as recording history is done once per host.
+        """
+        if fetched_only:
+            self._fetch_subscribers.append(callback)
+            return
+        self._subscribers.append(callback)
+        if self.rows is not None:
+            callback(None, self.rows, self.version)
+
+    def is_stale(self):
+        timeout = self.timeout
+        if timeout is None:
+            timeout = settings.CRYPTO_SNAPSHOT_TIMEOUT
+        timeout = self._interval(timeout)
+        return self.rows is None or time.monotonic() - self.loaded_at > timeout
+
+    def _interval(self, interval):
+        rows = self.rows
+        if rows is None or (self.incomplete is not None and self.incomplete(rows)):
+            return min(interval, settings.CRYPTO_SNAPSHOT_RETRY_INTERVAL)
+        return interval
+
+    def keep_fresh(self, interval):
+        """
+        Has every process that reads the snapshot refresh it in the
+        background every `interval` seconds. The thread is started by the
+        first `get` in each process, so workers forked after this call get
+        their own.
+        """
+        self.background_interval = interval
+
+    def get(self):
+        """
+        Returns the current rows. When CRYPTO_SNAPSHOT_DIR is set they come
+        from the snapshot file shared by all workers; otherwise, or until the
+        refresher has written one, they are reloaded from upstream when stale.
+        """
+        return self.get_versioned()[0]
+
+    def get_versioned(self):
+        """
+        Like `get`, but returns (rows, version) read together, so a refresh
+        landing in between cannot label the rows with the next version.
+        """
+        if self.background_interval is not None and self._refresher is None:
+            self.refresh_in_background(self.background_interval)
+        if not self._sync_shared() and self.is_stale():
+            self.refresh(force=False)
+        return self.current
+
+    def peek(self):
+        """
+        Returns the current rows without ever waiting on upstream: None until
+        the first load, which is started in the background. For payloads that
+        are too slow to fetch on the request path.
+        """
+        if self._sync_shared():
+            return self.rows
+        self.refresh_in_background(self.timeout or settings.CRYPTO_SNAPSHOT_TIMEOUT)
+        return self.rows
+
+    def _sync_shared(self):
+        """
+        Moves to the shared snapshot's version when CRYPTO_SNAPSHOT_DIR is
+        set and it is newer than the rows held. Returns False when there is
+        no shared snapshot or it is older than CRYPTO_SHARED_SNAPSHOT_MAX_AGE
+        (the refresher is not running), so the rows are refreshed locally.
+        """
+        reader = shared_reader()
+        if reader is None:
+            return False
+        version, store = reader.get(self.name)
+        if store is None:
+            return False
+        age = time.time() - version_time(version)
+        if age > settings.CRYPTO_SHARED_SNAPSHOT_MAX_AGE:
+            return False
+        if version > self.version:
+            with self._lock:
+                if version > self.version:
+                    self.publish(store, version)
+        return True
+
+    def refresh(self, force=True):
+        """
+        Reloads the rows from upstream. Concurrent callers wait for the
+        reload in flight instead of starting their own. When the reload
+        fails the previous rows are kept and served until the next attempt.
+        """
+        with self._lock:
+            if not force and not self.is_stale():
+                return self.rows
+            try:
+                rows = self.loader()
+            except RuntimeError:
+                if self.rows is None:
+                    raise
+                logging.error(
+                    "Keeping stale %s snapshot after a failed refresh", self.name
+                )
+                self.loaded_at = time.monotonic()
+                return self.rows
+            self.publish(rows, fetched=True)
+            return rows
+
+    def publish(self, rows, version=None, fetched=False):
+        """
+        Installs `rows` as `version` and notifies the subscribers. The
+        default version is `next_version`, so versions handed to clients
+        keep increasing across restarts and do not repeat between processes.
+        """
+        previous = self.rows
+        self.rows = rows
+        if version is None:
+            version = next_version(self.version)
+        self.version = version
+        self.current = (rows, version)
+        self.loaded_at = time.monotonic()
+        callbacks = self._subscribers
+        if fetched:
+            callbacks = callbacks + self._fetch_subscribers
+        for callback in callbacks:
+            callback(previous, rows, self.version)
+
+    def refresh_in_background(self, interval):
+        """
+        Starts a daemon thread reloading the snapshot every `interval`
+        seconds, so readers never wait for a reload. While a fresh shared
+        snapshot exists the thread only follows it. Does nothing when
+        started before.
+        """
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh_forever,
+                args=(interval,),
+                name=f"{self.name}-refresher",
+                daemon=True,
+            )
+        self._refresher.start()
+
+    def _refresh_forever(self, interval):
+        while True:
+            if self.rows is not None:
+                time.sleep(self._interval(interval))
+            if self._sync_shared():
+                continue
+            try:
+                self.refresh(force=self.rows is not None)
+            except RuntimeError as e:
+                logging.error("Background refresh of %s failed: %s", self.name, e)
+                time.sleep(self._interval(interval))
+
+    def clear(self):
+        with self._lock:
+            self.rows = None
+            self.current = (None, self.version)
+            self.loaded_at = 0.0
+
+
+coins_snapshot = Snapshot(
+    "coins", lambda: ColumnStore.from_rows(CRYPTOAPI.get_coins(), key="id")
+)
+categories_snapshot = Snapshot(
+    "categories",
+    lambda: ColumnStore.from_rows(CRYPTOAPI.get_coinCategory(), key="category_id"),
+)
+
+
+def fetch_market_pages(category=None, pages=None, pacer=None):
+    """
+    Fetches up to `pages` (default CRYPTO_MARKET_SNAPSHOT_PAGES) full pages
+    of `coins/markets` in CRYPTO_BASE_CURRENCY, stopping at the first short
+    page. Each request first waits for `pacer`, when given.
+    """
+    rows = []
+    for page in range(1, (pages or settings.CRYPTO_MARKET_SNAPSHOT_PAGES) + 1):
+        if pacer is not None:
+            pacer.wait()
+        batch = CRYPTOAPI.fetch_market_data(
+            category=category,
+            vs_currency=settings.CRYPTO_BASE_CURRENCY,
+            per_page=MARKET_PAGE_SIZE,
+            page=page,
+        )
+        rows.extend(batch)
+        if len(batch) < MARKET_PAGE_SIZE:
+            break
+    return rows
+
+
+class _Pacer:
+    """
+    Spaces the upstream requests of the threads sharing it at least
+    `interval` seconds apart. `back_off` holds all of them for a while once
+    upstream rate limits one.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def back_off(self, seconds):
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def member_pairs(store):
+    """
+    Returns the (category_id, coin_id) pairs of a category membership store.
+    The coin_id is None for a category whose members have not loaded yet.
+    """
+    category_ids = store.column_values("category_id") if len(store) else []
+    if "coin_id" not in store.columns:
+        return [(category_id, None) for category_id in category_ids]
+    return list(zip(category_ids, store.column_values("coin_id")))
+
+
+def _has_pending_categories(store):
+    return any(coin_id is None for _, coin_id in member_pairs(store))
+
+
+_members_loaded_at = 0.0
+
+
+def fetch_category_members():
+    """
+    Returns one (category_id, coin_id) row per coin of every category, in
+    market cap order within a category.
+
+    Categories are fetched by CRYPTO_CATEGORY_FETCH_WORKERS threads at most,
+    their requests spaced CRYPTO_CATEGORY_FETCH_INTERVAL seconds apart, and
+    all of them pause for CRYPTO_CATEGORY_BACKOFF seconds (doubled on each
+    retry) when upstream answers 429. A category that fails keeps its
+    members from the previous load; one that never loaded is kept as a
+    single row without a coin_id, and until CRYPTO_CATEGORY_MEMBERS_TIMEOUT
+    has passed only those are fetched again.
+
+    Raises:
+        RuntimeError: When every category failed.
+    """
+    global _members_loaded_at
+    category_ids = categories_snapshot.get().column_values("category_id")
+    previous, pending = {}, set()
+    if category_members_snapshot.rows is not None:
+        for category_id, coin_id in member_pairs(category_members_snapshot.rows):
+            if coin_id is None:
+                pending.add(category_id)
+            else:
+                previous.setdefault(category_id, []).append(coin_id)
+    retry = bool(pending) and (
+        time.monotonic() - _members_loaded_at < settings.CRYPTO_CATEGORY_MEMBERS_TIMEOUT
+    )
+    if retry:
+        to_fetch = [
+            category_id for category_id in category_ids if category_id in pending
+        ]
+    else:
+        to_fetch = category_ids
+    pacer = _Pacer(settings.CRYPTO_CATEGORY_FETCH_INTERVAL)
+
+    def fetch(category_id):
+        for attempt in range(settings.CRYPTO_CATEGORY_FETCH_ATTEMPTS):
+            try:
+                rows = fetch_market_pages(
+                    category=category_id,
+                    pages=settings.CRYPTO_CATEGORY_MEMBER_PAGES,
+                    pacer=pacer,
+                )
+            except RuntimeError as e:
+                error = e
+                if getattr(e, "status_code", None) != 429:
+                    break
+                pacer.back_off(settings.CRYPTO_CATEGORY_BACKOFF * 2**attempt)
+                continue
+            return [row["id"] for row in rows]
+        logging.error("Fetching category %s failed: %s", category_id, error)
+        return None
+
+    with ThreadPoolExecutor(
+        max_workers=settings.CRYPTO_CATEGORY_FETCH_WORKERS,
+        thread_name_prefix="category-members",
+    ) as executor:
+        fetched = dict(zip(to_fetch, executor.map(fetch, to_fetch)))
+    if fetched and all(coin_ids is None for coin_ids in fetched.values()):
+        raise RuntimeError("Fetching the members of every category failed.")
+    if not retry:
+        _members_loaded_at = time.monotonic()
+    members = []
+    for category_id in category_ids:
+        coin_ids = fetched.get(category_id)
+        if coin_ids is None:
+            coin_ids = previous.get(category_id)
+        if coin_ids is None:
+            members.append({"category_id": category_id})
+            continue
+        members.extend(
+            {"category_id": category_id, "coin_id": coin_id} for coin_id in coin_ids
+        )
+    return ColumnStore.from_rows(members)
+
+
+markets_snapshot = Snapshot(
+    "markets", lambda: ColumnStore.from_rows(fetch_market_pages(), key="id")
+)
+exchange_rates_snapshot = Snapshot(
+    "exchange_rates",
+    lambda: ColumnStore.from_rows(
+        [
+            {"currency": currency, **rate}
+            for currency, rate in CRYPTOAPI.get_exchange_rates()["rates"].items()
+        ],
+        key="currency",
+    ),
+    timeout=settings.CRYPTO_EXCHANGE_RATE_INTERVAL,
+)
+category_members_snapshot = Snapshot(
+    "category_members",
+    fetch_category_members,
+    timeout=settings.CRYPTO_CATEGORY_MEMBERS_TIMEOUT,
+    incomplete=_has_pending_categories,
+)
+
+SNAPSHOTS = [
+    coins_snapshot,
+    categories_snapshot,
+    markets_snapshot,
+    exchange_rates_snapshot,
+    category_members_snapshot,
+]
+
+
+def start_refreshers(lazy=False):
+    """
+    Keeps the exchange rate table refreshed in the background, so
+    conversions never wait on upstream. Threads do not survive a fork, so
+    each process starts its own on its first read; unless `lazy`, this
+    process starts it right away.
+    """
+    exchange_rates_snapshot.keep_fresh(settings.CRYPTO_EXCHANGE_RATE_INTERVAL)
+    if not lazy:
+        exchange_rates_snapshot.refresh_in_background(
+            settings.CRYPTO_EXCHANGE_RATE_INTERVAL
+        )
+
+
+def warm_snapshots(snapshots=None):
+    """
+    Loads the coin list, categories, first market pages and exchange rates
+    (or the given `snapshots`) so a process starts serving with warm data.
+    Failures are logged and left for the first request to retry.
+
+    Returns:
+        list: Names of the snapshots that loaded.
+    """
+    if snapshots is None:
+        snapshots = [
+            coins_snapshot,
+            categories_snapshot,
+            markets_snapshot,
+            exchange_rates_snapshot,
+        ]
+    loaded = []
+    for snapshot in snapshots:
+        try:
+            snapshot.get()
+        except RuntimeError as e:
+            logging.error("Warming up the %s snapshot failed: %s", snapshot.name, e)
+            continue
+        loaded.append(snapshot.name)
+    return loaded
+
+
+def refresh_shared_snapshot(directory, keep=2):
+    """
+    Fetches every snapshot from upstream once and publishes them to the
+    workers as the next version of the shared snapshot file. A snapshot
+    that fails to load is left out, and workers fetch it themselves until
+    a later refresh publishes it.
+
+    Args:
+        directory (str): The shared snapshot directory.
+        keep (int): Number of snapshot files to keep on disk.
+
+    Returns:
+        int: The version written.
+
+    Raises:
+        RuntimeError: When no snapshot could be loaded.
+    """
+    stores = {}
+    for snapshot in SNAPSHOTS:
+        try:
+            # Snapshots with their own timeout (exchange rates, category
+            # members) are only fetched again once that timeout has passed.
+            stores[snapshot.name] = snapshot.refresh(force=snapshot.timeout is None)
+        except Exception as e:
+            logging.error("Refreshing the %s snapshot failed: %s", snapshot.name, e)
+    if not stores:
+        raise RuntimeError("No snapshot could be loaded from upstream.")
+    version = next_version(current_version(directory) or 0)
+    write_snapshot(directory, stores, version)
+    prune_snapshots(directory, keep)
+    return version
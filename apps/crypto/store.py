@@ -0,0 +1,423 @@
+import sys
+from hashlib import blake2b
+import numpy as np
+
+# Values that fit in an int64 column without losing precision.
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+# Integers a float64 holds exactly.
+_FLOAT_INT_MAX = 2**53
+
+
+class NumberColumn:
+    """
+    Numbers as one int64 or float64 array. Missing values are tracked in a
+    boolean mask that only exists when the column has any. A float64 column
+    mixing ints and floats marks the rows that were ints in `integral`, so
+    they come back as ints.
+    """
+
+    def __init__(self, values, mask=None, integral=None):
+        self.values = values
+        self.mask = mask
+        self.integral = integral
+
+    @classmethod
+    def from_values(cls, values):
+        """
+        Returns the column for `values`, or None when they mix floats with
+        ints too large for a float64 to hold exactly.
+        """
+        missing = [value is None for value in values]
+        present = [value for value in values if value is not None]
+        ints = [isinstance(value, int) for value in values]
+        if all(
+            isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX
+            for value in present
+        ):
+            dtype, integral = np.int64, None
+        elif all(
+            abs(value) <= _FLOAT_INT_MAX for value in present if isinstance(value, int)
+        ):
+            dtype = np.float64
+            integral = np.array(ints, dtype=bool) if any(ints) else None
+        else:
+            return None
+        array = np.array([0 if value is None else value for value in values], dtype)
+        mask = np.array(missing, dtype=bool) if any(missing) else None
+        return cls(array, mask, integral)
+
+    def __len__(self):
+        return len(self.values)
+
+    def take(self, indices):
+        mask = None if self.mask is None else self.mask[indices]
+        integral = None if self.integral is None else self.integral[indices]
+        return NumberColumn(self.values[indices], mask, integral)
+
+    def to_list(self, indices):
+        values = self.values[indices].tolist()
+        if self.integral is not None:
+            for position in np.flatnonzero(self.integral[indices]).tolist():
+                values[position] = int(values[position])
+        if self.mask is not None:
+            for position in np.flatnonzero(self.mask[indices]).tolist():
+                values[position] = None
+        return values
+
+
+class StringColumn:
+    """
+    Strings stored back to back in one UTF-8 buffer with an offsets array,
+    instead of one Python object per value.
+    """
+
+    def __init__(self, buffer, offsets, mask=None):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.mask = mask
+
+    @classmethod
+    def from_values(cls, values):
+        encoded = [(value or "").encode() for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        missing = [value is None for value in values]
+        mask = np.array(missing, dtype=bool) if any(missing) else None
+        return cls(b"".join(encoded), offsets, mask)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def take(self, indices):
+        return StringColumn.from_values(self.to_list(indices))
+
+    def to_list(self, indices):
+        buffer, offsets = self.buffer, self.offsets
+        if isinstance(indices, slice):
+            starts = offsets[indices.start : indices.stop].tolist()
+            ends = offsets[indices.start + 1 : indices.stop + 1].tolist()
+        else:
+            starts = offsets[indices].tolist()
+            ends = offsets[indices + 1].tolist()
+        values = [str(buffer[start:end], "utf-8") for start, end in zip(starts, ends)]
+        if self.mask is not None:
+            for position in np.flatnonzero(self.mask[indices]).tolist():
+                values[position] = None
+        return values
+
+
+class CategoryColumn:
+    """
+    Low-cardinality strings stored once each (interned) plus an int32 code
+    per row; -1 marks a missing value.
+    """
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values):
+        lookup = {}
+        codes = np.array(
+            [
+                -1 if value is None else lookup.setdefault(value, len(lookup))
+                for value in values
+            ],
+            dtype=np.int32,
+        )
+        return cls(codes, [sys.intern(value) for value in lookup])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, indices):
+        return CategoryColumn(self.codes[indices], self.categories)
+
+    def to_list(self, indices):
+        categories = self.categories
+        return [
+            None if code < 0 else categories[code]
+            for code in self.codes[indices].tolist()
+        ]
+
+
+class ObjectColumn:
+    """
+    Fallback for values with no compact layout (booleans, nested objects).
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def take(self, indices):
+        return ObjectColumn(self.to_list(indices))
+
+    def to_list(self, indices):
+        if isinstance(indices, slice):
+            return self.values[indices]
+        values = self.values
+        return [values[i] for i in indices.tolist()]
+
+
+def build_column(values):
+    """
+    Picks the most compact column type that round-trips `values`.
+    """
+    present = [value for value in values if value is not None]
+    if all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in present
+    ):
+        column = NumberColumn.from_values(values)
+        if column is not None:
+            return column
+        return ObjectColumn(list(values))
+    if all(isinstance(value, str) for value in present):
+        if len(set(present)) * 2 <= len(present):
+            return CategoryColumn.from_values(values)
+        return StringColumn.from_values(values)
+    return ObjectColumn(list(values))
+
+
+def factorize(values):
+    """
+    Returns the distinct `values` in order of first appearance and the
+    position of every value in that list, as an int64 array.
+    """
+    codes = {}
+    inverse = np.fromiter(
+        (codes.setdefault(value, len(codes)) for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    return list(codes), inverse
+
+
+def key_hash(value):
+    """
+    Stable 64-bit hash of a key, identical in every process.
+    """
+    digest = blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class KeyIndex:
+    """
+    Key to row number index: the sorted 64-bit hashes of the keys with the
+    row each one came from. Costs 16 bytes per row instead of a dict entry
+    plus a string object, and a lookup is one binary search.
+    """
+
+    def __init__(self, hashes, rows):
+        self.hashes = hashes
+        self.rows = rows
+
+    @classmethod
+    def from_values(cls, values):
+        hashes = np.array(
+            [0 if value is None else key_hash(value) for value in values],
+            dtype=np.int64,
+        )
+        rows = np.argsort(hashes, kind="stable")
+        return cls(hashes[rows], rows)
+
+    def find(self, column, value):
+        """
+        Returns the row of `value` in the key `column`, or None.
+        """
+        if value is None:
+            return None
+        target = key_hash(value)
+        hashes, rows = self.hashes, self.rows
+        position = int(np.searchsorted(hashes, target))
+        while position < len(hashes) and hashes[position] == target:
+            row = int(rows[position])
+            if column.to_list(slice(row, row + 1))[0] == value:
+                return row
+            position += 1
+        return None
+
+    def find_many(self, column, values):
+        """
+        Vectorized `find`: returns an int64 array with the row of every
+        value, -1 for values that are not in the key `column`.
+        """
+        if not len(self.hashes) or not len(values):
+            return np.full(len(values), -1, dtype=np.int64)
+        targets = np.array(
+            [0 if value is None else key_hash(value) for value in values],
+            dtype=np.int64,
+        )
+        positions = np.minimum(
+            np.searchsorted(self.hashes, targets), len(self.hashes) - 1
+        )
+        found = self.hashes[positions] == targets
+        rows = np.where(found, self.rows[positions], -1)
+        # Equal hashes are confirmed against the key itself; the rare
+        # collision falls back to the scalar lookup.
+        candidates = np.flatnonzero(found)
+        for position, key in zip(candidates.tolist(), column.to_list(rows[candidates])):
+            if key != values[position]:
+                row = self.find(column, values[position])
+                rows[position] = -1 if row is None else row
+        return rows
+
+
+class ColumnStore:
+    """
+    Read-only columnar table of upstream rows.
+
+    Behaves like a sequence of dicts so it can be handed to the paginators:
+    indexing or slicing materializes only the rows asked for. Rows can be
+    looked up by their `key` column through a `KeyIndex`. `absent` holds,
+    for the columns some rows do not have, a boolean mask of those rows, so
+    rows come back with exactly the keys upstream sent.
+    """
+
+    def __init__(
+        self, columns, key="id", key_column=None, index=None, length=None, absent=None
+    ):
+        self.columns = columns
+        self.key = key
+        self.key_column = key_column if key_column is not None else columns.get(key)
+        self._index = index
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        self.length = length
+        self.absent = absent or {}
+
+    @classmethod
+    def from_rows(cls, rows, key="id"):
+        names = {}
+        for row in rows:
+            for name in row:
+                names.setdefault(name, None)
+        columns, absent = {}, {}
+        for name in names:
+            columns[name] = build_column([row.get(name) for row in rows])
+            missing = np.array([name not in row for row in rows], dtype=bool)
+            if missing.any():
+                absent[name] = missing
+        return cls(columns, key, absent=absent)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step == 1:
+                return self.rows(slice(start, max(start, stop)))
+            return self.rows(np.arange(start, stop, step))
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("ColumnStore index out of range")
+        return self.rows(slice(item, item + 1))[0]
+
+    def __iter__(self):
+        return iter(self.rows(slice(0, len(self))))
+
+    @property
+    def index(self):
+        """
+        The key index, built on first use.
+        """
+        if self._index is None:
+            column = self.key_column
+            keys = [] if column is None else column.to_list(slice(0, len(column)))
+            self._index = KeyIndex.from_values(keys)
+        return self._index
+
+    def column_values(self, name):
+        column = self.columns[name]
+        return column.to_list(slice(0, len(column)))
+
+    def numbers(self, name):
+        """
+        Returns column `name` as a float64 array with NaN for missing values,
+        or all NaN when the column is absent or not numeric.
+        """
+        column = self.columns.get(name)
+        if not isinstance(column, NumberColumn):
+            return np.full(self.length, np.nan)
+        values = column.values.astype(np.float64)
+        if column.mask is not None:
+            values[column.mask] = np.nan
+        return values
+
+    def rows(self, indices):
+        """
+        Materializes the rows at `indices` (a slice or an array of row
+        numbers) as dicts, one column at a time.
+        """
+        names = list(self.columns)
+        if not names:
+            return [{} for _ in range(len(range(self.length)[indices]))]
+        values = [self.columns[name].to_list(indices) for name in names]
+        rows = [dict(zip(names, row)) for row in zip(*values)]
+        for name, missing in self.absent.items():
+            if name in self.columns:
+                for position in np.flatnonzero(missing[indices]).tolist():
+                    del rows[position][name]
+        return rows
+
+    def row_of(self, key_value):
+        if self.key_column is None:
+            return None
+        return self.index.find(self.key_column, key_value)
+
+    def rows_of(self, key_values):
+        """
+        Returns the row numbers of `key_values` as an int64 array, with -1
+        for keys that are not in the store.
+        """
+        if self.key_column is None:
+            return np.full(len(key_values), -1, dtype=np.int64)
+        return self.index.find_many(self.key_column, key_values)
+
+    def get(self, key_value):
+        row = self.row_of(key_value)
+        return None if row is None else self.rows(slice(row, row + 1))[0]
+
+    def lookup(self, key_values):
+        """
+        Returns the rows for `key_values` that exist, in the order given.
+        """
+        rows = self.rows_of(list(key_values))
+        return self.rows(rows[rows >= 0])
+
+    def take(self, indices):
+        """
+        Returns a new store holding only the rows at `indices`.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        columns = {name: column.take(indices) for name, column in self.columns.items()}
+        key_column = None if self.key_column is None else self.key_column.take(indices)
+        absent = {name: missing[indices] for name, missing in self.absent.items()}
+        return ColumnStore(
+            columns, self.key, key_column, length=len(indices), absent=absent
+        )
+
+    def select(self, fields=None, exclude=None):
+        """
+        Returns a store sharing this store's columns and key index,
+        restricted to `fields` and without `exclude`, so pages only
+        materialize the requested keys.
+        """
+        names = [
+            name
+            for name in self.columns
+            if (fields is None or name in fields)
+            and (exclude is None or name not in exclude)
+        ]
+        if len(names) == len(self.columns):
+            return self
+        columns = {name: self.columns[name] for name in names}
+        return ColumnStore(
+            columns, self.key, self.key_column, self.index, self.length, self.absent
+        )
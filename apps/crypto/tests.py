@@ -1,7 +1,72 @@
+import io
+import json
+import logging
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import threading
+import requests
+import numpy as np
+from datetime import timedelta
+from unittest.mock import patch
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, override_settings
+from django.http import HttpResponse
+from django.utils import timezone
+from django.contrib.auth.models import Group
+from apps.account.authentication import issue_token, rotate_token
+from apps.account.utils import _group_names
+from apps.crypto.snapshots import (
+    Snapshot,
+    coins_snapshot,
+    categories_snapshot,
+    markets_snapshot,
+    exchange_rates_snapshot,
+    category_members_snapshot,
+    next_version,
+    refresh_shared_snapshot,
+    version_time,
+)
+from apps.crypto.analytics import market_analytics
+from apps.crypto.currency import convert_store
+from apps.crypto.deltas import DeltaLog, diff_stores, merge_diffs
+from apps.crypto.shared_snapshot import (
+    current_version,
+    open_snapshot,
+    prune_snapshots,
+    write_snapshot,
+)
+from apps.crypto.store import ColumnStore
+from apps.crypto.history import HistoryStore, downsample
+from apps.crypto.search_index import CoinSearchIndex
+from apps.crypto.upstream import MirrorPool
+from apps.crypto.api import schema
+from apps.crypto.handlers import LeanWSGIHandler, PathDispatcher
+from apps.crypto.management.commands.serve import Command as ServeCommand
+from apps.crypto.alerts import AlertEngine, AlertIndex
+from apps.crypto.models import Holding, PriceAlert
+from apps.crypto.portfolio import bulk_valuation, portfolio_valuation
+from apps.crypto.category_index import CategoryIndex, category_index
+from apps.crypto.tracing import CLIENT, FileExporter, span, trace_request
+from apps.crypto.logs import BackgroundHandler, JSONFormatter, RateLimitFilter
+from apps.crypto.snapshots import fetch_category_members
+from apps.crypto.coingeko_api import UpstreamStatusError
+from django.core.handlers.wsgi import WSGIHandler
+from apps.crypto.middleware.admission import (
+    HIGH,
+    NORMAL,
+    AdmissionControlMiddleware,
+    AdmissionGate,
+)
 
 
 class CryptoAPITestCase(APITestCase):
@@ -42,3 +107,1565 @@ class CryptoAPITestCase(APITestCase):
     def test_coin_market_view(self):
         response = self.client.get(reverse("coin_market_v1"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CoinFieldsetTestCase(APITestCase):
+
+    markets = [
+        {
+            "id": "bitcoin",
+            "symbol": "btc",
+            "name": "Bitcoin",
+            "current_price": 45000.0,
+            "market_cap": 850000000000,
+            "total_volume": 35000000000,
+        },
+    ]
+
+    def setUp(self):
+        cache.clear()
+        markets_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="fields@gmail.com", username="Fieldsuser", password="Testing@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_coin_market_fields(self, fetch_market_data):
+        fetch_market_data.return_value = self.markets
+        response = self.client.get(
+            reverse("coin_market_v1"), {"fields": "id,current_price,unknown"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["data"], [{"current_price": 45000.0, "id": "bitcoin"}]
+        )
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_coin_market_exclude_is_cached_per_projection(self, fetch_market_data):
+        fetch_market_data.return_value = self.markets
+        url = reverse("coin_market_v1")
+        self.client.get(url, {"exclude": "total_volume"})
+        response = self.client.get(url, {"exclude": "total_volume"})
+        self.assertNotIn("total_volume", response.data["data"][0])
+        self.assertEqual(fetch_market_data.call_count, 1)
+        response = self.client.get(url)
+        self.assertIn("total_volume", response.data["data"][0])
+        markets_snapshot.clear()
+        self.client.get(url, {"fields": "id"})
+        self.assertEqual(fetch_market_data.call_count, 2)
+
+
+class CoinSearchIndexTestCase(APITestCase):
+
+    coins = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+        {"id": "bitcoin-cash", "symbol": "bch", "name": "Bitcoin Cash"},
+        {"id": "wrapped-bitcoin", "symbol": "wbtc", "name": "Wrapped Bitcoin"},
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    ]
+
+    def setUp(self):
+        coins_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="search@gmail.com", username="Searchuser", password="Testing@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_prefix_search_ranks_exact_symbol_first(self):
+        index = CoinSearchIndex()
+        index.update(None, ColumnStore.from_rows(self.coins), 1)
+        self.assertEqual(
+            [coin["id"] for coin in index.search("BIT")], ["bitcoin", "bitcoin-cash"]
+        )
+        self.assertEqual(index.search("btc")[0]["id"], "bitcoin")
+        self.assertEqual(index.get("ethereum")["name"], "Ethereum")
+
+    def test_incremental_update(self):
+        index = CoinSearchIndex()
+        index.rebuild_ratio = 1
+        index.update(None, ColumnStore.from_rows(self.coins), 1)
+        coins = self.coins[1:] + [{"id": "solana", "symbol": "sol", "name": "Solana"}]
+        index.update(ColumnStore.from_rows(self.coins), ColumnStore.from_rows(coins), 2)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(
+            [coin["id"] for coin in index.search("bitcoin")], ["bitcoin-cash"]
+        )
+        self.assertEqual(index.search("sol")[0]["id"], "solana")
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_coin_search_view(self, get_coins):
+        get_coins.return_value = self.coins
+        response = self.client.get(
+            reverse("coin_search_v1"), {"q": "eth", "fields": "id"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], [{"id": "ethereum"}])
+
+
+class ColumnStoreTestCase(APITestCase):
+
+    rows = [
+        {"id": "bitcoin", "symbol": "btc", "market_cap": 850000000000, "roi": None},
+        {"id": "ethereum", "symbol": "eth", "market_cap": None, "roi": {"x": 1}},
+        {"id": "tether", "symbol": "usdt", "market_cap": 12.5, "roi": None},
+    ]
+
+    def test_round_trip(self):
+        store = ColumnStore.from_rows(self.rows)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store), self.rows)
+        self.assertEqual(store[1:], self.rows[1:])
+        self.assertEqual(store[-1], self.rows[-1])
+
+    def test_lookup_select_and_take(self):
+        store = ColumnStore.from_rows(self.rows)
+        self.assertEqual(store.get("tether")["symbol"], "usdt")
+        self.assertIsNone(store.get("solana"))
+        self.assertEqual(
+            store.select(fields=("id",)).lookup(["tether", "bitcoin"]),
+            [{"id": "tether"}, {"id": "bitcoin"}],
+        )
+        self.assertEqual(list(store.take([2])), [self.rows[2]])
+
+    def test_keeps_int_types_and_absent_keys(self):
+        rows = [
+            {"id": "bitcoin", "market_cap": 850000000000, "supply": 2**60 + 1},
+            {"id": "ethereum", "market_cap": 12.5, "supply": 0.5},
+            {"id": "tether"},
+        ]
+        store = ColumnStore.from_rows(rows)
+        self.assertEqual(list(store), rows)
+        self.assertEqual(list(store.take([2, 0])), [rows[2], rows[0]])
+        self.assertEqual(type(store[0]["market_cap"]), int)
+        self.assertEqual(type(store[1]["market_cap"]), float)
+        self.assertEqual(store[0]["supply"], 2**60 + 1)
+        path = write_snapshot(tempfile.mkdtemp(), {"markets": store}, 1)
+        self.assertEqual(list(open_snapshot(path)[1]["markets"]), rows)
+
+
+class SharedSnapshotTestCase(APITestCase):
+
+    rows = ColumnStoreTestCase.rows
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_write_and_map(self):
+        path = write_snapshot(
+            self.directory, {"markets": ColumnStore.from_rows(self.rows)}, 7
+        )
+        version, stores = open_snapshot(path)
+        self.assertEqual(version, 7)
+        self.assertEqual(list(stores["markets"]), self.rows)
+        self.assertEqual(stores["markets"].get("tether")["market_cap"], 12.5)
+        values = stores["markets"].columns["market_cap"].values
+        self.assertIsInstance(values.base.obj, mmap.mmap)
+
+    def test_workers_follow_new_versions(self):
+        def loader():
+            raise RuntimeError("Workers must not call upstream.")
+
+        snapshot = Snapshot("markets", loader)
+        with override_settings(
+            CRYPTO_SNAPSHOT_DIR=self.directory, CRYPTO_SNAPSHOT_CHECK_INTERVAL=0
+        ):
+            first = next_version()
+            write_snapshot(
+                self.directory, {"markets": ColumnStore.from_rows(self.rows)}, first
+            )
+            self.assertEqual(len(snapshot.get()), 3)
+            second = next_version(first)
+            write_snapshot(
+                self.directory,
+                {"markets": ColumnStore.from_rows(self.rows[:1])},
+                second,
+            )
+            prune_snapshots(self.directory, keep=1)
+            self.assertEqual(len(snapshot.get()), 1)
+            self.assertEqual(snapshot.version, second)
+
+    def test_abandoned_shared_snapshot_falls_back_to_upstream(self):
+        snapshot = Snapshot("markets", lambda: ColumnStore.from_rows(self.rows[:2]))
+        with override_settings(
+            CRYPTO_SNAPSHOT_DIR=self.directory, CRYPTO_SNAPSHOT_CHECK_INTERVAL=0
+        ):
+            abandoned = next_version() - 3600 * 1000 * 1000
+            write_snapshot(
+                self.directory, {"markets": ColumnStore.from_rows(self.rows)}, abandoned
+            )
+            self.assertEqual(len(snapshot.get()), 2)
+            local = snapshot.version
+            self.assertGreater(local, abandoned)
+            write_snapshot(
+                self.directory,
+                {"markets": ColumnStore.from_rows(self.rows[:1])},
+                next_version(local),
+            )
+            self.assertEqual(len(snapshot.get()), 1)
+            self.assertGreater(snapshot.version, local)
+
+    def test_forked_workers_start_their_own_refresher(self):
+        snapshot = Snapshot("rates", lambda: ColumnStore.from_rows(self.rows))
+        snapshot.keep_fresh(3600)
+        self.assertIsNone(snapshot._refresher)
+        snapshot.get()
+        self.assertIsNotNone(snapshot._refresher)
+        # What a forked worker inherits from a preloading master.
+        snapshot._reset_after_fork()
+        snapshot.get()
+        self.assertIsNotNone(snapshot._refresher)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_refresh_publishes_the_snapshots_that_loaded(
+        self, get_coins, get_categories, fetch_market_data, get_rates
+    ):
+        for snapshot in (
+            coins_snapshot,
+            categories_snapshot,
+            markets_snapshot,
+            exchange_rates_snapshot,
+            category_members_snapshot,
+        ):
+            snapshot.clear()
+        get_coins.return_value = CoinSearchIndexTestCase.coins
+        get_categories.side_effect = RuntimeError("Failed to fetch data.")
+        fetch_market_data.return_value = self.rows
+        get_rates.return_value = CurrencyConversionTestCase.rates
+        with self.assertLogs(level="ERROR"):
+            version = refresh_shared_snapshot(self.directory)
+        self.assertEqual(current_version(self.directory), version)
+        path = os.path.join(self.directory, f"snapshot-{version}.bin")
+        stores = open_snapshot(path)[1]
+        self.assertEqual(set(stores), {"coins", "markets", "exchange_rates"})
+        categories_snapshot.clear()
+        category_members_snapshot.clear()
+
+
+class CurrencyConversionTestCase(APITestCase):
+
+    rates = {
+        "rates": {
+            "btc": {"name": "Bitcoin", "unit": "BTC", "value": 1, "type": "crypto"},
+            "cad": {"name": "Canadian Dollar", "unit": "CA$", "value": 140000.0},
+            "usd": {"name": "US Dollar", "unit": "$", "value": 100000.0},
+        }
+    }
+
+    def setUp(self):
+        cache.clear()
+        markets_snapshot.clear()
+        exchange_rates_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="currency@gmail.com", username="Currencyuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_converts_from_base_currency(self, fetch_market_data, get_rates):
+        fetch_market_data.return_value = CoinFieldsetTestCase.markets
+        get_rates.return_value = self.rates
+        url = reverse("coin_market_v1")
+        for vs_currency in ("cad", "usd", "btc"):
+            response = self.client.get(url, {"vs_currency": vs_currency})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        coin = response.data["data"][0]
+        self.assertAlmostEqual(coin["current_price"], 45000.0 / 140000.0)
+        self.assertAlmostEqual(coin["market_cap"], 850000000000 / 140000.0)
+        self.assertEqual(fetch_market_data.call_count, 1)
+        self.assertEqual(fetch_market_data.call_args.kwargs["vs_currency"], "cad")
+        self.assertEqual(get_rates.call_count, 1)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_unsupported_currency(self, fetch_market_data, get_rates):
+        fetch_market_data.return_value = CoinFieldsetTestCase.markets
+        get_rates.return_value = self.rates
+        response = self.client.get(reverse("coin_market_v1"), {"vs_currency": "xyz"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_integer_prices_convert_to_floats(self):
+        store = ColumnStore.from_rows([{"id": "bitcoin", "current_price": 45000}])
+        converted = convert_store(store, 1 / 140000.0)
+        self.assertAlmostEqual(converted[0]["current_price"], 45000 / 140000.0)
+        self.assertEqual(store[0]["current_price"], 45000)
+
+
+class CoinHistoryTestCase(APITestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.user = get_user_model().objects.create_user(
+            email="history@gmail.com", username="Historyuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def snapshot(self, price, last_updated):
+        return ColumnStore.from_rows(
+            [
+                {
+                    "id": "bitcoin",
+                    "current_price": price,
+                    "market_cap": price * 100,
+                    "total_volume": None,
+                    "last_updated": last_updated,
+                }
+            ]
+        )
+
+    def test_record_skips_duplicates_and_partitions_by_day(self):
+        history = HistoryStore(self.directory)
+        self.assertEqual(history.record(self.snapshot(1.0, "2025-01-01T10:00:00Z")), 1)
+        self.assertEqual(history.record(self.snapshot(1.0, "2025-01-01T10:00:00Z")), 0)
+        history.record(self.snapshot(2.0, "2025-01-02T10:00:00Z"))
+        records = history.read("bitcoin", 0, 2e9)
+        self.assertEqual(records[:, 1].tolist(), [1.0, 2.0])
+        self.assertTrue(np.isnan(records[0, 3]))
+        self.assertEqual(len(history.read("bitcoin", 1735725601, 2e9)), 1)
+
+    def test_downsample_keeps_extremes(self):
+        times = np.arange(1000.0)
+        values = np.zeros(1000)
+        values[500] = 10
+        kept_times, kept_values = downsample(times, values, 20)
+        self.assertEqual(len(kept_times), 20)
+        self.assertIn(10, kept_values)
+        self.assertEqual((kept_times[0], kept_times[-1]), (0, 999))
+
+    def test_coin_history_view(self):
+        history = HistoryStore(self.directory)
+        history.record(self.snapshot(1.0, "2025-01-01T10:00:00Z"))
+        with override_settings(CRYPTO_HISTORY_DIR=self.directory):
+            response = self.client.get(
+                reverse("coin_history_v1"),
+                {
+                    "id": "bitcoin",
+                    "metric": "market_cap",
+                    "start": "2025-01-01",
+                    "end": "2025-02-01",
+                },
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["points"], [[1735725600.0, 100.0]])
+
+    def test_coin_history_view_rejects_unbounded_requests(self):
+        url = reverse("coin_history_v1")
+        with override_settings(CRYPTO_HISTORY_DIR=self.directory):
+            for params in (
+                {"end": "-1e20"},
+                {"end": "inf"},
+                {"points": "1"},
+                {"start": "2025-01-01", "points": "0"},
+            ):
+                response = self.client.get(url, {"id": "bitcoin", **params})
+                self.assertEqual(response.status_code, 400, params)
+            HistoryStore(self.directory).record(
+                self.snapshot(1.0, "2025-01-01T10:00:00Z")
+            )
+            with patch("apps.crypto.history.os.path.exists") as exists:
+                response = self.client.get(
+                    url, {"id": "bitcoin", "start": "0", "end": "2e11"}
+                )
+            exists.assert_not_called()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["points"], [])
+
+
+class MarketAnalyticsTestCase(APITestCase):
+
+    markets = [
+        {
+            "id": "bitcoin",
+            "symbol": "btc",
+            "name": "Bitcoin",
+            "current_price": 100,
+            "market_cap": 1000,
+            "total_volume": 50,
+            "price_change_percentage_24h": 2.0,
+        },
+        {
+            "id": "ethereum",
+            "symbol": "eth",
+            "name": "Ethereum",
+            "current_price": 10,
+            "market_cap": 300,
+            "total_volume": 80,
+            "price_change_percentage_24h": -4.0,
+        },
+        {
+            "id": "dogecoin",
+            "symbol": "doge",
+            "name": "Dogecoin",
+            "current_price": 0.1,
+            "market_cap": 100,
+            "total_volume": None,
+            "price_change_percentage_24h": None,
+        },
+    ]
+    members = [
+        {"category_id": "layer-1", "coin_id": "bitcoin"},
+        {"category_id": "layer-1", "coin_id": "ethereum"},
+        {"category_id": "meme-token", "coin_id": "dogecoin"},
+        {"category_id": "meme-token", "coin_id": "unlisted"},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        markets_snapshot.clear()
+        categories_snapshot.clear()
+        category_members_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="analytics@gmail.com", username="Analyticsuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_market_analytics(self):
+        markets = ColumnStore.from_rows(self.markets)
+        members = ColumnStore.from_rows(self.members, key="coin_id")
+        data = market_analytics(markets, members, {"layer-1": "Layer 1"}, limit=2)
+        self.assertEqual(data["market_cap"], 1400)
+        self.assertEqual(data["total_volume"], 130)
+        self.assertEqual(
+            [coin["id"] for coin in data["top_gainers"]], ["bitcoin", "ethereum"]
+        )
+        self.assertEqual(
+            [coin["id"] for coin in data["top_losers"]], ["ethereum", "bitcoin"]
+        )
+        self.assertEqual(
+            [coin["id"] for coin in data["top_volume"]], ["ethereum", "bitcoin"]
+        )
+        layer_1, meme = data["categories"]
+        self.assertEqual((layer_1["name"], layer_1["coins"]), ("Layer 1", 2))
+        self.assertEqual(layer_1["market_cap"], 1300)
+        self.assertAlmostEqual(
+            layer_1["market_cap_change_percentage_24h"], (2000 - 1200) / 1300
+        )
+        self.assertEqual(meme["coins"], 1)
+        self.assertIsNone(meme["market_cap_change_percentage_24h"])
+        self.assertIsNone(market_analytics(markets)["categories"])
+
+    def test_market_analytics_with_no_loaded_categories(self):
+        markets = ColumnStore.from_rows(self.markets)
+        for members, categories in (
+            ([], 0),
+            ([{"category_id": "layer-1"}], 0),
+            (self.members + [{"category_id": "pending"}], 2),
+        ):
+            data = market_analytics(markets, ColumnStore.from_rows(members))
+            self.assertEqual(len(data["categories"]), categories)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_coin_analytics_view(self, fetch_market_data, get_categories):
+        fetch_market_data.return_value = self.markets
+        get_categories.return_value = [{"category_id": "layer-1", "name": "Layer 1"}]
+        category_members_snapshot.publish(
+            ColumnStore.from_rows(self.members, key="coin_id")
+        )
+        response = self.client.get(reverse("coin_analytics_v1"), {"limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data["data"]
+        self.assertEqual(data["top_gainers"][0]["id"], "bitcoin")
+        self.assertEqual(data["categories"][0]["name"], "Layer 1")
+
+        self.client.get(reverse("coin_analytics_v1"), {"limit": 1})
+        self.assertEqual(fetch_market_data.call_count, 1)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    @patch(
+        "apps.crypto.snapshots.CRYPTOAPI.get_coinCategory",
+        return_value=[{"category_id": "layer-1", "name": "Layer 1"}],
+    )
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    def test_coin_analytics_follows_exchange_rates(
+        self, fetch_market_data, get_categories, get_rates
+    ):
+        exchange_rates_snapshot.clear()
+        fetch_market_data.return_value = self.markets
+        get_rates.return_value = CurrencyConversionTestCase.rates
+        url = reverse("coin_analytics_v1")
+        before = self.client.get(url, {"vs_currency": "usd"}).data["data"]
+        exchange_rates_snapshot.publish(
+            ColumnStore.from_rows(
+                [
+                    {"currency": "cad", "value": 140000.0},
+                    {"currency": "usd", "value": 50000.0},
+                ],
+                key="currency",
+            )
+        )
+        after = self.client.get(url, {"vs_currency": "usd"}).data["data"]
+        self.assertAlmostEqual(after["market_cap"] * 2, before["market_cap"])
+        exchange_rates_snapshot.clear()
+
+
+class DeltaSyncTestCase(APITestCase):
+
+    coins = [
+        {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+        {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+        {"id": "tether", "symbol": "usdt", "name": "Tether"},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        coins_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="delta@gmail.com", username="Deltauser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_diff_and_merge(self):
+        previous = ColumnStore.from_rows(self.coins)
+        current = ColumnStore.from_rows(
+            [
+                {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+                {"id": "ethereum", "symbol": "eth", "name": "Ether"},
+                {"id": "solana", "symbol": "sol", "name": "Solana"},
+            ]
+        )
+        diff = diff_stores(previous, current)
+        self.assertEqual(
+            diff, {"added": ["solana"], "changed": ["ethereum"], "removed": ["tether"]}
+        )
+        merged = merge_diffs(
+            [diff, {"added": ["tether"], "changed": [], "removed": ["solana"]}]
+        )
+        self.assertEqual(
+            merged, {"added": [], "changed": ["ethereum", "tether"], "removed": []}
+        )
+
+    def test_ring_falls_back_to_resync(self):
+        log = DeltaLog(size=2)
+        stores = [ColumnStore.from_rows(self.coins[:size]) for size in (1, 2, 3, 3)]
+        for version, store in enumerate(stores, 1):
+            log(stores[version - 2] if version > 1 else None, store, version)
+        self.assertEqual(log.since(2)[1]["added"], ["tether"])
+        self.assertEqual(log.since(4), (4, merge_diffs([])))
+        self.assertEqual(log.since(1), (4, None))
+        self.assertEqual(log.since(5), (4, None))
+
+    def test_versions_differ_between_processes(self):
+        now = 1_750_000_000_000_000_000
+        with patch("apps.crypto.snapshots.time.time_ns", return_value=now):
+            with patch("apps.crypto.snapshots._version_tag", 1):
+                first = next_version()
+            with patch("apps.crypto.snapshots._version_tag", 2):
+                second = next_version()
+        self.assertNotEqual(first, second)
+        self.assertAlmostEqual(version_time(first), now / 1e9, places=2)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_coin_list_since(self, get_coins):
+        get_coins.return_value = self.coins
+        version = self.client.get(reverse("coin_list_v1")).data["version"]
+        get_coins.return_value = self.coins[:2] + [
+            {"id": "solana", "symbol": "sol", "name": "Solana"}
+        ]
+        coins_snapshot.refresh()
+
+        response = self.client.get(
+            reverse("coin_list_v1"), {"since": version, "fields": "symbol"}
+        )
+        data = response.data["data"]
+        self.assertFalse(data["resync"])
+        self.assertEqual(data["version"], coins_snapshot.version)
+        self.assertEqual(data["added"], [{"symbol": "sol"}])
+        self.assertEqual((data["changed"], data["removed"]), ([], ["tether"]))
+
+        response = self.client.get(reverse("coin_list_v1"), {"since": 1})
+        self.assertTrue(response.data["data"]["resync"])
+        response = self.client.get(reverse("coin_list_v1"), {"since": "latest"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_since_stops_at_the_version_read(self):
+        log = DeltaLog()
+        stores = [ColumnStore.from_rows(self.coins[:size]) for size in (1, 2, 3)]
+        for version, store in enumerate(stores, 1):
+            log(stores[version - 2] if version > 1 else None, store, version)
+        self.assertEqual(log.since(1, 2), (2, merge_diffs([diff_stores(*stores[:2])])))
+        self.assertEqual(log.since(1)[1]["added"], ["ethereum", "tether"])
+        self.assertEqual(log.since(1, 4), (4, None))
+
+    def test_market_since_follows_exchange_rates(self):
+        def rates(usd):
+            return ColumnStore.from_rows(
+                [
+                    {"currency": "cad", "value": 140000.0},
+                    {"currency": "usd", "value": usd},
+                ],
+                key="currency",
+            )
+
+        markets_snapshot.publish(
+            ColumnStore.from_rows(CoinFieldsetTestCase.markets, key="id")
+        )
+        exchange_rates_snapshot.publish(rates(100000.0))
+        url = reverse("coin_market_v1")
+        version = self.client.get(url, {"vs_currency": "usd"}).data["version"]
+        unchanged = self.client.get(url, {"vs_currency": "usd", "since": version})
+        self.assertEqual(unchanged.data["data"]["changed"], [])
+
+        exchange_rates_snapshot.publish(rates(50000.0))
+        response = self.client.get(
+            url, {"vs_currency": "usd", "since": version, "fields": "id"}
+        )
+        data = response.data["data"]
+        self.assertFalse(data["resync"])
+        self.assertGreater(data["version"], version)
+        self.assertEqual(
+            data["changed"],
+            [{"id": coin["id"]} for coin in CoinFieldsetTestCase.markets],
+        )
+        markets_snapshot.clear()
+        exchange_rates_snapshot.clear()
+
+
+class FakeResponse:
+
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+
+    def __init__(self, delay=0.0, status_code=200):
+        self.delay = delay
+        self.status_code = status_code
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return FakeResponse({"url": url}, self.status_code)
+
+
+@override_settings(CRYPTO_HEDGE_DELAY=0.05)
+class UpstreamHedgingTestCase(APITestCase):
+
+    def pool(self, *sessions):
+        pool = MirrorPool(
+            [f"https://mirror-{i}/" for i in range(len(sessions))], attempts=2
+        )
+        for mirror, session in zip(pool.mirrors, sessions):
+            mirror.session = session
+        return pool
+
+    def test_backup_request_wins_over_straggler(self):
+        pool = self.pool(FakeSession(delay=1.0), FakeSession())
+        started = time.monotonic()
+        self.assertEqual(pool.get("ping"), {"url": "https://mirror-1/ping"})
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_failure_fails_over_and_is_ranked_last(self):
+        failing, healthy = FakeSession(status_code=503), FakeSession()
+        pool = self.pool(failing, healthy)
+        self.assertEqual(pool.get("ping"), {"url": "https://mirror-1/ping"})
+        self.assertEqual(pool.ranked()[0].base_url, "https://mirror-1/")
+        pool.get("ping")
+        self.assertEqual(failing.calls, 1)
+
+    def test_single_mirror_is_not_hedged(self):
+        slow = FakeSession(delay=0.2)
+        self.assertEqual(self.pool(slow).get("ping"), {"url": "https://mirror-0/ping"})
+        self.assertEqual(slow.calls, 1)
+
+    def test_client_error_is_raised_without_hedging(self):
+        missing, slow = FakeSession(status_code=404), FakeSession(delay=1.0)
+        pool = self.pool(missing, slow)
+        started = time.monotonic()
+        with self.assertRaises(requests.exceptions.HTTPError):
+            pool.get("ping")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(slow.calls, 0)
+
+    def test_routes_to_fastest_mirror(self):
+        slow, fast = FakeSession(delay=0.02), FakeSession()
+        pool = self.pool(slow, fast)
+        pool.mirrors[0].record(0.02)
+        pool.mirrors[1].record(0.001)
+        pool.get("ping")
+        self.assertEqual((slow.calls, fast.calls), (0, 1))
+
+    def test_client_errors_are_raised(self):
+        pool = self.pool(FakeSession(status_code=404))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            pool.get("ping")
+
+
+class AdmissionControlTestCase(APITestCase):
+
+    def setUp(self):
+        # User ids are reused between tests; drop groups cached for others.
+        _group_names.clear()
+
+    def test_gate_sheds_when_queue_is_full(self):
+        gate = AdmissionGate(limit=1, queue_size=0, timeout=1.0)
+        self.assertTrue(gate.try_acquire())
+        self.assertFalse(gate.try_acquire())
+        self.assertFalse(gate.acquire(NORMAL))
+        gate.release()
+        self.assertTrue(gate.acquire(NORMAL))
+
+    def test_gate_bounds_high_priority_waiters(self):
+        gate = AdmissionGate(limit=1, queue_size=1, timeout=0.5)
+        gate.try_acquire()
+        waiters = [
+            threading.Thread(target=gate.acquire, args=(HIGH,)) for _ in range(2)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        time.sleep(0.05)
+        self.assertFalse(gate.acquire(NORMAL))
+        self.assertFalse(gate.acquire(HIGH))
+        for waiter in waiters:
+            waiter.join()
+
+    def test_gate_admits_high_priority_first(self):
+        gate = AdmissionGate(limit=1, queue_size=10, timeout=2.0)
+        gate.try_acquire()
+        admitted = []
+
+        def wait(priority):
+            if gate.acquire(priority):
+                admitted.append(priority)
+
+        threads = [threading.Thread(target=wait, args=(NORMAL,))]
+        threads[0].start()
+        time.sleep(0.05)
+        threads.append(threading.Thread(target=wait, args=(HIGH,)))
+        threads[1].start()
+        time.sleep(0.05)
+        gate.release()
+        time.sleep(0.05)
+        gate.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(admitted, [HIGH, NORMAL])
+
+    @override_settings(
+        CRYPTO_ADMISSION_LIMITS={"coin_list_v1": 1},
+        CRYPTO_ADMISSION_QUEUE_TIMEOUT=0.01,
+        CRYPTO_ADMISSION_RETRY_AFTER=3,
+    )
+    def test_middleware_rejects_with_retry_after(self):
+        middleware = AdmissionControlMiddleware(lambda request: HttpResponse())
+        request = RequestFactory().get(reverse("coin_list_v1"))
+        middleware.gate(request).try_acquire()
+        response = middleware(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+        health = RequestFactory().get(reverse("health_check_v1"))
+        self.assertEqual(middleware(health).status_code, 200)
+
+    @override_settings(CRYPTO_PREMIUM_GROUP="premium")
+    def test_premium_tokens_get_priority(self):
+        user = get_user_model().objects.create_user(
+            email="premium@gmail.com", username="Premiumuser", password="Test@1234"
+        )
+        user.groups.add(Group.objects.create(name="premium"))
+        token = issue_token(user)
+        request = RequestFactory().get(
+            reverse("coin_list_v1"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        self.assertEqual(AdmissionControlMiddleware.priority(request), HIGH)
+        anonymous = RequestFactory().get(reverse("coin_list_v1"))
+        self.assertEqual(AdmissionControlMiddleware.priority(anonymous), NORMAL)
+        forged = RequestFactory().get(
+            reverse("coin_list_v1"), HTTP_AUTHORIZATION="Token ' OR 1=1"
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(AdmissionControlMiddleware.priority(forged), NORMAL)
+
+    @override_settings(CRYPTO_PREMIUM_GROUP="premium")
+    def test_expired_premium_tokens_get_no_priority(self):
+        user = get_user_model().objects.create_user(
+            email="expired@gmail.com", username="Expireduser", password="Test@1234"
+        )
+        user.groups.add(Group.objects.create(name="premium"))
+        token = issue_token(user)
+        token.expires_at = timezone.now() - timedelta(seconds=1)
+        token.save()
+        request = RequestFactory().get(
+            reverse("coin_list_v1"), HTTP_AUTHORIZATION=f"Token {token.key}"
+        )
+        self.assertEqual(AdmissionControlMiddleware.priority(request), NORMAL)
+
+    @override_settings(CRYPTO_PREMIUM_GROUP="premium")
+    def test_premium_priority_ends_with_the_token(self):
+        user = get_user_model().objects.create_user(
+            email="rotated@gmail.com", username="Rotateduser", password="Test@1234"
+        )
+        user.groups.add(Group.objects.create(name="premium"))
+        token = issue_token(user)
+
+        def priority(key):
+            request = RequestFactory().get(
+                reverse("coin_list_v1"), HTTP_AUTHORIZATION=f"Token {key}"
+            )
+            return AdmissionControlMiddleware.priority(request)
+
+        old_key = token.key
+        self.assertEqual(priority(old_key), HIGH)
+        later = token.expires_at + timedelta(seconds=1)
+        with patch("apps.account.utils.timezone.now", return_value=later):
+            self.assertEqual(priority(old_key), NORMAL)
+        rotate_token(token)
+        self.assertEqual(priority(old_key), NORMAL)
+        self.assertEqual(priority(token.key), HIGH)
+
+
+class PrecomputedSchemaTestCase(APITestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        schema._schemas.clear()
+
+    def tearDown(self):
+        schema._schemas.clear()
+
+    def test_serves_built_schema(self):
+        call_command("build_schema", directory=self.directory, stdout=io.StringIO())
+        with override_settings(API_SCHEMA_DIR=self.directory):
+            response = self.client.get(reverse("schema"), {"format": "json"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with open(os.path.join(self.directory, "openapi.json"), "rb") as handle:
+                self.assertEqual(response.content, handle.read())
+            self.assertIn("/api/v1/coin-list", response.json()["paths"])
+            response = self.client.get(reverse("schema"))
+            self.assertEqual(response["Content-Type"], "application/vnd.oai.openapi")
+
+    def test_generates_schema_until_built(self):
+        with override_settings(API_SCHEMA_DIR=self.directory):
+            response = self.client.get(reverse("schema"), {"format": "json"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(schema.load_schema("json"))
+
+    def test_lean_workers_do_not_import_drf_spectacular(self):
+        script = (
+            "import sys, django; django.setup();"
+            "from django.urls import resolve; resolve('/api/v1/coin-list');"
+            "import apps.account.api.v1.views;"
+            "print('drf_spectacular' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "API_DOCS": "0", "DEV_APPS": "0"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(output.stdout.strip(), "False")
+
+
+class LeanPipelineTestCase(APITestCase):
+
+    def call(self, application, path):
+        statuses = []
+        environ = RequestFactory().get(path).environ
+        response = application(
+            dict(environ), lambda status, headers: statuses.append(dict(headers))
+        )
+        response.close()
+        return statuses[0]
+
+    def test_api_requests_skip_the_admin_middleware(self):
+        path = reverse("coin_search_v1")
+        self.assertIn("X-Frame-Options", self.call(WSGIHandler(), path))
+        dispatcher = PathDispatcher(WSGIHandler(), LeanWSGIHandler(), ["/api/v1/"])
+        self.assertNotIn("X-Frame-Options", self.call(dispatcher, path))
+        self.assertIn("X-Frame-Options", self.call(dispatcher, "/admin/login/"))
+
+
+class ServeCommandTestCase(APITestCase):
+
+    def setUp(self):
+        for snapshot in (
+            coins_snapshot,
+            categories_snapshot,
+            markets_snapshot,
+            exchange_rates_snapshot,
+        ):
+            snapshot.clear()
+
+    # Keeps django.setup() from swapping assertLogs' handler for LOGGING's.
+    @override_settings(LOGGING_CONFIG=None)
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_warms_snapshots_before_forking(
+        self, get_coins, get_categories, fetch_market_data, get_rates
+    ):
+        get_coins.return_value = CoinSearchIndexTestCase.coins
+        get_categories.side_effect = RuntimeError("Failed to fetch data.")
+        fetch_market_data.return_value = CoinFieldsetTestCase.markets
+        get_rates.return_value = CurrencyConversionTestCase.rates
+        stdout = io.StringIO()
+        with self.assertLogs(level="ERROR"):
+            application = ServeCommand(stdout=stdout).load_application()
+        self.assertIsInstance(application, PathDispatcher)
+        self.assertEqual(
+            stdout.getvalue().strip(), "Warmed up: coins, markets, exchange_rates"
+        )
+        self.assertIsNotNone(coins_snapshot.rows)
+        self.assertIsNone(categories_snapshot.rows)
+
+        coins_snapshot.get()
+        markets_snapshot.get()
+        self.assertEqual(get_coins.call_count, 1)
+        self.assertEqual(fetch_market_data.call_count, 1)
+
+    def test_warns_when_workers_throttle_separately(self):
+        stderr = io.StringIO()
+        ServeCommand(stderr=stderr).check_shared_cache(1)
+        self.assertEqual(stderr.getvalue(), "")
+        ServeCommand(stderr=stderr).check_shared_cache(4)
+        self.assertIn("4 times higher", stderr.getvalue())
+        shared = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "crypto_cache",
+            }
+        }
+        stderr = io.StringIO()
+        with override_settings(CACHES=shared):
+            ServeCommand(stderr=stderr).check_shared_cache(4)
+        self.assertEqual(stderr.getvalue(), "")
+
+
+class ListSink:
+
+    def __init__(self):
+        self.batches = []
+
+    def deliver(self, alerts):
+        self.batches.append(alerts)
+
+
+class PriceAlertTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        coins_snapshot.clear()
+        markets_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="alerts@gmail.com", username="Alertsuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def markets(self, **prices):
+        return ColumnStore.from_rows(
+            [
+                {"id": coin_id, "current_price": price}
+                for coin_id, price in prices.items()
+            ]
+        )
+
+    def test_index_fires_crossed_thresholds_only(self):
+        index = AlertIndex()
+        index.add(
+            [
+                (1, "bitcoin", "cad", "above", 110.0),
+                (2, "bitcoin", "cad", "above", 120.0),
+                (3, "bitcoin", "cad", "above", 100.0),
+                (4, "bitcoin", "cad", "below", 90.0),
+                (5, "bitcoin", "usd", "above", 105.0),
+                (6, "ethereum", "cad", "above", 1.0),
+            ]
+        )
+        self.assertEqual(
+            index.crossed("bitcoin", "cad", 100.0, 115.0), [(1, "above", 110.0)]
+        )
+        self.assertEqual(index.crossed("bitcoin", "cad", 115.0, 100.0), [])
+        self.assertEqual(
+            index.crossed("bitcoin", "cad", 100.0, 200.0), [(2, "above", 120.0)]
+        )
+        self.assertEqual(
+            index.crossed("bitcoin", "cad", 200.0, 90.0), [(4, "below", 90.0)]
+        )
+        self.assertEqual(len(index), 3)
+
+        fired = index.fired(
+            self.markets(bitcoin=100.0, ethereum=2.0),
+            self.markets(bitcoin=160.0, ethereum=2.0),
+            {"cad": 1.0, "usd": 0.7}.get,
+        )
+        self.assertEqual([alert["id"] for alert in fired], [5])
+        self.assertAlmostEqual(fired[0]["price"], 112.0)
+
+    def test_engine_claims_and_delivers_in_batches(self):
+        other = get_user_model().objects.create_user(
+            email="other@gmail.com", username="Otheruser", password="Test@1234"
+        )
+        alerts = [
+            PriceAlert.objects.create(
+                user=self.user,
+                coin_id="bitcoin",
+                direction="above",
+                threshold=threshold,
+                vs_currency="cad",
+            )
+            for threshold in (101.0, 102.0, 103.0, 300.0)
+        ]
+        sink = ListSink()
+        engine = AlertEngine(sink=sink, batch_size=2)
+        self.assertEqual(engine.evaluate(None, self.markets(bitcoin=100.0)), 0)
+        alerts[1].delete()
+        PriceAlert.objects.create(
+            user=other,
+            coin_id="bitcoin",
+            direction="below",
+            threshold=99.0,
+            vs_currency="cad",
+        )
+
+        delivered = engine.evaluate(
+            self.markets(bitcoin=100.0), self.markets(bitcoin=200.0)
+        )
+        self.assertEqual(delivered, 2)
+        self.assertEqual(
+            [[alert["id"] for alert in batch] for batch in sink.batches],
+            [[alerts[0].id], [alerts[2].id]],
+        )
+        self.assertEqual(sink.batches[0][0]["user_id"], self.user.id)
+        self.assertEqual(PriceAlert.objects.filter(is_active=True).count(), 2)
+        self.assertIsNotNone(PriceAlert.objects.get(id=alerts[0].id).triggered_at)
+
+        self.assertEqual(
+            engine.evaluate(self.markets(bitcoin=200.0), self.markets(bitcoin=50.0)), 1
+        )
+        self.assertEqual(sink.batches[-1][0]["user_id"], other.id)
+
+    def test_failed_delivery_releases_the_alerts(self):
+        alert = PriceAlert.objects.create(
+            user=self.user,
+            coin_id="bitcoin",
+            direction="above",
+            threshold=150.0,
+            vs_currency="cad",
+        )
+        sink = ListSink()
+        engine = AlertEngine(sink=sink)
+        engine.evaluate(None, self.markets(bitcoin=100.0))
+        with patch.object(sink, "deliver", side_effect=ValueError("sink down")):
+            with self.assertLogs("apps.crypto.alerts", "ERROR"):
+                delivered = engine.evaluate(
+                    self.markets(bitcoin=100.0), self.markets(bitcoin=200.0)
+                )
+        self.assertEqual(delivered, 0)
+        alert.refresh_from_db()
+        self.assertTrue(alert.is_active)
+        self.assertIsNone(alert.triggered_at)
+
+        engine.evaluate(self.markets(bitcoin=200.0), self.markets(bitcoin=100.0))
+        engine.evaluate(self.markets(bitcoin=100.0), self.markets(bitcoin=200.0))
+        self.assertEqual([batch[0]["id"] for batch in sink.batches], [alert.id])
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_price_alert_views(self, get_coins):
+        get_coins.return_value = CoinSearchIndexTestCase.coins
+        markets_snapshot.publish(self.markets(bitcoin=90000.0))
+        url = reverse("price_alerts_v1")
+        response = self.client.post(
+            url, {"coin_id": "bitcoin", "direction": "above", "threshold": 100000}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["data"]["vs_currency"], "cad")
+        alert_id = response.data["data"]["id"]
+        response = self.client.post(
+            url, {"coin_id": "unknown", "direction": "above", "threshold": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # A known coin outside the market snapshot would never be checked.
+        response = self.client.post(
+            url, {"coin_id": "ethereum", "direction": "above", "threshold": 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("market snapshot", str(response.data))
+
+        response = self.client.get(url)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["data"][0]["id"], alert_id)
+
+        detail = reverse("price_alert_v1", args=[alert_id])
+        self.assertEqual(
+            self.client.delete(detail).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(
+            self.client.delete(detail).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class PortfolioTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        coins_snapshot.clear()
+        exchange_rates_snapshot.clear()
+        markets_snapshot.publish(
+            ColumnStore.from_rows(
+                [
+                    {"id": "bitcoin", "current_price": 140000.0},
+                    {"id": "ethereum", "current_price": 5000.0},
+                ]
+            )
+        )
+        self.user = get_user_model().objects.create_user(
+            email="portfolio@gmail.com", username="Portfoliouser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def holding(self, coin_id, quantity, cost_basis, cost_currency="cad"):
+        return {
+            "coin_id": coin_id,
+            "quantity": quantity,
+            "cost_basis": cost_basis,
+            "cost_currency": cost_currency,
+        }
+
+    @patch("apps.crypto.portfolio.CRYPTOAPI.fetch_market_data")
+    def test_prices_outside_snapshot_fetched_once(self, fetch_market_data):
+        fetch_market_data.return_value = [{"id": "tiny", "current_price": 2.0}]
+        holdings = [
+            self.holding("bitcoin", 0.5, 40000.0),
+            self.holding("tiny", 100.0, 300.0),
+            self.holding("delisted", 1.0, 10.0),
+        ]
+        valuation = portfolio_valuation(holdings, "cad")
+        self.assertEqual(valuation["total_value"], 70200.0)
+        self.assertEqual(valuation["total_cost"], 40300.0)
+        self.assertEqual(valuation["unpriced"], ["delisted"])
+        self.assertAlmostEqual(valuation["holdings"][0]["pnl_percentage"], 75.0)
+        self.assertEqual(valuation["holdings"][1]["pnl"], -100.0)
+        self.assertIsNone(valuation["holdings"][2]["value"])
+        self.assertEqual(fetch_market_data.call_count, 1)
+        self.assertEqual(fetch_market_data.call_args.kwargs["ids"], "tiny,delisted")
+
+        fetch_market_data.return_value = []
+        valuation = portfolio_valuation(holdings, "cad")
+        self.assertEqual(fetch_market_data.call_count, 1)
+        self.assertEqual(valuation["unpriced"], ["delisted"])
+
+    @patch("apps.crypto.portfolio.CRYPTOAPI.fetch_market_data")
+    def test_prices_with_an_empty_market_snapshot(self, fetch_market_data):
+        markets_snapshot.publish(ColumnStore.from_rows([]))
+        fetch_market_data.return_value = [{"id": "bitcoin", "current_price": 2.0}]
+        holdings = [
+            self.holding("bitcoin", 1.0, 1.0),
+            self.holding("delisted", 1.0, 1.0),
+        ]
+        valuation = portfolio_valuation(holdings, "cad")
+        self.assertEqual(valuation["total_value"], 2.0)
+        self.assertEqual(valuation["unpriced"], ["delisted"])
+
+    @patch("apps.crypto.portfolio.CRYPTOAPI.fetch_market_data")
+    def test_failed_price_fetch_reports_unpriced(self, fetch_market_data):
+        fetch_market_data.side_effect = RuntimeError("Failed to fetch data.")
+        holdings = [
+            self.holding("bitcoin", 0.5, 40000.0),
+            self.holding("tiny", 100.0, 300.0),
+        ]
+        with self.assertLogs(level="ERROR"):
+            valuation = portfolio_valuation(holdings, "cad")
+        self.assertEqual(valuation["total_value"], 70000.0)
+        self.assertEqual(valuation["unpriced"], ["tiny"])
+
+        fetch_market_data.side_effect = None
+        fetch_market_data.return_value = [{"id": "tiny", "current_price": 2.0}]
+        valuation = portfolio_valuation(holdings, "cad")
+        self.assertEqual(valuation["unpriced"], [])
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_exchange_rates")
+    def test_bulk_valuation_in_any_currency(self, get_rates):
+        get_rates.return_value = CurrencyConversionTestCase.rates
+        valuations = bulk_valuation(
+            [
+                (1, "bitcoin", 1.0, 100000.0, "usd"),
+                (2, "ethereum", 2.0, 14000.0, "cad"),
+                (1, "ethereum", 1.0, 0.0, "cad"),
+            ],
+            "usd",
+        )
+        self.assertAlmostEqual(valuations[1]["value"], 100000.0 + 5000.0 / 1.4)
+        self.assertAlmostEqual(valuations[1]["cost"], 100000.0)
+        self.assertAlmostEqual(valuations[2]["pnl"], -4000.0 / 1.4)
+        self.assertEqual(get_rates.call_count, 1)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coins")
+    def test_holding_and_valuation_views(self, get_coins):
+        get_coins.return_value = CoinSearchIndexTestCase.coins
+        url = reverse("holdings_v1")
+        for quantity in (1, 2):
+            response = self.client.post(
+                url, {"coin_id": "bitcoin", "quantity": quantity, "cost_basis": 1000}
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Holding.objects.get(user=self.user).quantity, 2)
+        response = self.client.post(url, {"coin_id": "bitcoin", "quantity": 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse("portfolio_v1"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["total_value"], 280000.0)
+        self.assertEqual(response.data["data"]["total_pnl"], 279000.0)
+
+        stdout = io.StringIO()
+        call_command("value_portfolios", stdout=stdout, stderr=io.StringIO())
+        self.assertIn('"value": 280000.0', stdout.getvalue())
+
+        holding_id = self.client.get(url).data["data"][0]["id"]
+        detail = reverse("holding_v1", args=[holding_id])
+        self.assertEqual(
+            self.client.delete(detail).status_code, status.HTTP_204_NO_CONTENT
+        )
+        self.assertEqual(
+            self.client.get(reverse("portfolio_v1")).data["data"]["total_value"], 0.0
+        )
+
+
+class CategoryIndexTestCase(APITestCase):
+
+    members = [
+        {"category_id": "layer-1", "coin_id": "bitcoin"},
+        {"category_id": "meme", "coin_id": "dogecoin"},
+        {"category_id": "layer-1", "coin_id": "ethereum"},
+        {"category_id": "smart-contracts", "coin_id": "ethereum"},
+    ]
+    categories = [
+        {"category_id": "layer-1", "name": "Layer 1"},
+        {"category_id": "meme", "name": "Meme"},
+        {"category_id": "smart-contracts", "name": "Smart Contracts"},
+    ]
+
+    def setUp(self):
+        cache.clear()
+        categories_snapshot.clear()
+        category_members_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="categories@gmail.com",
+            username="Categoriesuser",
+            password="Test@1234",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_index_maps_both_ways(self):
+        index = CategoryIndex()
+        self.assertIsNone(index.coins_of("layer-1"))
+        index.update(None, ColumnStore.from_rows(self.members), 1)
+        coins = index.coins_of("layer-1")
+        self.assertEqual(len(coins), 2)
+        self.assertEqual(coins[0:10], ["bitcoin", "ethereum"])
+        self.assertEqual(coins[1:2], ["ethereum"])
+        self.assertIsNone(index.coins_of("unknown"))
+        self.assertEqual(
+            index.categories_of("ethereum"), ["layer-1", "smart-contracts"]
+        )
+        self.assertEqual(index.categories_of("solana"), [])
+
+    @override_settings(
+        CRYPTO_CATEGORY_FETCH_WORKERS=2, CRYPTO_CATEGORY_FETCH_INTERVAL=0
+    )
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    def test_members_fetched_in_parallel_keep_failed_categories(
+        self, get_categories, fetch_market_data
+    ):
+        get_categories.return_value = self.categories
+        category_members_snapshot.publish(ColumnStore.from_rows(self.members))
+        threads = set()
+
+        def fetch(category, **kwargs):
+            threads.add(threading.current_thread().name)
+            if category == "meme":
+                raise RuntimeError("Failed to fetch data from Crypto API.")
+            return [{"id": f"{category}-coin"}]
+
+        fetch_market_data.side_effect = fetch
+        with self.assertLogs(level="ERROR"):
+            members = fetch_category_members()
+        self.assertEqual(
+            list(
+                zip(
+                    members.column_values("category_id"),
+                    members.column_values("coin_id"),
+                )
+            ),
+            [
+                ("layer-1", "layer-1-coin"),
+                ("meme", "dogecoin"),
+                ("smart-contracts", "smart-contracts-coin"),
+            ],
+        )
+        self.assertTrue(all(name.startswith("category-members") for name in threads))
+
+    @override_settings(
+        CRYPTO_CATEGORY_FETCH_INTERVAL=0,
+        CRYPTO_CATEGORY_BACKOFF=0,
+        CRYPTO_SNAPSHOT_RETRY_INTERVAL=60,
+    )
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    def test_categories_that_never_loaded_are_retried(
+        self, get_categories, fetch_market_data
+    ):
+        get_categories.return_value = self.categories
+        coins_snapshot.publish(ColumnStore.from_rows(CoinSearchIndexTestCase.coins))
+        calls = []
+
+        def fetch(category, **kwargs):
+            calls.append(category)
+            if category == "meme":
+                raise UpstreamStatusError(429 if calls.count("meme") < 3 else 500)
+            return [{"id": f"{category}-coin"}]
+
+        fetch_market_data.side_effect = fetch
+        with self.assertLogs(level="ERROR"):
+            category_members_snapshot.refresh()
+        self.assertEqual(calls.count("meme"), 3)
+        category_members_snapshot.loaded_at -= 61
+        self.assertTrue(category_members_snapshot.is_stale())
+        url = reverse("category_coins_v1")
+        response = self.client.get(url, {"category_id": "meme"})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "30")
+        response = self.client.get(url, {"category_id": "layer-1"})
+        self.assertEqual(response.data["data"][0]["id"], "layer-1-coin")
+
+        calls.clear()
+        fetch_market_data.side_effect = lambda category, **kwargs: [
+            {"id": f"{category}-coin"}
+        ]
+        category_members_snapshot.refresh()
+        self.assertEqual(fetch_market_data.call_args.kwargs["category"], "meme")
+        response = self.client.get(url, {"category_id": "meme"})
+        self.assertEqual(response.data["data"][0]["id"], "meme-coin")
+        self.assertFalse(category_index.loading("meme"))
+
+    @override_settings(CRYPTO_CATEGORY_FETCH_INTERVAL=0)
+    @patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data")
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    def test_load_where_every_category_failed_is_discarded(
+        self, get_categories, fetch_market_data
+    ):
+        get_categories.return_value = self.categories
+        fetch_market_data.side_effect = RuntimeError("Failed to fetch data.")
+        with self.assertLogs(level="ERROR"):
+            with self.assertRaises(RuntimeError):
+                category_members_snapshot.refresh()
+        self.assertIsNone(category_members_snapshot.rows)
+
+    @patch("apps.crypto.snapshots.CRYPTOAPI.get_coinCategory")
+    def test_category_views_make_no_upstream_calls(self, get_categories):
+        get_categories.return_value = self.categories
+        coins_snapshot.publish(ColumnStore.from_rows(CoinSearchIndexTestCase.coins))
+        category_members_snapshot.publish(ColumnStore.from_rows(self.members))
+        url = reverse("category_coins_v1")
+        with patch("apps.crypto.snapshots.CRYPTOAPI.fetch_market_data") as fetch:
+            response = self.client.get(url, {"category_id": "layer-1", "per_page": 1})
+            self.assertEqual(fetch.call_count, 0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        self.assertEqual(response.data["data"][0]["name"], "Bitcoin")
+        response = self.client.get(url, {"category_id": "unknown"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(
+            reverse("coins_categories_v1"), {"coin_id": "ethereum"}
+        )
+        self.assertEqual(
+            [category["name"] for category in response.data["data"]],
+            ["Layer 1", "Smart Contracts"],
+        )
+
+
+class TracingTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        coins_snapshot.clear()
+        self.user = get_user_model().objects.create_user(
+            email="trace@gmail.com", username="Traceuser", password="Test@1234"
+        )
+
+    @override_settings(CRYPTO_TRACE_SAMPLE_RATE=1, CRYPTO_SERVER_TIMING="all")
+    @patch(
+        "apps.crypto.snapshots.CRYPTOAPI.get_coins",
+        return_value=[{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}],
+    )
+    def test_server_timing_header_breaks_down_the_request(self, get_coins):
+        self.client.force_authenticate(user=self.user)
+        with patch("apps.crypto.middleware.tracing.exporter.export") as export:
+            response = self.client.get(reverse("coin_list_v1"))
+        timing = response["Server-Timing"]
+        self.assertTrue(timing.startswith("total;dur="))
+        for name in ("view", "auth", "throttle", "paginate", "render"):
+            self.assertIn(f"{name};dur=", timing)
+        trace = export.call_args.args[0]
+        root = trace.spans[-1]
+        self.assertEqual(root.attributes["http.response.status_code"], 200)
+        self.assertIn("coin-list", root.attributes["http.route"])
+        self.assertTrue(
+            all(record.parent_id for record in trace.spans if record is not root)
+        )
+
+    @patch(
+        "apps.crypto.snapshots.CRYPTOAPI.get_coins",
+        return_value=[{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}],
+    )
+    def test_server_timing_only_for_internal_callers(self, get_coins):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("coin_list_v1")
+        self.assertNotIn("Server-Timing", self.client.get(url))
+        with override_settings(INTERNAL_IPS=["127.0.0.1"]):
+            self.assertIn("Server-Timing", self.client.get(url))
+        self.user.is_staff = True
+        self.assertIn("Server-Timing", self.client.get(url))
+        with override_settings(CRYPTO_SERVER_TIMING="off"):
+            self.assertNotIn("Server-Timing", self.client.get(url))
+
+    def test_upstream_spans_join_the_request_trace(self):
+        pool = MirrorPool(["https://mirror/"], attempts=1)
+        pool.mirrors[0].session = FakeSession()
+        with trace_request(sampled=True) as trace:
+            with span("upstream") as parent:
+                pool.get("ping")
+        spans = {record.name: record for record in trace.spans}
+        attempt = spans["upstream.attempt"]
+        self.assertEqual(attempt.kind, CLIENT)
+        self.assertEqual(attempt.parent_id, parent.span_id)
+        self.assertEqual(attempt.attributes["http.response.status_code"], 200)
+        for name in ("upstream.headers", "upstream.read", "upstream.decode"):
+            self.assertEqual(spans[name].parent_id, attempt.span_id)
+
+    def test_exporter_writes_otlp_json_lines(self):
+        with trace_request(sampled=True) as trace:
+            with span("request"):
+                with span("view", **{"code.function": "CoinListAPI"}):
+                    pass
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            exporter = FileExporter(path)
+            with patch.object(exporter, "_start_writer"):
+                exporter.export(trace)
+            exporter.flush()
+            with open(path) as handle:
+                lines = handle.readlines()
+        self.assertEqual(len(lines), 1)
+        spans = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        view, request = spans
+        self.assertEqual(view["traceId"], trace.trace_id)
+        self.assertEqual(view["parentSpanId"], request["spanId"])
+        self.assertEqual(
+            view["attributes"],
+            [{"key": "code.function", "value": {"stringValue": "CoinListAPI"}}],
+        )
+
+
+class LoggingPipelineTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        coins_snapshot.clear()
+
+    def record(self, msg, *args, level=logging.ERROR, **extra):
+        record = logging.LogRecord("apps.test", level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_rate_limit_suppresses_repeats_of_a_message(self):
+        rate_limit = RateLimitFilter(limit=2, window=60)
+        passed = [
+            rate_limit.filter(self.record("Request error occurred: %s", n))
+            for n in range(5)
+        ]
+        self.assertEqual(passed, [True, True, False, False, False])
+        self.assertTrue(rate_limit.filter(self.record("Other error")))
+        self.assertTrue(
+            rate_limit.filter(self.record("Debug %s", 1, level=logging.INFO))
+        )
+        with patch(
+            "apps.crypto.logs.time.monotonic", return_value=time.monotonic() + 61
+        ):
+            record = self.record("Request error occurred: %s", 6)
+            self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+    def test_full_queue_drops_records_without_blocking(self):
+        handler = BackgroundHandler(queue_size=2)
+        handler.target = logging.StreamHandler(io.StringIO())
+        handler.target.setFormatter(JSONFormatter())
+        with patch.object(handler, "_start"):
+            for n in range(5):
+                handler.emit(self.record("Error %s", n))
+            self.assertEqual(handler.queue.qsize(), 2)
+            self.assertEqual(handler.dropped, 3)
+            handler.queue.get_nowait()
+            handler.emit(self.record("Error %s", 5))
+        self.assertEqual(handler.dropped, 0)
+        handler.queue.get_nowait()
+        self.assertEqual(handler.queue.get_nowait().dropped, 3)
+
+    def test_records_are_written_as_json_lines(self):
+        stream = io.StringIO()
+        handler = BackgroundHandler()
+        handler.target = logging.StreamHandler(stream)
+        handler.target.setFormatter(JSONFormatter())
+        try:
+            raise ValueError("bad payload")
+        except ValueError:
+            record = self.record("Request error occurred: %s", "timeout")
+            record.exc_info = sys.exc_info()
+        with trace_request(sampled=False) as trace:
+            handler.emit(self.record("Fetched %s", "coins", endpoint="coins/list"))
+            handler.emit(record)
+        handler.stop()
+        fetched, failed = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(fetched["message"], "Fetched coins")
+        self.assertEqual(fetched["level"], "ERROR")
+        self.assertEqual(fetched["endpoint"], "coins/list")
+        self.assertEqual(fetched["trace_id"], trace.trace_id)
+        self.assertIn("ValueError: bad payload", failed["exception"])
+
+    @patch(
+        "apps.crypto.snapshots.CRYPTOAPI.get_coins",
+        return_value=[{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"}],
+    )
+    def test_access_log_records_latency_breakdown(self, get_coins):
+        user = get_user_model().objects.create_user(
+            email="access@gmail.com", username="Accessuser", password="Test@1234"
+        )
+        self.client.force_authenticate(user=user)
+        with self.assertLogs("apps.access", "INFO") as logs:
+            self.client.get(reverse("coin_list_v1"))
+        record = logs.records[-1]
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.method, "GET")
+        self.assertEqual(record.user_id, user.pk)
+        self.assertIn("coin-list", record.route)
+        self.assertGreater(record.duration_ms, 0)
+        for name in ("auth", "paginate", "render", "upstream"):
+            self.assertIn(f"{name}_ms", record.__dict__)
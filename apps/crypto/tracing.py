@@ -0,0 +1,267 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+
+# OTLP span kinds.
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+
+
+class Span:
+    """
+    One timed operation of a trace; `start` is wall-clock and `duration`
+    monotonic, both in nanoseconds.
+    """
+
+    __slots__ = (
+        "name",
+        "span_id",
+        "parent_id",
+        "kind",
+        "attributes",
+        "start",
+        "duration",
+        "error",
+    )
+
+    def __init__(self, name, parent_id, kind, attributes):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.duration = 0
+        self.error = None
+
+
+class Trace:
+    """
+    The spans of one request. Every request collects them for its
+    `Server-Timing` header; only sampled ones are exported.
+    """
+
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, sampled):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.sampled = sampled
+        self.spans = []
+
+
+def active():
+    """
+    Returns whether the current request is traced.
+    """
+    return _trace.get() is not None
+
+
+def current():
+    """
+    Returns the trace of the current request, or None.
+    """
+    return _trace.get()
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """
+    Times the enclosed block as a child of the current span. Outside a
+    traced request it does nothing and yields None.
+
+    Yields:
+        Span: The span, whose attributes may be added to.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    record = Span(name, _parent.get(), kind, attributes)
+    token = _parent.set(record.span_id)
+    started = time.perf_counter_ns()
+    try:
+        yield record
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.duration = time.perf_counter_ns() - started
+        _parent.reset(token)
+        trace.spans.append(record)
+
+
+@contextmanager
+def trace_request(sampled):
+    """
+    Starts a trace for the enclosed request.
+
+    Yields:
+        Trace: The trace, complete once the block exits.
+    """
+    trace = Trace(sampled)
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+def in_context(function):
+    """
+    Returns `function` bound to a copy of the current context, so spans it
+    records in another thread join the caller's trace.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
+
+
+def server_timing(spans):
+    """
+    Formats spans as a `Server-Timing` header value: one metric per span
+    name, `total` (the SERVER span) first and the others as they finished,
+    with durations summed and the count in `desc` when a name occurs more
+    than once.
+    """
+    metrics = {}
+    for record in spans:
+        name = "total" if record.kind == SERVER else record.name
+        duration, count = metrics.get(name, (0, 0))
+        metrics[name] = (duration + record.duration, count + 1)
+    ordered = sorted(metrics.items(), key=lambda item: item[0] != "total")
+    return ", ".join(
+        f"{name};dur={duration / 1e6:.1f}" + (f';desc="{count}x"' if count > 1 else "")
+        for name, (duration, count) in ordered
+    )
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def encode(traces):
+    """
+    Encodes traces as one OTLP/JSON `ExportTraceServiceRequest`, the format
+    of the OpenTelemetry collector's file exporter and otlpjsonfile receiver.
+    """
+    spans = []
+    for trace in traces:
+        for record in trace.spans:
+            encoded = {
+                "traceId": trace.trace_id,
+                "spanId": record.span_id,
+                "name": record.name,
+                "kind": record.kind,
+                "startTimeUnixNano": str(record.start),
+                "endTimeUnixNano": str(record.start + record.duration),
+                "attributes": [
+                    {"key": key, "value": _value(value)}
+                    for key, value in record.attributes.items()
+                ],
+                "status": {"code": 2, "message": record.error} if record.error else {},
+            }
+            if record.parent_id:
+                encoded["parentSpanId"] = record.parent_id
+            spans.append(encoded)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": _value(settings.CRYPTO_TRACE_SERVICE_NAME),
+                        },
+                        {"key": "process.pid", "value": _value(os.getpid())},
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """
+    Appends sampled traces to CRYPTO_TRACE_FILE as OTLP/JSON lines from a
+    background thread, so requests never wait on the disk. The queue holds
+    CRYPTO_TRACE_QUEUE_SIZE traces; beyond that traces are dropped.
+    """
+
+    def __init__(self, path=None, queue_size=None):
+        self.path = path
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # The writer thread is not copied into a forked worker.
+        self._queue = queue.Queue(self.queue_size or settings.CRYPTO_TRACE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def export(self, trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self._start_writer()
+
+    def flush(self):
+        """
+        Writes the queued traces from the calling thread.
+        """
+        self._write(self._drain([]))
+
+    def _drain(self, traces):
+        while True:
+            try:
+                traces.append(self._queue.get_nowait())
+            except queue.Empty:
+                return traces
+
+    def _write(self, traces):
+        if not traces:
+            return
+        line = json.dumps(encode(traces), separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path or settings.CRYPTO_TRACE_FILE, "a") as handle:
+                handle.write(line)
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(
+                target=self._write_forever, name="trace-export", daemon=True
+            )
+        self._writer.start()
+
+    def _write_forever(self):
+        while True:
+            traces = self._drain([self._queue.get()])
+            try:
+                self._write(traces)
+            except Exception as e:
+                logging.error("Trace export failed: %s", e)
+
+
+exporter = FileExporter()
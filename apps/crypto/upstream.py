@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+import requests
+from django.conf import settings
+from apps.crypto.tracing import CLIENT, in_context, span
+
+# Latency samples kept per mirror.
+_SAMPLES = 128
+# Samples needed before a mirror's own percentile replaces the default delay.
+_MIN_SAMPLES = 10
+
+
+class Mirror:
+    """
+    One upstream base URL with its recent response times. A mirror that
+    failed is ranked last for `CRYPTO_MIRROR_PENALTY` seconds.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.latencies = deque(maxlen=_SAMPLES)
+        self.failed_at = float("-inf")
+        self.session = requests.Session()
+
+    def record(self, latency):
+        self.latencies.append(latency)
+
+    def record_failure(self):
+        self.failed_at = time.monotonic()
+
+    def percentile(self, percent):
+        samples = list(self.latencies)
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        return float(np.percentile(samples, percent))
+
+    def rank(self):
+        """
+        Sort key: mirrors that failed recently last, then by median latency.
+        Mirrors without samples come first so each one gets measured.
+        """
+        failing = time.monotonic() - self.failed_at < settings.CRYPTO_MIRROR_PENALTY
+        samples = list(self.latencies)
+        return (failing, float(np.median(samples)) if samples else 0.0)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _client_error(error):
+    """
+    Returns whether `error` is an HTTP 4xx other than 429, which every
+    mirror answers the same, so no other attempt is worth making.
+    """
+    response = getattr(error, "response", None)
+    return (
+        isinstance(error, requests.exceptions.HTTPError)
+        and response is not None
+        and 400 <= response.status_code < 500
+        and response.status_code != 429
+    )
+
+
+class MirrorPool:
+    """
+    Sends upstream requests to the fastest of several mirrors and hedges
+    them: when the answer takes longer than the mirror's
+    `CRYPTO_HEDGE_PERCENTILE` latency, a backup request goes to the next
+    mirror and the first good answer wins. With a single mirror requests
+    are never hedged, only retried. A failed attempt fires the next one
+    right away, except on a client error, which is raised at once. Losing
+    attempts are abandoned: their body is never read and their connection
+    is closed.
+    """
+
+    def __init__(self, base_urls, attempts=None, timeout=None):
+        self.mirrors = [Mirror(url) for url in base_urls]
+        self.attempts = attempts or settings.CRYPTO_HEDGE_MAX_ATTEMPTS
+        self.timeout = timeout or settings.CRYPTO_UPSTREAM_TIMEOUT
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.CRYPTO_UPSTREAM_WORKERS,
+            thread_name_prefix="upstream",
+        )
+
+    def ranked(self):
+        return sorted(self.mirrors, key=Mirror.rank)
+
+    def hedge_delay(self, mirror):
+        delay = mirror.percentile(settings.CRYPTO_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = settings.CRYPTO_HEDGE_DELAY
+        return max(delay, 0.001)
+
+    def _attempt(self, mirror, endpoint, params, done):
+        with span(
+            "upstream.attempt",
+            kind=CLIENT,
+            **{"server.address": mirror.base_url, "url.path": endpoint},
+        ) as attempt:
+            return self._fetch(mirror, endpoint, params, done, attempt)
+
+    def _fetch(self, mirror, endpoint, params, done, attempt):
+        started = time.monotonic()
+        try:
+            # requests does not time DNS, connect and TLS apart: this span is
+            # all of them plus the wait for the response headers.
+            with span("upstream.headers"):
+                response = mirror.session.get(
+                    f"{mirror.base_url}{endpoint}",
+                    params=params,
+                    timeout=self.timeout,
+                    stream=True,
+                )
+        except requests.exceptions.RequestException:
+            mirror.record_failure()
+            raise
+        if attempt is not None:
+            attempt.attributes["http.response.status_code"] = response.status_code
+        with response:
+            if done.is_set():
+                # Another attempt won: the time so far is a lower bound.
+                mirror.record(time.monotonic() - started)
+                raise _Cancelled()
+            try:
+                response.raise_for_status()
+                with span("upstream.read"):
+                    response.content
+                with span("upstream.decode"):
+                    data = response.json()
+            except requests.exceptions.HTTPError:
+                # Client errors are the same on every mirror.
+                if response.status_code == 429 or response.status_code >= 500:
+                    mirror.record_failure()
+                raise
+            except (requests.exceptions.RequestException, ValueError):
+                mirror.record_failure()
+                raise
+        mirror.record(time.monotonic() - started)
+        return data
+
+    def get(self, endpoint, params=None):
+        """
+        Fetches `endpoint` from the mirrors.
+
+        Args:
+            endpoint (str): The API endpoint, relative to the base URLs.
+            params (dict): Query parameters.
+
+        Returns:
+            The decoded JSON of the first good answer.
+
+        Raises:
+            requests.exceptions.RequestException: The last error, when every
+            attempt failed, or the first client error.
+        """
+        mirrors = self.ranked()
+        if not mirrors:
+            raise requests.exceptions.InvalidURL("No upstream base URL configured")
+        # Hedging against the same origin would only double the calls to a
+        # rate-limited API.
+        hedging = len(mirrors) > 1
+        done = threading.Event()
+        pending, error = set(), None
+        deadline = time.monotonic() + self.timeout
+        try:
+            for attempt in range(self.attempts):
+                mirror = mirrors[attempt % len(mirrors)]
+                pending.add(
+                    self._executor.submit(
+                        in_context(self._attempt), mirror, endpoint, params, done
+                    )
+                )
+                if attempt == self.attempts - 1:
+                    break
+                # Wait for an answer until it is time to hedge; a failure
+                # fires the next attempt right away.
+                finished, pending = wait(
+                    pending,
+                    timeout=(
+                        self.hedge_delay(mirror)
+                        if hedging
+                        else max(0.0, deadline - time.monotonic())
+                    ),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in finished:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+                    if _client_error(error):
+                        raise error
+                if pending and not hedging:
+                    break
+            while pending:
+                finished, pending = wait(
+                    pending,
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=FIRST_COMPLETED,
+                )
+                if not finished:
+                    break
+                for future in finished:
+                    if future.exception() is None:
+                        return future.result()
+                    error = future.exception()
+                    if _client_error(error):
+                        raise error
+        finally:
+            done.set()
+            for future in pending:
+                future.cancel()
+        raise error or requests.exceptions.Timeout(
+            f"No upstream answer for {endpoint} within {self.timeout}s"
+        )
+
+
+_pools = {}
+# The executor threads of a pool do not survive a fork; workers build their own.
+os.register_at_fork(after_in_child=_pools.clear)
+
+
+def upstream_pool():
+    """
+    Returns the process-wide pool of CRYPTO_GECO_BASE_URL followed by the
+    CRYPTO_GECO_MIRRORS.
+    """
+    base_urls = tuple(
+        url
+        for url in [settings.CRYPTO_GECO_BASE_URL, *settings.CRYPTO_GECO_MIRRORS]
+        if url
+    )
+    pool = _pools.get(base_urls)
+    if pool is None:
+        pool = _pools.setdefault(base_urls, MirrorPool(base_urls))
+    return pool
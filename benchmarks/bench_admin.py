@@ -0,0 +1,90 @@
+"""
+Account admin changelist on a large table: time to render the first page, a
+deep page, an email search and a filtered page with `AccountAdmin` against
+the stock `UserAdmin`, on a fresh SQLite database of synthetic accounts.
+
+Usage:
+    python benchmarks/bench_admin.py [--accounts 1000000]
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["DB_NAME"] = os.path.join(tempfile.mkdtemp(), "admin.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.admin import AdminSite  # noqa: E402
+from django.contrib.auth.admin import UserAdmin  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from apps.account.admin import AccountAdmin  # noqa: E402
+from apps.account.models import Account  # noqa: E402
+
+
+def fill(count):
+    for start in range(0, count, 20000):
+        Account.objects.bulk_create(
+            [
+                Account(
+                    email=f"user{n:07d}@example.com",
+                    username=f"user{n:07d}",
+                    first_name="First",
+                    last_name=f"Last{n % 1000}",
+                    is_active=n % 10 != 0,
+                    password="!",
+                )
+                for n in range(start, min(start + 20000, count))
+            ]
+        )
+
+
+def timed(model_admin, user, params):
+    request = RequestFactory().get("/admin/account/account/", params)
+    request.user = user
+    started = time.perf_counter()
+    model_admin.changelist_view(request).render()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    options = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    fill(options.accounts)
+    user = Account.objects.create_superuser(
+        email="admin@example.com", username="admin", password="admin"
+    )
+    site = AdminSite()
+    stock, scalable = UserAdmin(Account, site), AccountAdmin(Account, site)
+    deep = Account.objects.order_by("-id").values_list("id", flat=True)[
+        options.accounts // 2
+    ]
+    cases = [
+        ("first page", {}, {}),
+        ("deep page", {"p": str(options.accounts // 200)}, {"after": str(deep)}),
+        ("email search", {"q": "user0500"}, {"q": "user0500"}),
+        ("inactive", {"is_active__exact": "0"}, {"is_active__exact": "0"}),
+    ]
+    print(f"{options.accounts} accounts")
+    for name, stock_params, params in cases:
+        before, after = timed(stock, user, stock_params), timed(scalable, user, params)
+        print(
+            f"{name:<13} UserAdmin {before * 1000:8.1f} ms"
+            f"  AccountAdmin {after * 1000:7.1f} ms  ({before / after:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Price alert evaluation benchmark: time to find the alerts fired by one market
+tick with `AlertIndex` against checking every alert in a Python loop, for a
+growing number of alerts and about the same number of alerts firing.
+
+Usage:
+    python benchmarks/bench_alerts.py [--coins 250] [--fired 100]
+"""
+
+import argparse
+import os
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DB_NAME", "db.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.crypto.alerts import AlertIndex  # noqa: E402
+from apps.crypto.store import ColumnStore  # noqa: E402
+
+
+def make_alerts(rng, coins, count, prices, fired):
+    """
+    Alerts spread around each coin's price; about `fired` of them lie
+    between the old and the new price of the tick (+0.1%).
+    """
+    alerts = []
+    for alert_id in range(count):
+        coin = rng.randrange(coins)
+        price = prices[coin]
+        if rng.random() < fired / count:
+            alerts.append((alert_id, f"coin-{coin}", "cad", "above", price * 1.0005))
+            continue
+        direction = rng.choice(["above", "below"])
+        offset = rng.uniform(0.01, 0.5)
+        threshold = price * (1 + offset if direction == "above" else 1 - offset)
+        alerts.append((alert_id, f"coin-{coin}", "cad", direction, threshold))
+    return alerts
+
+
+def loop(alerts, old, new):
+    fired = []
+    for alert_id, coin_id, _, direction, threshold in alerts:
+        before, after = old[coin_id], new[coin_id]
+        if direction == "above" and before < threshold <= after:
+            fired.append(alert_id)
+        elif direction == "below" and after <= threshold < before:
+            fired.append(alert_id)
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coins", type=int, default=250)
+    parser.add_argument("--fired", type=int, default=100)
+    options = parser.parse_args()
+
+    rng = random.Random(42)
+    prices = [rng.uniform(0.01, 100000) for _ in range(options.coins)]
+    old = {f"coin-{coin}": price for coin, price in enumerate(prices)}
+    new = {coin_id: price * 1.001 for coin_id, price in old.items()}
+    previous = ColumnStore.from_rows(
+        [{"id": coin_id, "current_price": price} for coin_id, price in old.items()]
+    )
+    store = ColumnStore.from_rows(
+        [{"id": coin_id, "current_price": price} for coin_id, price in new.items()]
+    )
+    for count in (10_000, 100_000, 1_000_000):
+        alerts = make_alerts(rng, options.coins, count, prices, options.fired)
+        index = AlertIndex()
+        started = time.perf_counter()
+        index.add(alerts)
+        built = time.perf_counter() - started
+
+        started = time.perf_counter()
+        fired = index.fired(previous, store, {"cad": 1.0}.get)
+        indexed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = loop(alerts, old, new)
+        looped = time.perf_counter() - started
+        assert sorted(alert["id"] for alert in fired) == sorted(expected)
+        print(
+            f"{count:>9} alerts  {len(fired):4} fired"
+            f"  index {indexed * 1000:7.2f} ms  loop {looped * 1000:8.1f} ms"
+            f"  ({looped / indexed:5.1f}x)  index build {built:5.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
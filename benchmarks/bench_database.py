@@ -0,0 +1,160 @@
+"""
+Concurrent logins against SQLite: several worker processes log their users in
+and out (a token created at login and deleted at logout) through the API, with the
+default SQLite setup (rollback journal, a connection per request) against
+the production one (WAL, pragmas, persistent connections; `DB_SQLITE_WAL=1`).
+Passwords use a fast hasher so the database, not hashing, is measured.
+
+Usage:
+    python benchmarks/bench_database.py [--workers 8] [--cycles 200]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+SETUP = """
+import os, sys
+sys.path.insert(0, {root!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+import django
+django.setup()
+from django.conf import settings
+settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+"""
+
+PREPARE = SETUP + """
+from django.core.management import call_command
+from django.contrib.auth import get_user_model
+call_command("migrate", verbosity=0)
+for n in range({workers}):
+    get_user_model().objects.create_user(
+        email=f"bench{{n}}@example.com", username=f"bench{{n}}", password="Bench@1234"
+    )
+"""
+
+WORKER = SETUP + """
+import json, time
+from django.test import RequestFactory
+from apps.crypto.handlers import get_dispatching_application
+
+application = get_dispatching_application()
+factory = RequestFactory()
+login = json.dumps({{"email": "bench{worker}@example.com", "password": "Bench@1234"}})
+
+def call(environ):
+    statuses = []
+    body = application(environ, lambda status, headers: statuses.append(status))
+    content = b"".join(body)
+    body.close()
+    return int(statuses[0].split()[0]), content
+
+latencies, errors = [], 0
+while time.time() < {start}:
+    time.sleep(0.001)
+for _ in range({cycles}):
+    started = time.perf_counter()
+    code, content = call(factory.post(
+        "/api/auth/v1/login", login, content_type="application/json"
+    ).environ)
+    if code != 200:
+        errors += 1
+        continue
+    token = json.loads(content)["data"]["token"]
+    code, _ = call(factory.post(
+        "/api/auth/v1/logout", HTTP_AUTHORIZATION=f"Token {{token}}"
+    ).environ)
+    errors += code != 200
+    latencies.append(time.perf_counter() - started)
+print(json.dumps({{"latencies": latencies, "errors": errors}}))
+"""
+
+
+def run(environment, workers, cycles):
+    """
+    Prepares a fresh database, then runs `workers` processes of `cycles`
+    login/logout cycles each, started together.
+
+    Returns:
+        dict: Cycles per second, latency percentiles and failed cycles.
+    """
+    subprocess.run(
+        [sys.executable, "-c", PREPARE.format(root=str(ROOT), workers=workers)],
+        env=environment,
+        cwd=ROOT,
+        check=True,
+    )
+    start = time.time() + 2
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                WORKER.format(
+                    root=str(ROOT), worker=worker, cycles=cycles, start=start
+                ),
+            ],
+            env=environment,
+            cwd=ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        for worker in range(workers)
+    ]
+    latencies, errors = [], 0
+    for process in processes:
+        output, _ = process.communicate()
+        result = json.loads(output.strip().splitlines()[-1])
+        latencies += result["latencies"]
+        errors += result["errors"]
+    elapsed = time.time() - start
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": latencies[int(len(latencies) * 0.99)] if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cycles", type=int, default=200)
+    options = parser.parse_args()
+
+    cases = [
+        ("default sqlite", {"DB_SQLITE_WAL": "0", "DB_CONN_MAX_AGE": "0"}),
+        ("production sqlite", {"DB_SQLITE_WAL": "1", "DB_CONN_MAX_AGE": "60"}),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        for label, extra in cases:
+            environment = {
+                **os.environ,
+                "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+                "DB_ENGINE": "sqlite",
+                "DB_NAME": os.path.join(directory, f"{label.split()[0]}.sqlite3"),
+                # Unthrottled, so every request reaches the database.
+                "THROTTLE_AUTH_RATE": "",
+                **extra,
+            }
+            result = run(environment, options.workers, options.cycles)
+            print(
+                f"{label:<18} {result['throughput']:8.1f} cycles/s"
+                f"  p50 {result['p50'] * 1000:7.1f} ms"
+                f"  p99 {result['p99'] * 1000:7.1f} ms"
+                f"  failed {result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Logging under an error storm: time per `logging.error` call on request
+threads writing to a log file directly with a `FileHandler`, against the
+`BackgroundHandler` queue with and without the rate limit, while an
+upstream outage makes every request log the same error.
+
+Usage:
+    python benchmarks/bench_logging.py [--threads 8] [--records 20000]
+"""
+
+import argparse
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["DB_NAME"] = os.path.join(tempfile.mkdtemp(), "logging.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.crypto.logs import (  # noqa: E402
+    BackgroundHandler,
+    JSONFormatter,
+    RateLimitFilter,
+)
+
+
+def storm(logger, threads, records):
+    """
+    Logs `records` errors from each of `threads` threads.
+
+    Returns:
+        float: Mean seconds per call.
+    """
+
+    def work():
+        for n in range(records):
+            logger.error("Request error occurred: %s", f"timeout #{n}")
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (threads * records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20000)
+    options = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    file_handler = logging.FileHandler(os.path.join(directory, "direct.log"))
+    file_handler.setFormatter(JSONFormatter())
+    background = BackgroundHandler(os.path.join(directory, "queued.log"))
+    limited = BackgroundHandler(os.path.join(directory, "limited.log"))
+    limited.addFilter(RateLimitFilter())
+    cases = [
+        ("FileHandler", file_handler),
+        ("BackgroundHandler", background),
+        ("+ rate limit", limited),
+    ]
+    print(f"{options.threads} threads x {options.records} errors")
+    for name, handler in cases:
+        logger = logging.getLogger(f"bench.{name}")
+        logger.propagate = False
+        logger.addHandler(handler)
+        per_call = storm(logger, options.threads, options.records)
+        handler.close()
+        print(f"{name:<18} {per_call * 1e6:7.1f} µs per call")
+
+
+if __name__ == "__main__":
+    main()
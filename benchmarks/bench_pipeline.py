@@ -0,0 +1,117 @@
+"""
+Per-request overhead of the API request pipeline: a token-authenticated
+`coin-list` page (served from the page cache) through the full middleware
+stack with the default DRF configuration, against the lean API handler with
+the production DRF configuration (JSON only, `DEV_APPS=0`), with and
+without request tracing.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--requests 2000]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+import django
+django.setup()
+from django.core.management import call_command
+from django.core.handlers.wsgi import WSGIHandler
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from apps.account.authentication import issue_token
+from apps.crypto.handlers import LeanWSGIHandler
+from apps.crypto.snapshots import coins_snapshot
+from apps.crypto.store import ColumnStore
+
+call_command("migrate", verbosity=0)
+user = get_user_model().objects.create_user(
+    email="bench@example.com", username="bench", password="bench"
+)
+token = issue_token(user)
+coins_snapshot.publish(ColumnStore.from_rows(
+    [{{"id": f"coin-{{n}}", "symbol": "c", "name": "Coin"}} for n in range(1000)]
+))
+handler = {handler}()
+environ = RequestFactory().get(
+    "/api/v1/coin-list", HTTP_AUTHORIZATION=f"Token {{token.key}}"
+).environ
+
+def request():
+    statuses = []
+    body = handler(dict(environ), lambda status, headers: statuses.append(status))
+    b"".join(body)
+    body.close()
+    assert statuses[0].startswith("200"), statuses[0]
+
+for _ in range(50):
+    request()
+started = time.perf_counter()
+for _ in range({requests}):
+    request()
+print(json.dumps({{"us": (time.perf_counter() - started) / {requests} * 1e6}}))
+"""
+
+
+def run(handler, environment, requests):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHILD.format(root=str(ROOT), handler=handler, requests=requests),
+        ],
+        env=environment,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["us"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        base = {
+            **os.environ,
+            "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark"),
+            "DB_NAME": os.path.join(directory, "bench.sqlite3"),
+            # Unthrottled, so every request runs the whole pipeline.
+            "THROTTLE_COIN_LIST_RATE": "",
+            "CRYPTO_TRACE_FILE": os.path.join(directory, "traces.jsonl"),
+        }
+        cases = [
+            ("full stack, default DRF", "WSGIHandler", {"DEV_APPS": "1"}),
+            ("lean stack, default DRF", "LeanWSGIHandler", {"DEV_APPS": "1"}),
+            ("lean stack, lean DRF", "LeanWSGIHandler", {"DEV_APPS": "0"}),
+            (
+                "lean, no tracing",
+                "LeanWSGIHandler",
+                {"DEV_APPS": "0", "CRYPTO_TRACING": "0"},
+            ),
+        ]
+        baseline = None
+        for label, handler, extra in cases:
+            os.makedirs(directory, exist_ok=True)
+            environment = {**base, **extra}
+            us = run(handler, environment, options.requests)
+            os.remove(environment["DB_NAME"])
+            baseline = baseline or us
+            print(f"{label:<24} {us:8.1f} us/request  ({baseline / us:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
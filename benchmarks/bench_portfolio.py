@@ -0,0 +1,84 @@
+"""
+Nightly portfolio valuation benchmark: `bulk_valuation` over every holding
+at once against valuing each account on its own with `portfolio_valuation`,
+on synthetic accounts holding coins of the market snapshot.
+
+Usage:
+    python benchmarks/bench_portfolio.py [--accounts 10000] [--holdings 100]
+"""
+
+import argparse
+import os
+import pathlib
+import random
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DB_NAME", "db.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from apps.crypto.portfolio import bulk_valuation, portfolio_valuation  # noqa: E402
+from apps.crypto.snapshots import markets_snapshot  # noqa: E402
+from apps.crypto.store import ColumnStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--holdings", type=int, default=100)
+    parser.add_argument("--coins", type=int, default=1000)
+    options = parser.parse_args()
+
+    rng = random.Random(42)
+    coin_ids = [f"coin-{n}" for n in range(options.coins)]
+    markets_snapshot.publish(
+        ColumnStore.from_rows(
+            [
+                {"id": coin_id, "current_price": rng.uniform(0.01, 100000)}
+                for coin_id in coin_ids
+            ]
+        )
+    )
+    rows = [
+        (user_id, coin_id, rng.uniform(0.1, 10), rng.uniform(0, 50000), "cad")
+        for user_id in range(options.accounts)
+        for coin_id in rng.sample(coin_ids, options.holdings)
+    ]
+
+    started = time.perf_counter()
+    bulk = bulk_valuation(rows, "cad")
+    bulk_time = time.perf_counter() - started
+
+    portfolios = {}
+    for user_id, coin_id, quantity, cost_basis, cost_currency in rows:
+        portfolios.setdefault(user_id, []).append(
+            {
+                "coin_id": coin_id,
+                "quantity": quantity,
+                "cost_basis": cost_basis,
+                "cost_currency": cost_currency,
+            }
+        )
+    started = time.perf_counter()
+    single = {
+        user_id: portfolio_valuation(holdings, "cad")
+        for user_id, holdings in portfolios.items()
+    }
+    single_time = time.perf_counter() - started
+    assert abs(bulk[0]["value"] - single[0]["total_value"]) < 1e-6 * bulk[0]["value"]
+
+    print(f"{len(rows)} holdings in {options.accounts} accounts")
+    print(f"bulk valuation       {bulk_time:7.2f} s")
+    print(
+        f"one account at a time {single_time:6.2f} s  ({single_time / bulk_time:4.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Cold start benchmark of a worker: time to a ready WSGI application (URLconf
+loaded) and time of the first schema request, with the full app set and a
+live schema against the lean app set and the schema built by
+`manage.py build_schema`.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+ready = time.perf_counter()
+from django.test import Client
+response = Client().get("/api/schema/")
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({{"ready": ready - started, "first_request": done - ready,
+                  "modules": len(sys.modules)}}))
+"""
+
+
+def run(environment):
+    """
+    Starts one worker process; returns its timings in seconds and the number
+    of modules it imported.
+    """
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=str(ROOT))],
+        env=environment,
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started
+    return result
+
+
+def report(label, environment, runs):
+    results = [run(environment) for _ in range(runs)]
+    median = {
+        key: statistics.median(result[key] for result in results)
+        for key in ("process", "ready", "first_request")
+    }
+    print(
+        f"{label:<5} app ready {median['ready'] * 1000:7.1f} ms"
+        f"  first request {median['first_request'] * 1000:7.1f} ms"
+        f"  process total {median['process'] * 1000:7.1f} ms"
+        f"  modules {results[0]['modules']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    options = parser.parse_args()
+
+    base = dict(os.environ)
+    base.setdefault("SECRET_KEY", "benchmark")
+    base.setdefault("DB_NAME", "db.sqlite3")
+    with tempfile.TemporaryDirectory() as empty, tempfile.TemporaryDirectory() as built:
+        subprocess.run(
+            [sys.executable, "manage.py", "build_schema", "--directory", built],
+            env=base,
+            cwd=ROOT,
+            capture_output=True,
+            check=True,
+        )
+        full = {**base, "API_DOCS": "1", "DEV_APPS": "1", "API_SCHEMA_DIR": empty}
+        lean = {**base, "API_DOCS": "0", "DEV_APPS": "0", "API_SCHEMA_DIR": built}
+        report("full", full, options.runs)
+        report("lean", lean, options.runs)
+
+
+if __name__ == "__main__":
+    main()
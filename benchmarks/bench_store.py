@@ -0,0 +1,151 @@
+"""
+Memory and page-read benchmark of `ColumnStore` against the upstream list of
+dicts, on a synthetic coin universe shaped like the CoinGecko payloads.
+
+Usage:
+    python benchmarks/bench_store.py [--coins 15000]
+"""
+
+import argparse
+import gc
+import json
+import pathlib
+import random
+import string
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from apps.crypto.helpers.fields import project_rows  # noqa: E402
+from apps.crypto.store import ColumnStore  # noqa: E402
+
+
+def random_word(rng, low, high):
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(low, high)))
+
+
+def make_coins(rng, count):
+    coins = []
+    for number in range(count):
+        name = f"{random_word(rng, 4, 10).title()} {random_word(rng, 3, 8).title()}"
+        coins.append(
+            {
+                "id": f"{name.lower().replace(' ', '-')}-{number}",
+                "symbol": random_word(rng, 2, 5),
+                "name": name,
+            }
+        )
+    return coins
+
+
+def make_markets(rng, coins):
+    rows = []
+    for rank, coin in enumerate(coins, start=1):
+        price = rng.uniform(0.0001, 50000)
+        supply = rng.randint(10**6, 10**12)
+        rows.append(
+            {
+                **coin,
+                "image": f"https://coin-images.coingecko.com/coins/images/{rank}/"
+                f"large/{coin['symbol']}.png",
+                "current_price": price,
+                "market_cap": int(price * supply),
+                "market_cap_rank": rank,
+                "fully_diluted_valuation": None,
+                "total_volume": rng.uniform(0, 10**9),
+                "high_24h": price * 1.05,
+                "low_24h": price * 0.95,
+                "price_change_24h": price * 0.01,
+                "price_change_percentage_24h": rng.uniform(-20, 20),
+                "market_cap_change_24h": rng.uniform(-(10**6), 10**6),
+                "market_cap_change_percentage_24h": rng.uniform(-20, 20),
+                "circulating_supply": float(supply),
+                "total_supply": float(supply),
+                "max_supply": None,
+                "ath": price * 2,
+                "ath_change_percentage": rng.uniform(-99, 0),
+                "ath_date": "2024-03-14T07:10:36.635Z",
+                "atl": price / 2,
+                "atl_change_percentage": rng.uniform(0, 1000),
+                "atl_date": "2013-07-06T00:00:00.000Z",
+                "roi": None,
+                "last_updated": "2025-01-21T12:00:00.000Z",
+            }
+        )
+    return rows
+
+
+def measure(build):
+    """
+    Returns (result, bytes retained by result) for a zero-argument builder.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, retained
+
+
+def indexed(store):
+    store.index
+    return store
+
+
+def time_pages(read_page, pages=200, per_page=10):
+    """
+    Average microseconds to read one `per_page` page with `read_page`.
+    """
+    start = time.perf_counter()
+    for page in range(pages):
+        read_page(page * per_page, (page + 1) * per_page)
+    return (time.perf_counter() - start) / pages * 1e6
+
+
+def report(label, payload, key, fields):
+    # Decode from JSON so the dicts look exactly like `response.json()`.
+    encoded = json.dumps(payload)
+    rows, rows_bytes = measure(lambda: json.loads(encoded))
+    # The id to row map is part of the store's footprint, so build it too.
+    store, store_bytes = measure(
+        lambda: indexed(ColumnStore.from_rows(json.loads(encoded), key=key))
+    )
+    print(
+        f"{label:<11} rows={len(rows):>6}  list of dicts {rows_bytes / 2**20:7.2f} MiB"
+        f"  store {store_bytes / 2**20:6.2f} MiB"
+        f"  ({rows_bytes / max(store_bytes, 1):4.1f}x smaller)"
+    )
+    narrow = store.select(fields=fields)
+    print(
+        f"{'':<11} 10-row page: dicts {time_pages(lambda a, b: rows[a:b]):6.1f} us"
+        f"  store {time_pages(lambda a, b: store[a:b]):6.1f} us"
+        f"  | fields={','.join(fields)}: dicts "
+        f"{time_pages(lambda a, b: project_rows(rows[a:b], fields)):6.1f} us"
+        f"  store {time_pages(lambda a, b: narrow[a:b]):6.1f} us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coins", type=int, default=15000)
+    parser.add_argument("--seed", type=int, default=1)
+    options = parser.parse_args()
+
+    rng = random.Random(options.seed)
+    coins = make_coins(rng, options.coins)
+    categories = [
+        {"category_id": random_word(rng, 5, 20), "name": random_word(rng, 5, 30)}
+        for _ in range(700)
+    ]
+    markets = make_markets(rng, coins)
+
+    report("coins", coins, "id", ("id", "symbol"))
+    report("categories", categories, "category_id", ("category_id",))
+    report("markets", markets, "id", ("id", "symbol", "current_price", "market_cap"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Token authentication as the token table grows: time per `ExpiringTokenAuthentication`
+lookup with 10k, 100k and 1M historical tokens, most of them expired, and the
+time `purge_expired_tokens` takes to delete the expired ones in batches.
+
+Usage:
+    python benchmarks/bench_tokens.py [--lookups 2000] [--batch-size 1000]
+"""
+
+import argparse
+import datetime
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["DB_NAME"] = os.path.join(tempfile.mkdtemp(), "tokens.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from apps.account.authentication import (  # noqa: E402
+    ExpiringTokenAuthentication,
+    issue_token,
+    purge_expired_tokens,
+)
+from apps.account.models import AuthToken  # noqa: E402
+
+
+def fill(user, start, stop):
+    """
+    Adds the tokens numbered `start` to `stop`, expired over the last weeks.
+    """
+    now = timezone.now()
+    for first in range(start, stop, 10000):
+        AuthToken.objects.bulk_create(
+            [
+                AuthToken(
+                    key=f"{n:040x}",
+                    user=user,
+                    expires_at=now - datetime.timedelta(seconds=n + 1),
+                )
+                for n in range(first, min(first + 10000, stop))
+            ]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    options = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    user = get_user_model().objects.create_user(
+        email="bench@example.com", username="bench", password="bench"
+    )
+    token = issue_token(user)
+    authentication = ExpiringTokenAuthentication()
+    filled = 0
+    for count in (10_000, 100_000, 1_000_000):
+        fill(user, filled, count)
+        filled = count
+        started = time.perf_counter()
+        for _ in range(options.lookups):
+            authentication.authenticate_credentials(token.key)
+        lookup = (time.perf_counter() - started) / options.lookups
+        print(f"{count:>9} tokens  lookup {lookup * 1e6:7.1f} us")
+    started = time.perf_counter()
+    deleted = purge_expired_tokens(options.batch_size)
+    print(
+        f"purged {deleted} expired tokens in {time.perf_counter() - started:5.2f} s"
+        f" ({options.batch_size} per transaction)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -27,6 +29,10 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 # DEBUG = True if os.environ.get("DEBUG") == "1" else False
 DEBUG = True
 ALLOWED_HOSTS = ['*']
+# Client addresses treated as internal (comma separated), e.g. for Server-Timing
+INTERNAL_IPS = [ip for ip in os.environ.get("INTERNAL_IPS", "").split(",") if ip]
+# Running `manage.py test`: quieter defaults for tracing and logging
+TESTING = sys.argv[1:2] == ["test"]
 
 if not DEBUG:
     ALLOWED_HOSTS += [os.environ.get("ALLOWED_HOSTS")]
@@ -42,17 +48,27 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     # Thirdparty Apps
     "rest_framework",
+    # Only until its tokens are imported, see README (Authentication)
     "rest_framework.authtoken",
-    "drf_spectacular",
-    "drf_spectacular_sidecar",
-    "django_extensions",
     # Local Apps
     "apps.account",
     "apps.crypto",
 ]
 
+# Serve the interactive API docs (Swagger UI, ReDoc); lean workers set API_DOCS=0
+API_DOCS = os.environ.get("API_DOCS", "1") == "1"
+# Load development-only apps; lean production workers set DEV_APPS=0
+DEV_APPS = os.environ.get("DEV_APPS", "1") == "1"
+if API_DOCS:
+    INSTALLED_APPS += ["drf_spectacular", "drf_spectacular_sidecar"]
+if DEV_APPS:
+    INSTALLED_APPS += ["django_extensions"]
+
 MIDDLEWARE = [
+    "apps.crypto.middleware.tracing.TracingMiddleware",
+    "apps.crypto.middleware.access_log.AccessLogMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "apps.crypto.middleware.admission.AdmissionControlMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -61,6 +77,16 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Requests under these prefixes skip MIDDLEWARE and only run API_MIDDLEWARE
+# (see crypto-market/wsgi.py); the admin and the docs keep the full stack
+API_FAST_PATH_PREFIXES = ["/api/v1/", "/api/auth/"]
+API_MIDDLEWARE = [
+    "apps.crypto.middleware.tracing.TracingMiddleware",
+    "apps.crypto.middleware.access_log.AccessLogMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "apps.crypto.middleware.admission.AdmissionControlMiddleware",
+]
+
 ROOT_URLCONF = "crypto-market.urls"
 
 TEMPLATES = [
@@ -80,15 +106,97 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "crypto-market.wsgi.application"
+# `manage.py serve`: address, worker processes, threads per worker and the
+# seconds a worker may spend on a request before it is restarted
+SERVE_BIND = os.environ.get("SERVE_BIND", "0.0.0.0:8080")
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+SERVE_THREADS = int(os.environ.get("SERVE_THREADS", 4))
+SERVE_TIMEOUT = int(os.environ.get("SERVE_TIMEOUT", 30))
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# "sqlite" (DB_NAME is a file under BASE_DIR) or "postgres"
+DB_ENGINE = os.environ.get("DB_ENGINE", "sqlite")
+# Seconds a connection is kept open for the next requests of its worker
+# thread; 0 closes it after every request (Postgres: unused with DB_POOL_SIZE)
+DB_CONN_MAX_AGE = int(os.environ.get("DB_CONN_MAX_AGE", 60))
+# SQLite: write-ahead log so readers never block the writer and logins and
+# sign-ups wait on each other instead of failing with "database is locked";
+# writes take the lock when their transaction starts, not halfway through it
+DB_SQLITE_WAL = os.environ.get("DB_SQLITE_WAL", "1") == "1"
+# SQLite: milliseconds a write waits for the lock before giving up
+DB_SQLITE_BUSY_TIMEOUT = int(os.environ.get("DB_SQLITE_BUSY_TIMEOUT", 5000))
+# SQLite: bytes of the database file read through a memory map
+DB_SQLITE_MMAP_SIZE = int(os.environ.get("DB_SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+# Postgres: connections per worker process in the psycopg pool (max size);
+# 0 disables the pool and falls back to DB_CONN_MAX_AGE
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))
+# Postgres: connections the pool keeps open when idle
+DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+# Postgres: seconds a request waits for a free pooled connection
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 10))
+
+if DB_ENGINE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("DB_NAME"),
+            "USER": os.environ.get("DB_USER"),
+            "PASSWORD": os.environ.get("DB_PASSWORD"),
+            "HOST": os.environ.get("DB_HOST", "localhost"),
+            "PORT": os.environ.get("DB_PORT", "5432"),
+            "CONN_MAX_AGE": 0 if DB_POOL_SIZE else DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "pool": {
+                        "min_size": min(DB_POOL_MIN_SIZE, DB_POOL_SIZE),
+                        "max_size": DB_POOL_SIZE,
+                        "timeout": DB_POOL_TIMEOUT,
+                    }
+                }
+                if DB_POOL_SIZE
+                else {}
+            ),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / os.environ.get("DB_NAME"),
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": (
+                {
+                    "transaction_mode": "IMMEDIATE",
+                    "init_command": (
+                        "PRAGMA journal_mode=WAL;"
+                        "PRAGMA synchronous=NORMAL;"
+                        f"PRAGMA busy_timeout={DB_SQLITE_BUSY_TIMEOUT};"
+                        f"PRAGMA mmap_size={DB_SQLITE_MMAP_SIZE};"
+                        "PRAGMA temp_store=MEMORY;"
+                    ),
+                }
+                if DB_SQLITE_WAL
+                else {}
+            ),
+        }
+    }
+
+# Cache shared by all workers, through which the throttle counters combine.
+# The in-process default only suits a single worker: set CACHE_BACKEND to
+# "django.core.cache.backends.db.DatabaseCache" (CACHE_LOCATION is the table,
+# created by `createcachetable`) or to the Redis or Memcached backend
+# (CACHE_LOCATION is the server URL)
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / os.environ.get("DB_NAME"),
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
     }
 }
 
@@ -126,7 +234,12 @@ USE_TZ = True
 
 
 REST_FRAMEWORK = {
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Without the docs, DRF's own schema class keeps drf_spectacular unloaded
+    "DEFAULT_SCHEMA_CLASS": (
+        "drf_spectacular.openapi.AutoSchema"
+        if API_DOCS
+        else "rest_framework.schemas.openapi.AutoSchema"
+    ),
     "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.URLPathVersioning",
     # "DEFAULT_AUTHENTICATION_CLASSES": [
     #     "rest_framework.authentication.BasicAuthentication",
@@ -135,6 +248,28 @@ REST_FRAMEWORK = {
     # "DEFAULT_PERMISSION_CLASSES": [
     #     "rest_framework.permissions.IsAuthenticated",
     # ],
+    # Views opt in with `throttle_scope`; see ACCOUNT_THROTTLE_GROUP_RATES
+    "DEFAULT_THROTTLE_CLASSES": [
+        "apps.account.throttling.SlidingWindowThrottle",
+    ],
+    "DEFAULT_THROTTLE_RATES": {
+        "coin_list": os.environ.get("THROTTLE_COIN_LIST_RATE", "120/min"),
+        "coin_search": os.environ.get("THROTTLE_COIN_SEARCH_RATE", "300/min"),
+        "coin_categories": os.environ.get("THROTTLE_COIN_CATEGORIES_RATE", "60/min"),
+        "coin_market": os.environ.get("THROTTLE_COIN_MARKET_RATE", "120/min"),
+        "coin_history": os.environ.get("THROTTLE_COIN_HISTORY_RATE", "120/min"),
+        "coin_analytics": os.environ.get("THROTTLE_COIN_ANALYTICS_RATE", "60/min"),
+        "price_alerts": os.environ.get("THROTTLE_PRICE_ALERTS_RATE", "60/min"),
+        "portfolio": os.environ.get("THROTTLE_PORTFOLIO_RATE", "60/min"),
+        "auth": os.environ.get("THROTTLE_AUTH_RATE", "20/min"),
+    },
+    # The browsable API only comes with the development apps; with JSON alone
+    # content negotiation is skipped
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"]
+    + (["rest_framework.renderers.BrowsableAPIRenderer"] if DEV_APPS else []),
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": (
+        "apps.crypto.api.negotiation.SingleRendererNegotiation"
+    ),
     "DEFAULT_VERSION": "v1",
     "ALLOWED_VERSIONS": ["v1", "v2"],
 }
@@ -148,11 +283,207 @@ SPECTACULAR_SETTINGS = {
     'SWAGGER_UI_FAVICON_HREF': 'SIDECAR',
     'REDOC_DIST': 'SIDECAR',
 }
+# Directory of the OpenAPI schema written by `manage.py build_schema`
+API_SCHEMA_DIR = os.environ.get("API_SCHEMA_DIR", os.path.join(BASE_DIR, "schema"))
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 CRYPTO_GECO_BASE_URL = os.environ.get("CRYPTO_GECO_BASE_URL")
 CRYPTO_API_KEY = os.environ.get("CRYPTO_API_KEY")
+# Extra upstream base URLs (mirrors, pro endpoint, local replica), comma separated
+CRYPTO_GECO_MIRRORS = [
+    url.strip()
+    for url in os.environ.get("CRYPTO_GECO_MIRRORS", "").split(",")
+    if url.strip()
+]
+# Seconds an upstream request may take across all of its hedged attempts
+CRYPTO_UPSTREAM_TIMEOUT = float(os.environ.get("CRYPTO_UPSTREAM_TIMEOUT", 10))
+# Latency percentile of a mirror after which a backup request is sent
+CRYPTO_HEDGE_PERCENTILE = float(os.environ.get("CRYPTO_HEDGE_PERCENTILE", 95))
+# Hedge delay in seconds until a mirror has enough latency samples
+CRYPTO_HEDGE_DELAY = float(os.environ.get("CRYPTO_HEDGE_DELAY", 1.0))
+# Upstream attempts per request, the first one included
+CRYPTO_HEDGE_MAX_ATTEMPTS = int(os.environ.get("CRYPTO_HEDGE_MAX_ATTEMPTS", 2))
+# Seconds a mirror that failed is ranked last
+CRYPTO_MIRROR_PENALTY = float(os.environ.get("CRYPTO_MIRROR_PENALTY", 30))
+# Threads sending upstream requests
+CRYPTO_UPSTREAM_WORKERS = int(os.environ.get("CRYPTO_UPSTREAM_WORKERS", 16))
+# Concurrent requests per endpoint (URL name) and worker process; 0 disables.
+# Defaults stay below SERVE_THREADS, or the gate would never engage.
+CRYPTO_ADMISSION_LIMITS = {
+    "coin_market_v1": int(
+        os.environ.get("CRYPTO_ADMISSION_MARKET_LIMIT", max(1, SERVE_THREADS // 2))
+    ),
+}
+# Concurrent requests of the other /api/ endpoints, per endpoint and process
+CRYPTO_ADMISSION_DEFAULT_LIMIT = int(
+    os.environ.get("CRYPTO_ADMISSION_DEFAULT_LIMIT", max(1, SERVE_THREADS - 1))
+)
+# Requests that may wait for a free slot of an endpoint before it sheds load
+CRYPTO_ADMISSION_QUEUE_SIZE = int(os.environ.get("CRYPTO_ADMISSION_QUEUE_SIZE", 64))
+# Seconds a request waits for a free slot before it is rejected with a 503
+CRYPTO_ADMISSION_QUEUE_TIMEOUT = float(
+    os.environ.get("CRYPTO_ADMISSION_QUEUE_TIMEOUT", 2.0)
+)
+# Retry-After seconds sent with a 503
+CRYPTO_ADMISSION_RETRY_AFTER = int(os.environ.get("CRYPTO_ADMISSION_RETRY_AFTER", 1))
+# Endpoints that are never queued or shed
+CRYPTO_ADMISSION_EXEMPT = ["health_check_v1"]
+# Group whose tokens are admitted ahead of other waiting requests
+CRYPTO_PREMIUM_GROUP = os.environ.get("CRYPTO_PREMIUM_GROUP", "premium")
+# Throttle rates of user groups, by scope; the most generous rate applies
+ACCOUNT_THROTTLE_GROUP_RATES = {
+    "premium": {
+        "coin_list": "1200/min",
+        "coin_search": "3000/min",
+        "coin_market": "1200/min",
+        "coin_history": "1200/min",
+        "coin_analytics": "600/min",
+    },
+}
+# Seconds between two syncs of the in-process throttle counters to the cache
+ACCOUNT_THROTTLE_SYNC_INTERVAL = float(
+    os.environ.get("ACCOUNT_THROTTLE_SYNC_INTERVAL", 1.0)
+)
+# Seconds the group names of a user or token are cached in-process
+ACCOUNT_GROUP_CACHE_TIMEOUT = int(os.environ.get("ACCOUNT_GROUP_CACHE_TIMEOUT", 60))
+# Seconds an API token stays valid after its last renewal (default 7 days)
+ACCOUNT_TOKEN_TTL = int(os.environ.get("ACCOUNT_TOKEN_TTL", 7 * 24 * 3600))
+# Seconds of use before a token's expiry is slid forward (one write per interval)
+ACCOUNT_TOKEN_RENEW_INTERVAL = int(os.environ.get("ACCOUNT_TOKEN_RENEW_INTERVAL", 3600))
+# Seconds after login past which a token is no longer renewed (default 30 days)
+ACCOUNT_TOKEN_MAX_AGE = int(os.environ.get("ACCOUNT_TOKEN_MAX_AGE", 30 * 24 * 3600))
+# Expired tokens deleted per transaction by `purge_tokens`
+ACCOUNT_TOKEN_PURGE_BATCH_SIZE = int(
+    os.environ.get("ACCOUNT_TOKEN_PURGE_BATCH_SIZE", 1000)
+)
+# Matching accounts counted on an admin changelist; more show as "<limit>+"
+ACCOUNT_ADMIN_COUNT_LIMIT = int(os.environ.get("ACCOUNT_ADMIN_COUNT_LIMIT", 10000))
+# Accounts updated per statement by the admin bulk actions
+ACCOUNT_ADMIN_BATCH_SIZE = int(os.environ.get("ACCOUNT_ADMIN_BATCH_SIZE", 1000))
+# Seconds a rendered coin page (per projection) stays in the cache
+CRYPTO_PAGE_CACHE_TIMEOUT = int(os.environ.get("CRYPTO_PAGE_CACHE_TIMEOUT", 60))
+# Seconds an in-process snapshot of upstream data is served before a reload
+CRYPTO_SNAPSHOT_TIMEOUT = int(os.environ.get("CRYPTO_SNAPSHOT_TIMEOUT", 300))
+# Seconds a coin upstream has no price for is remembered by portfolio valuation
+CRYPTO_PRICE_MISS_TIMEOUT = int(os.environ.get("CRYPTO_PRICE_MISS_TIMEOUT", 60))
+# Snapshot diffs kept for `?since=` delta requests (older versions resync)
+CRYPTO_DELTA_HISTORY = int(os.environ.get("CRYPTO_DELTA_HISTORY", 32))
+# Pages of 250 coins held in the market snapshot (ranked by market cap)
+CRYPTO_MARKET_SNAPSHOT_PAGES = int(os.environ.get("CRYPTO_MARKET_SNAPSHOT_PAGES", 1))
+# Seconds before the category to coins membership is fetched again
+CRYPTO_CATEGORY_MEMBERS_TIMEOUT = int(
+    os.environ.get("CRYPTO_CATEGORY_MEMBERS_TIMEOUT", 6 * 3600)
+)
+# Categories fetched from upstream at the same time when loading the
+# category to coins membership
+CRYPTO_CATEGORY_FETCH_WORKERS = int(os.environ.get("CRYPTO_CATEGORY_FETCH_WORKERS", 4))
+# Pages of 250 coins fetched per category (ranked by market cap)
+CRYPTO_CATEGORY_MEMBER_PAGES = int(os.environ.get("CRYPTO_CATEGORY_MEMBER_PAGES", 4))
+# Seconds between the starts of two category requests to upstream
+CRYPTO_CATEGORY_FETCH_INTERVAL = float(
+    os.environ.get("CRYPTO_CATEGORY_FETCH_INTERVAL", 0.5)
+)
+# Attempts per category when upstream rate limits it (429)
+CRYPTO_CATEGORY_FETCH_ATTEMPTS = int(
+    os.environ.get("CRYPTO_CATEGORY_FETCH_ATTEMPTS", 3)
+)
+# Seconds category requests pause after a 429, doubled on each retry
+CRYPTO_CATEGORY_BACKOFF = float(os.environ.get("CRYPTO_CATEGORY_BACKOFF", 5))
+# Retry-After seconds sent while the category index is loading
+CRYPTO_CATEGORY_RETRY_AFTER = int(os.environ.get("CRYPTO_CATEGORY_RETRY_AFTER", 30))
+# Seconds before a snapshot that failed to load, or loaded in part (category
+# members), is fetched again
+CRYPTO_SNAPSHOT_RETRY_INTERVAL = float(
+    os.environ.get("CRYPTO_SNAPSHOT_RETRY_INTERVAL", 60)
+)
+# Directory of the snapshot file written by `manage.py refresh_snapshots` and
+# mapped by every worker; unset means each worker fetches upstream itself
+CRYPTO_SNAPSHOT_DIR = os.environ.get("CRYPTO_SNAPSHOT_DIR")
+# Seconds between two checks of the shared snapshot for a new version
+CRYPTO_SNAPSHOT_CHECK_INTERVAL = float(
+    os.environ.get("CRYPTO_SNAPSHOT_CHECK_INTERVAL", 1)
+)
+# Seconds after which a shared snapshot counts as abandoned (the refresher
+# stopped) and workers go back to refreshing from upstream themselves
+CRYPTO_SHARED_SNAPSHOT_MAX_AGE = float(
+    os.environ.get("CRYPTO_SHARED_SNAPSHOT_MAX_AGE", 2 * CRYPTO_SNAPSHOT_TIMEOUT)
+)
+# Currency market data is fetched in; other currencies are converted locally
+CRYPTO_BASE_CURRENCY = os.environ.get("CRYPTO_BASE_CURRENCY", "cad")
+# Seconds between two background refreshes of the exchange rate table
+CRYPTO_EXCHANGE_RATE_INTERVAL = float(
+    os.environ.get("CRYPTO_EXCHANGE_RATE_INTERVAL", 600)
+)
+# Directory of the recorded market history; unset disables recording
+CRYPTO_HISTORY_DIR = os.environ.get("CRYPTO_HISTORY_DIR")
+# Longest range, in days, one coin-history request reads
+CRYPTO_HISTORY_MAX_DAYS = int(os.environ.get("CRYPTO_HISTORY_MAX_DAYS", 366))
+# Dotted path of the class receiving triggered price alerts in batches
+# (`apps.crypto.alerts.LogSink` or `apps.crypto.alerts.JSONLinesSink`)
+CRYPTO_ALERT_SINK = os.environ.get("CRYPTO_ALERT_SINK", "apps.crypto.alerts.LogSink")
+# Triggered price alerts handed to the sink at once
+CRYPTO_ALERT_BATCH_SIZE = int(os.environ.get("CRYPTO_ALERT_BATCH_SIZE", 500))
+# File the JSONLinesSink appends triggered price alerts to
+CRYPTO_ALERT_LOG = os.environ.get(
+    "CRYPTO_ALERT_LOG", os.path.join(tempfile.gettempdir(), "price_alerts.jsonl")
+)
+# Time every request into a Server-Timing header and sampled trace spans
+CRYPTO_TRACING = os.environ.get("CRYPTO_TRACING", "1") == "1"
+# Who gets the Server-Timing header: "all", "internal" (staff users and
+# INTERNAL_IPS) or "off"
+CRYPTO_SERVER_TIMING = os.environ.get("CRYPTO_SERVER_TIMING", "internal")
+# Share of requests whose spans are exported (0 to 1)
+CRYPTO_TRACE_SAMPLE_RATE = float(
+    os.environ.get("CRYPTO_TRACE_SAMPLE_RATE", 0 if TESTING else 0.01)
+)
+# OTLP/JSON lines file the sampled traces are appended to
+CRYPTO_TRACE_FILE = os.environ.get(
+    "CRYPTO_TRACE_FILE", os.path.join(tempfile.gettempdir(), "traces.jsonl")
+)
+# Sampled traces waiting for the exporter thread; more are dropped
+CRYPTO_TRACE_QUEUE_SIZE = int(os.environ.get("CRYPTO_TRACE_QUEUE_SIZE", 1000))
+# `service.name` resource attribute of the exported spans
+CRYPTO_TRACE_SERVICE_NAME = os.environ.get("CRYPTO_TRACE_SERVICE_NAME", "crypto-market")
+
+# Log records are queued and written as JSON lines by a background thread,
+# to LOG_FILE or to standard error
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FILE = os.environ.get("LOG_FILE") or None
+# Records waiting to be written; more are dropped rather than block a request
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# Warnings and errors of one message let through per LOG_RATE_WINDOW seconds
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", 5))
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", 60))
+# One access log record per request, with latency fields, to `apps.access`
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "1") == "1"
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "rate_limit": {
+            "()": "apps.crypto.logs.RateLimitFilter",
+            "limit": LOG_RATE_LIMIT,
+            "window": LOG_RATE_WINDOW,
+        },
+    },
+    "handlers": {
+        "background": {
+            "()": "apps.crypto.logs.BackgroundHandler",
+            "filename": LOG_FILE,
+            "queue_size": LOG_QUEUE_SIZE,
+            "filters": ["rate_limit"],
+        },
+        "null": {"class": "logging.NullHandler"},
+    },
+    "root": {"handlers": ["background"], "level": LOG_LEVEL},
+}
+if TESTING:
+    # Tests still produce the access records (assertLogs sees them), but
+    # they are not printed.
+    LOGGING["loggers"] = {
+        "apps.access": {"handlers": ["null"], "propagate": False},
+    }
 STATIC_URL = "static/"
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
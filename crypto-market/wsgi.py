@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from apps.crypto.handlers import get_dispatching_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "crypto-market.settings")
 
-application = get_wsgi_application()
+application = get_dispatching_application()
+
+from apps.crypto.snapshots import start_refreshers  # noqa: E402
+
+# Lazy: with `gunicorn --preload` this runs in the master, and each forked
+# worker starts its own refresher on its first read.
+start_refreshers(lazy=True)